@@ -0,0 +1,582 @@
+# This file benchmarks every stage of the blob detection pipeline on the
+# images in the images folder and on synthetic images of different sizes,
+# and saves the results so that later changes can be compared against them.
+# For example:
+#
+# python benchmark.py --sizes 0.25,1,4 --oct-num 2,3 -o baseline.json
+#
+# runs get_blob_loc on every bundled image and on synthetic images of 0.25,
+# 1 and 4 megapixels, once with 2 octaves and once with 3 octaves, and
+# writes the results to baseline.json. Every image is first processed once
+# to warm up the caches of the kernels and FFT plans, and then processed
+# --repeats times. Each run calls get_blob_loc itself with a Profiler, so
+# the benchmark always measures the pipeline as it is, and the time of each
+# stage is read from the spans of the profiler:
+#
+# cvtColor - Conversion to grayscale and to the data type of the pipeline
+#
+# ss_octave - Computation of each octave in scale space using
+# get_ss_octave, which includes all of the convolutions
+#
+# DoG_squared - Computation of the squared DoG layers using get_DoG_squared
+#
+# threshold - Computation of the threshold values of the middle layers
+# using the thresholding strategy given by the --thresh arguments
+#
+# maxima - Non-maximum suppression using get_maxima_loc
+#
+# downsample - Down-sampling of the third layer of each octave
+#
+# The latency of the whole image is the wall time of get_blob_loc, which
+# is measured separately from the spans, since the spans of the stages can
+# overlap when threads > 1. The time of each stage is only a breakdown of
+# that latency, which is saved and printed as a separate report.
+#
+# For each stage and for the whole image, the mean, minimum, 50th, 90th and
+# 99th percentiles of the latencies are saved in seconds, as well as the
+# throughput in megapixels and images per second, the peak memory in bytes
+# and the number of blobs. The peak memory is measured by a separate run
+# using tracemalloc, so that it doesn't slow down the timed runs.
+#
+# The synthetic images are made of random blobs and noise, and are the
+# same for the same size and --seed. Please note that the memory used by
+# each pixel is estimated just like get_tile_size, which is about 700 bytes
+# with the default parameters and float64, so the largest sizes need
+# --dtype float32 or a lot of memory. The images whose estimated memory is
+# larger than --mem-limit are skipped.
+#
+# If --compare is given, the results are compared with a baseline written
+# by a previous run, and every case whose latency or peak memory is worse
+# than the baseline by more than --tolerance is reported as a regression.
+# In that case, the exit status is 1. If --workspace is given, every case
+# is computed in a Workspace that is reused by all of its runs, so a run
+# with --workspace can be compared with a baseline without it. The peak
+# memory run uses a new workspace, so the arrays of the workspace are part
+# of its peak memory. Please run python benchmark.py --help for all of the
+# options.
+
+# import the argparse library
+
+import argparse
+
+# import the glob library
+
+import glob
+
+# import the json library
+
+import json
+
+# import the os library
+
+import os
+
+# import the platform library
+
+import platform
+
+# import the sys library
+
+import sys
+
+# import the time library
+
+import time
+
+# import the tracemalloc library
+
+import tracemalloc
+
+# import NumPy library
+
+import numpy as np
+
+# import SciPy library
+
+import scipy
+
+# import OpenCV library
+
+import cv2 as cv
+
+# import the get_blob_loc() function
+
+from blob_detection.get_blob_loc import get_blob_loc
+
+# import the Profiler class
+
+from blob_detection.Profiler import Profiler
+
+# import the get_thresh_arg function
+
+from blob_detection.ThreshStrategy import get_thresh_arg
+
+# import the Workspace class
+
+from blob_detection.Workspace import Workspace
+
+# the stages of the pipeline in the order they are run
+
+STAGES = ('cvtColor','ss_octave','DoG_squared','threshold','maxima',
+          'downsample')
+
+# the names of the spans of get_blob_loc that make up each stage
+
+SPAN_NAMES = {'cvtColor':'cvtColor','ss_octave':'get_ss_octave',
+              'DoG_squared':'get_DoG_squared','threshold':'threshold',
+              'maxima':'get_maxima_loc','downsample':'downsample'}
+
+# the parameters that identify a case in the results
+
+CASE_KEYS = ('image','oct_num','DoG_layer_num','sigma','k','conv_engine',
+             'ss_mode','fft_backend','workers','threads','dtype',
+             'nms_engine','thresh','thresh_q','thresh_per_octave',
+             'thresh_subsample')
+
+def main(argv=None):
+    
+    parser = argparse.ArgumentParser(
+                 description='Benchmark every stage of blob detection.')
+    
+    parser.add_argument('--images',nargs='*',default=['../images/*'],
+                        help='image files or glob patterns '
+                             '(default: %(default)s)')
+    
+    parser.add_argument('--sizes',type=float_list,default=[0.25,1,4],
+                        help='comma-separated sizes of the synthetic images '
+                             'in megapixels (default: 0.25,1,4)')
+    
+    parser.add_argument('--seed',type=int,default=0,
+                        help='seed of the synthetic images (default: 0)')
+    
+    parser.add_argument('--repeats',type=int,default=5,
+                        help='number of timed runs of each case '
+                             '(default: 5)')
+    
+    parser.add_argument('--mem-limit',type=float,default=4.0,
+                        help='skip the images whose estimated memory is '
+                             'larger than this number of gigabytes '
+                             '(default: 4)')
+    
+    parser.add_argument('--no-memory',action='store_true',
+                        help="don't measure the peak memory")
+    
+    parser.add_argument('-o','--output',
+                        help='JSON file where the results are saved')
+    
+    parser.add_argument('--compare',
+                        help='JSON file of the baseline results')
+    
+    parser.add_argument('--tolerance',type=float,default=0.1,
+                        help='relative slowdown or memory increase reported '
+                             'as a regression (default: 0.1)')
+    
+    parser.add_argument('--metric',default='p50',
+                        choices=('mean','min','p50','p90','p99'),
+                        help='latency compared with the baseline '
+                             '(default: p50)')
+    
+    # parameters of get_blob_loc, where the parameters of the scale space
+    # can be swept with comma-separated lists
+    
+    parser.add_argument('--oct-num',type=int_list,default=[3])
+    
+    parser.add_argument('--DoG-layer-num',type=int_list,default=[4])
+    
+    parser.add_argument('--sigma',type=float_list,default=[1.6])
+    
+    parser.add_argument('--k',type=float,default=np.sqrt(2))
+    
+    parser.add_argument('--conv-engine',default='auto',
+                        choices=('auto','fft','spatial','box'))
+    
+    parser.add_argument('--ss-mode',default='direct',
+                        choices=('direct','incremental'))
+    
+    parser.add_argument('--fft-backend',default='fftpack',
+                        choices=('fftpack','rfft','fftw'))
+    
+    parser.add_argument('--fft-workers',type=int,default=1,
+                        help='number of threads used by each FFT')
+    
+    parser.add_argument('--threads',type=int,default=1,
+                        help='number of threads used by the stages of each '
+                             'octave')
+    
+    parser.add_argument('--dtype',default='float64',
+                        choices=('float64','float32'))
+    
+    parser.add_argument('--nms-engine',default='vectorized',
+                        choices=('vectorized','loop','coarse'))
+    
+    parser.add_argument('--thresh',default='yen',
+                        help='thresholding method (yen, otsu, mean or '
+                             'percentile) or a fixed threshold value '
+                             '(default: %(default)s)')
+    
+    parser.add_argument('--thresh-q',type=float,default=99.0)
+    
+    parser.add_argument('--thresh-per-octave',action='store_true')
+    
+    parser.add_argument('--thresh-subsample',type=int,default=1)
+    
+    parser.add_argument('--workspace',action='store_true',
+                        help='reuse the arrays of the pipeline between the '
+                             'runs of each case')
+    
+    args = parser.parse_args(argv)
+    
+    # read the bundled images, followed by the synthetic images
+    
+    images = []
+    
+    for pattern in args.images:
+        
+        for filename in sorted(glob.glob(pattern)):
+            
+            img = cv.imread(filename)
+            
+            if img is not None:
+                
+                images.append((os.path.basename(filename),img))
+    
+    for size in args.sizes:
+        
+        images.append(('synthetic_%gMP' % size,
+                       get_synthetic_img(size,args.seed)))
+    
+    itemsize = np.dtype(args.dtype).itemsize
+    
+    # the thresholding strategy and the arguments that describe it
+    
+    thresh = get_thresh_arg(args)
+    
+    thresh_params = dict(thresh=args.thresh,thresh_q=args.thresh_q,
+                         thresh_per_octave=args.thresh_per_octave,
+                         thresh_subsample=args.thresh_subsample)
+    
+    results = []
+    
+    for (name,img) in images:
+        
+        for oct_num in args.oct_num:
+            
+            for DoG_layer_num in args.DoG_layer_num:
+                
+                for sigma in args.sigma:
+                    
+                    params = dict(oct_num=oct_num,
+                                  DoG_layer_num=DoG_layer_num,sigma=sigma,
+                                  k=args.k,conv_engine=args.conv_engine,
+                                  ss_mode=args.ss_mode,
+                                  fft_backend=args.fft_backend,
+                                  workers=args.fft_workers,
+                                  threads=args.threads,dtype=args.dtype,
+                                  nms_engine=args.nms_engine,
+                                  workspace=args.workspace)
+                    
+                    # the memory used by the first octave, which is
+                    # estimated just like get_tile_size
+                    
+                    est_memory = ((16*(DoG_layer_num + 1) + 8)*itemsize*
+                                  img.shape[0]*img.shape[1])
+                    
+                    if est_memory > args.mem_limit*2**30:
+                        
+                        print('%s: skipped, needs about %.1f GB' %
+                              (name,est_memory/2**30),file=sys.stderr)
+                        
+                        continue
+                    
+                    result = run_case(img,params,thresh,args.repeats,
+                                      not args.no_memory)
+                    
+                    result.update(image=name,**params,**thresh_params)
+                    
+                    results.append(result)
+                    
+                    print_result(result)
+    
+    report = {'environment':get_environment(),'results':results}
+    
+    if args.output:
+        
+        with open(args.output,'w') as f:
+            
+            json.dump(report,f,indent=1)
+    
+    if args.compare:
+        
+        with open(args.compare) as f:
+            
+            baseline = json.load(f)
+        
+        regressions = compare_results(baseline['results'],results,
+                                      args.metric,args.tolerance)
+        
+        return 1 if regressions else 0
+    
+    return 0
+
+# These functions parse the comma-separated lists of the arguments.
+
+def int_list(value):
+    
+    return [int(v) for v in value.split(',')]
+
+def float_list(value):
+    
+    return [float(v) for v in value.split(',')]
+
+# This function generates a synthetic color image with the given number of
+# megapixels and an aspect ratio of 4:3. The image is made of random
+# Gaussian blobs of different sizes and intensities on a smooth background
+# with some noise, so it has a realistic number of blobs at every scale.
+
+def get_synthetic_img(megapixels,seed=0):
+    
+    rng = np.random.default_rng(seed)
+    
+    height = max(int(round(np.sqrt(megapixels*1e6*3/4))),1)
+    
+    width = max(int(round(megapixels*1e6/height)),1)
+    
+    # smooth background
+    
+    img = np.empty((height,width),dtype=np.float32)
+    
+    img[:] = np.linspace(64,128,width,dtype=np.float32)
+    
+    # random blobs, about 200 per megapixel
+    
+    blob_num = max(int(200*megapixels),1)
+    
+    centers = np.column_stack((rng.integers(0,width,blob_num),
+                               rng.integers(0,height,blob_num)))
+    
+    radii = np.exp(rng.uniform(np.log(2),np.log(40),blob_num)).astype(int)
+    
+    values = rng.uniform(-100,100,blob_num)
+    
+    for (center,radius,value) in zip(centers.tolist(),radii.tolist(),
+                                     values.tolist()):
+        
+        cv.circle(img,tuple(center),radius,value,-1)
+    
+    img = cv.GaussianBlur(img,(0,0),2)
+    
+    img += rng.normal(0,4,(height,width)).astype(np.float32)
+    
+    img = np.clip(img,0,255).astype(np.uint8)
+    
+    return cv.cvtColor(img,cv.COLOR_GRAY2BGR)
+
+# This function runs get_blob_loc on an image with a Profiler and reads
+# the time of each stage from its spans. The 'threshold' spans are nested
+# inside the 'get_maxima_loc' spans, so their time is taken out of the
+# maxima stage. It returns the wall time of get_blob_loc in seconds, a
+# dictionary with the total time of each stage in seconds and the number
+# of blobs.
+
+def time_blob_loc(input_img,oct_num,DoG_layer_num,sigma,k,conv_engine,
+                  ss_mode,fft_backend,workers,threads,dtype,nms_engine,
+                  thresh,workspace=None):
+    
+    profiler = Profiler()
+    
+    start_time = time.perf_counter()
+    
+    (_,maxima_layer_num) = get_blob_loc(input_img,oct_num,DoG_layer_num,
+                                        sigma,k,conv_engine=conv_engine,
+                                        ss_mode=ss_mode,
+                                        fft_backend=fft_backend,
+                                        workers=workers,dtype=dtype,
+                                        nms_engine=nms_engine,
+                                        thresh=thresh,profiler=profiler,
+                                        threads=threads,workspace=workspace)
+    
+    total_time = time.perf_counter() - start_time
+    
+    stats = profiler.get_stats()
+    
+    times = {stage:stats[name]['total'] if name in stats else 0.0
+             for (stage,name) in SPAN_NAMES.items()}
+    
+    times['maxima'] -= times['threshold']
+    
+    return (total_time,times,len(maxima_layer_num))
+
+# This function runs a case once to warm up and then repeats times using
+# the thresholding strategy thresh, and returns the statistics of its
+# latencies, its throughput, its peak memory and its number of blobs.
+
+def run_case(img,params,thresh,repeats,measure_memory=True):
+    
+    params = dict(params,dtype=np.dtype(params['dtype']).type,thresh=thresh,
+                  workspace=Workspace() if params['workspace'] else None)
+    
+    (_,_,blob_num) = time_blob_loc(img,**params)
+    
+    stage_times = {stage:[] for stage in STAGES}
+    
+    total_times = []
+    
+    for _ in range(repeats):
+        
+        (total_time,times,_) = time_blob_loc(img,**params)
+        
+        for stage in STAGES:
+            
+            stage_times[stage].append(times[stage])
+        
+        total_times.append(total_time)
+    
+    megapixels = img.shape[0]*img.shape[1]/1e6
+    
+    total = get_latency_stats(total_times)
+    
+    result = {'height':img.shape[0],'width':img.shape[1],
+              'megapixels':megapixels,'repeats':repeats,'blobs':blob_num,
+              'total':total,
+              'stages':{stage:get_latency_stats(stage_times[stage])
+                        for stage in STAGES},
+              'megapixels_per_s':megapixels/total['mean'],
+              'images_per_s':1/total['mean'],
+              'peak_memory':None}
+    
+    if measure_memory:
+        
+        tracemalloc.start()
+        
+        try:
+            
+            if params['workspace'] is not None:
+                
+                params['workspace'] = Workspace()
+            
+            time_blob_loc(img,**params)
+            
+            result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        
+        finally:
+            
+            tracemalloc.stop()
+    
+    return result
+
+# This function returns the statistics of a list of latencies.
+
+def get_latency_stats(latencies):
+    
+    latencies = np.asarray(latencies)
+    
+    return {'mean':float(np.mean(latencies)),
+            'min':float(np.min(latencies)),
+            'p50':float(np.percentile(latencies,50)),
+            'p90':float(np.percentile(latencies,90)),
+            'p99':float(np.percentile(latencies,99))}
+
+# This function returns the versions of the libraries and the machine used
+# to run the benchmark, so that results from different machines aren't
+# mistaken for regressions.
+
+def get_environment():
+    
+    return {'python':platform.python_version(),
+            'numpy':np.__version__,
+            'scipy':scipy.__version__,
+            'opencv':cv.__version__,
+            'platform':platform.platform(),
+            'processor':platform.processor(),
+            'cpu_count':os.cpu_count(),
+            'time':time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+# This function prints a single line with the main results of a case.
+
+def print_result(result):
+    
+    stages = ' '.join('%s=%.1fms' % (stage,1e3*result['stages'][stage]['p50'])
+                      for stage in STAGES)
+    
+    memory = ('%.1fMB' % (result['peak_memory']/2**20)
+              if result['peak_memory'] is not None else '-')
+    
+    print('%s oct=%d DoG=%d sigma=%g: p50=%.1fms p99=%.1fms %.2fMP/s '
+          'mem=%s blobs=%d | stages: %s' % (result['image'],result['oct_num'],
+                                    result['DoG_layer_num'],result['sigma'],
+                                    1e3*result['total']['p50'],
+                                    1e3*result['total']['p99'],
+                                    result['megapixels_per_s'],memory,
+                                    result['blobs'],stages))
+
+# This function compares the results with the baseline results of the same
+# cases, prints the regressions and returns their number. The number of
+# blobs is also compared, since a change of the number of blobs means that
+# the results of the pipeline changed.
+
+def compare_results(baseline,results,metric='p50',tolerance=0.1):
+    
+    baseline = {tuple(r.get(key) for key in CASE_KEYS):r for r in baseline}
+    
+    regressions = 0
+    
+    for result in results:
+        
+        old = baseline.get(tuple(result[key] for key in CASE_KEYS))
+        
+        if old is None:
+            
+            continue
+        
+        name = '%s oct=%d DoG=%d sigma=%g' % (result['image'],
+                                              result['oct_num'],
+                                              result['DoG_layer_num'],
+                                              result['sigma'])
+        
+        # compare the latency of the whole image and of each stage
+        
+        pairs = [('total',old['total'],result['total'])]
+        
+        pairs += [(stage,old['stages'][stage],result['stages'][stage])
+                  for stage in STAGES if stage in old['stages']]
+        
+        for (stage,old_stats,new_stats) in pairs:
+            
+            ratio = new_stats[metric]/max(old_stats[metric],1e-9)
+            
+            if ratio > 1 + tolerance:
+                
+                regressions += 1
+                
+                print('REGRESSION %s %s: %.2fms -> %.2fms (%+.0f%%)' %
+                      (name,stage,1e3*old_stats[metric],
+                       1e3*new_stats[metric],100*(ratio-1)))
+            
+            elif ratio < 1 - tolerance:
+                
+                print('improvement %s %s: %.2fms -> %.2fms (%+.0f%%)' %
+                      (name,stage,1e3*old_stats[metric],
+                       1e3*new_stats[metric],100*(ratio-1)))
+        
+        if (old['peak_memory'] is not None and
+            result['peak_memory'] is not None and
+            result['peak_memory'] > (1 + tolerance)*old['peak_memory']):
+            
+            regressions += 1
+            
+            print('REGRESSION %s peak memory: %.1fMB -> %.1fMB' %
+                  (name,old['peak_memory']/2**20,
+                   result['peak_memory']/2**20))
+        
+        if result['blobs'] != old['blobs']:
+            
+            print('CHANGED %s blobs: %d -> %d' % (name,old['blobs'],
+                                                  result['blobs']))
+    
+    print('%d regressions' % regressions)
+    
+    return regressions
+
+if __name__ == '__main__':
+    
+    sys.exit(main())
@@ -0,0 +1,499 @@
+# This class stores the results of get_blob_loc on disk, so the blobs of
+# an image that was already processed with the same parameters are read
+# back instead of being computed again, for example when a job is retried
+# or the same images are indexed again. The inputs to the constructor are:
+#
+# directory - The directory where the results are stored. It is created if
+# it doesn't exist, and it can be shared by many processes at the same
+# time.
+#
+# max_bytes - The maximum total size of the stored results in bytes. When
+# it is exceeded, the least recently used results are deleted.
+#
+# max_entries - The maximum number of stored results. If
+# max_entries = None, the number of results isn't limited.
+#
+# version - The version of the code that computes the results, which is
+# part of every key. It defaults to CACHE_VERSION, which has to be
+# incremented whenever a change to the pipeline changes its results, so
+# the old results are never read again.
+#
+# The key of each result is a hash of the bytes, shape and data type of the
+# input image together with the version and the parameters of
+# get_blob_loc that can change its results, which are all of its
+# parameters except for workers, threads, profiler and workspace. The
+# parameters that aren't given are replaced by their default values, and
+# the thresholding strategy is replaced by its method and parameters, so
+# equal parameters always give the same key. If the method of the strategy is a function,
+# only its name is part of the key, so the version has to be changed if
+# the function changes.
+#
+# Each result is stored in a compressed .npz file named after its key,
+# which is written to a temporary file first and then renamed, so the
+# other processes never read an incomplete result and the last of two
+# processes writing the same result wins. Reading a result updates the
+# modification time of its file, which is used as the time of its last
+# use. The total size of the results is checked by scanning the directory
+# when the estimated size of this process exceeds max_bytes, so the limits
+# can be exceeded by the results written by other processes since the
+# last scan. For example:
+#
+# cache = BlobCache('blob_cache',max_bytes=2**30)
+#
+# (maxima_idx,maxima_layer_num) = cache.get_blob_loc(img,oct_num=4)
+#
+# stats = cache.get_stats()
+#
+# where stats contains the number of hits, misses, writes, evictions and
+# unreadable results, the number of bytes written and the hit rate. The
+# statistics are counted by each BlobCache object separately, and they
+# start from zero when the object is sent to another process. The
+# statistics of such a copy can be added back using add_stats, which also
+# adds the results it wrote to the estimated size of the cache.
+
+# import the hashlib library
+
+import hashlib
+
+# import the inspect library
+
+import inspect
+
+# import the json library
+
+import json
+
+# import the os library
+
+import os
+
+# import the tempfile library
+
+import tempfile
+
+# import the time library
+
+import time
+
+# import NumPy library
+
+import numpy as np
+
+# import the get_blob_loc() function
+
+from .get_blob_loc import get_blob_loc
+
+# import the get_thresh_strategy() function
+
+from .ThreshStrategy import get_thresh_strategy
+
+# the version of the results of get_blob_loc
+
+CACHE_VERSION = 1
+
+# the parameters of get_blob_loc that don't change its results
+
+IGNORED_PARAMS = ('workers','threads','profiler','workspace')
+
+# the temporary files that are older than this number of seconds are left
+# by writers that were interrupted, and are deleted when the directory is
+# scanned
+
+TMP_MAX_AGE = 3600
+
+class BlobCache:
+    
+    def __init__(self,directory,max_bytes=2**30,max_entries=None,
+                 version=CACHE_VERSION):
+        
+        os.makedirs(directory,exist_ok=True)
+        
+        self.directory = directory
+        
+        self.max_bytes = max_bytes
+        
+        self.max_entries = max_entries
+        
+        self.version = version
+        
+        self.reset_stats()
+        
+        # the estimated total size and number of the stored results
+        
+        self.scan()
+    
+    def __getstate__(self):
+        
+        # the statistics of a copy sent to another process start from zero
+        
+        state = self.__dict__.copy()
+        
+        state['stats'] = dict.fromkeys(self.stats,0)
+        
+        return state
+    
+    def reset_stats(self):
+        
+        self.stats = {'hits':0,'misses':0,'writes':0,'written_bytes':0,
+                      'evictions':0,'errors':0}
+    
+    def add_stats(self,stats):
+        
+        # add the statistics of a copy of the cache, such as the copy used
+        # by a worker process
+        
+        for (key,value) in stats.items():
+            
+            self.stats[key] += value
+        
+        self.size += stats['written_bytes']
+        
+        self.entries += stats['writes']
+        
+        self.check_limits()
+    
+    def get_stats(self):
+        
+        stats = dict(self.stats)
+        
+        lookups = stats['hits'] + stats['misses']
+        
+        stats['hit_rate'] = stats['hits']/lookups if lookups else 0.0
+        
+        return stats
+    
+    def get_key(self,img,**kwargs):
+        
+        # the parameters of get_blob_loc, with the default values of the
+        # parameters that aren't given
+        
+        params = get_blob_loc_params(kwargs)
+        
+        params['version'] = self.version
+        
+        img = np.ascontiguousarray(img)
+        
+        h = hashlib.blake2b(digest_size=20)
+        
+        h.update(json.dumps(params,sort_keys=True).encode())
+        
+        h.update(repr((img.shape,img.dtype.str)).encode())
+        
+        h.update(img.data)
+        
+        return h.hexdigest()
+    
+    def get_path(self,key):
+        
+        # the results are split into subdirectories by the first two
+        # characters of their keys, so no directory gets too large
+        
+        return os.path.join(self.directory,key[:2],key + '.npz')
+    
+    def get(self,key):
+        
+        # return the stored result of the key, or None if there isn't one
+        
+        path = self.get_path(key)
+        
+        try:
+            
+            with np.load(path,allow_pickle=False) as data:
+                
+                result = load_result(data)
+        
+        except FileNotFoundError:
+            
+            self.stats['misses'] += 1
+            
+            return None
+        
+        except (OSError,ValueError,KeyError):
+            
+            # the file is corrupted, so it is treated as a miss and
+            # overwritten by the next put
+            
+            self.stats['errors'] += 1
+            
+            self.stats['misses'] += 1
+            
+            return None
+        
+        self.stats['hits'] += 1
+        
+        # mark the result as recently used
+        
+        try:
+            
+            os.utime(path)
+        
+        except OSError:
+            
+            pass
+        
+        return result
+    
+    def put(self,key,result):
+        
+        path = self.get_path(key)
+        
+        os.makedirs(os.path.dirname(path),exist_ok=True)
+        
+        # write the result to a unique temporary file in the same directory
+        # and rename it, which is atomic
+        
+        (fd,tmp_path) = tempfile.mkstemp(suffix='.tmp',
+                                         dir=os.path.dirname(path))
+        
+        try:
+            
+            with os.fdopen(fd,'wb') as f:
+                
+                np.savez_compressed(f,**save_result(result))
+            
+            size = os.path.getsize(tmp_path)
+            
+            os.replace(tmp_path,path)
+        
+        except BaseException:
+            
+            try:
+                
+                os.remove(tmp_path)
+            
+            except OSError:
+                
+                pass
+            
+            raise
+        
+        self.stats['writes'] += 1
+        
+        self.stats['written_bytes'] += size
+        
+        self.size += size
+        
+        self.entries += 1
+        
+        self.check_limits()
+    
+    def check_limits(self):
+        
+        if self.size > self.max_bytes or (self.max_entries is not None and
+                                          self.entries > self.max_entries):
+            
+            self.evict()
+    
+    def get_blob_loc(self,input_img,**kwargs):
+        
+        # return the stored result of the image, or compute it using
+        # get_blob_loc and store it
+        
+        key = self.get_key(input_img,**kwargs)
+        
+        result = self.get(key)
+        
+        if result is None:
+            
+            result = get_blob_loc(input_img,**kwargs)
+            
+            self.put(key,result)
+        
+        return result
+    
+    def scan(self):
+        
+        # return the (mtime,size,path) of every stored result, and update
+        # the total size and number of the results
+        
+        entries = []
+        
+        now = time.time()
+        
+        for sub in os.scandir(self.directory):
+            
+            if not sub.is_dir():
+                
+                continue
+            
+            for entry in os.scandir(sub.path):
+                
+                try:
+                    
+                    stat = entry.stat()
+                
+                except OSError:
+                    
+                    # deleted by another process
+                    
+                    continue
+                
+                if entry.name.endswith('.npz'):
+                    
+                    entries.append((stat.st_mtime,stat.st_size,entry.path))
+                
+                elif (entry.name.endswith('.tmp') and
+                      now - stat.st_mtime > TMP_MAX_AGE):
+                    
+                    remove_file(entry.path)
+        
+        self.size = sum([size for (_,size,_) in entries])
+        
+        self.entries = len(entries)
+        
+        return entries
+    
+    def evict(self):
+        
+        # delete the least recently used results until the limits are met
+        
+        entries = self.scan()
+        
+        entries.sort()
+        
+        max_entries = self.max_entries
+        
+        if max_entries is None:
+            
+            max_entries = len(entries)
+        
+        for (_,size,path) in entries:
+            
+            if self.size <= self.max_bytes and self.entries <= max_entries:
+                
+                break
+            
+            if remove_file(path):
+                
+                self.stats['evictions'] += 1
+            
+            self.size -= size
+            
+            self.entries -= 1
+    
+    def clear(self):
+        
+        for (_,_,path) in self.scan():
+            
+            remove_file(path)
+        
+        self.size = 0
+        
+        self.entries = 0
+
+# This function returns the parameters of get_blob_loc that can change its
+# results as a dictionary of JSON types, with the default values of the
+# parameters that aren't in kwargs.
+
+def get_blob_loc_params(kwargs):
+    
+    params = {}
+    
+    for (name,param) in inspect.signature(get_blob_loc).parameters.items():
+        
+        if name == 'input_img' or name in IGNORED_PARAMS:
+            
+            continue
+        
+        value = kwargs.get(name,param.default)
+        
+        if name == 'dtype':
+            
+            value = np.dtype(value).name
+        
+        elif name == 'thresh':
+            
+            value = get_thresh_params(value)
+        
+        elif name == 'roi' and value is not None:
+            
+            # a hash of the rectangles or of the mask
+            
+            roi = np.ascontiguousarray(value)
+            
+            value = [roi.shape,roi.dtype.str,
+                     hashlib.blake2b(roi.data,digest_size=20).hexdigest()]
+        
+        elif isinstance(param.default,float) or isinstance(value,float):
+            
+            # the exact value of the float
+            
+            value = float(value).hex()
+        
+        params[name] = value
+    
+    unknown = set(kwargs) - set(params) - set(IGNORED_PARAMS)
+    
+    if unknown:
+        
+        raise TypeError('unknown parameters of get_blob_loc: %s' %
+                        ', '.join(sorted(unknown)))
+    
+    return params
+
+# This function returns the thresholding strategy of get_blob_loc as a
+# dictionary of JSON types, or the explicit threshold values as a list.
+
+def get_thresh_params(thresh):
+    
+    if isinstance(thresh,(list,tuple,np.ndarray)):
+        
+        return [float(t).hex() for t in np.ravel(thresh)]
+    
+    strategy = get_thresh_strategy(thresh)
+    
+    method = strategy.method
+    
+    if callable(method):
+        
+        method = '%s.%s' % (method.__module__,method.__qualname__)
+    
+    value = strategy.value
+    
+    if value is not None:
+        
+        value = float(value).hex()
+    
+    return {'method':method,'per_octave':bool(strategy.per_octave),
+            'subsample':strategy.subsample,'q':float(strategy.q).hex(),
+            'value':value,'bins':strategy.bins}
+
+# These functions convert a result of get_blob_loc to the arrays stored in
+# its file, and back. The indices of the blobs are stored as an integer
+# array instead of a list of tuples.
+
+def save_result(result):
+    
+    if isinstance(result,np.ndarray):
+        
+        return {'blobs':result}
+    
+    (maxima_idx,maxima_layer_num) = result
+    
+    return {'maxima_idx':np.array(maxima_idx,dtype=np.int32).reshape((-1,2)),
+            'maxima_layer_num':maxima_layer_num}
+
+def load_result(data):
+    
+    if 'blobs' in data:
+        
+        return data['blobs']
+    
+    maxima_idx = [tuple(i) for i in data['maxima_idx'].tolist()]
+    
+    return (maxima_idx,data['maxima_layer_num'])
+
+# This function deletes a file, and returns False if it was already deleted
+# by another process.
+
+def remove_file(path):
+    
+    try:
+        
+        os.remove(path)
+    
+    except FileNotFoundError:
+        
+        return False
+    
+    return True
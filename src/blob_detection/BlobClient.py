@@ -0,0 +1,288 @@
+# This class is a client of the BlobServer, which sends images to the
+# server and returns their blobs. It only uses the standard library, so it
+# can be used by services that don't import OpenCV, and each request opens
+# its own connection, so the same client can be used by several threads at
+# a time. The inputs to the constructor are:
+#
+# port - The port of the server on the local host
+#
+# host - The host of the server
+#
+# path - The path of the Unix socket of the server. If it is given, the
+# port and host aren't used.
+#
+# timeout - The time in seconds to wait for the response of the server,
+# which should be longer than the timeout of the requests
+#
+# For example:
+#
+# client = BlobClient(port=8765)
+#
+# (maxima_idx,maxima_layer_num) = client.detect('../images/coins.png')
+#
+# returns the same outputs as get_blob_loc. This file can also be run to
+# send many images to a server at the same time and print the results and
+# the metrics of the server. Please run
+# python -m blob_detection.BlobClient --help for all of the options.
+
+# import the argparse library
+
+import argparse
+
+# import the glob library
+
+import glob
+
+# import the http library
+
+import http.client
+
+# import the io library
+
+import io
+
+# import the json library
+
+import json
+
+# import the socket library
+
+import socket
+
+# import the threading library
+
+import threading
+
+# import the time library
+
+import time
+
+# import the urllib library
+
+import urllib.parse
+
+# import the futures library
+
+from concurrent import futures
+
+class BlobClient:
+    
+    def __init__(self,port=8765,host='127.0.0.1',path=None,timeout=60.0):
+        
+        self.port = port
+        
+        self.host = host
+        
+        self.path = path
+        
+        self.timeout = timeout
+        
+        # the state of the last request of each thread
+        
+        self.local = threading.local()
+    
+    # This method sends a request to the server and returns the status and
+    # the body of the response.
+    
+    def request(self,method,url,body=None,headers=None):
+        
+        if self.path is not None:
+            
+            connection = UnixHTTPConnection(self.path,timeout=self.timeout)
+        
+        else:
+            
+            connection = http.client.HTTPConnection(self.host,self.port,
+                                                    timeout=self.timeout)
+        
+        try:
+            
+            connection.request(method,url,body=body,headers=headers or {})
+            
+            response = connection.getresponse()
+            
+            return (response.status,response.read())
+        
+        finally:
+            
+            connection.close()
+    
+    # This method detects the blobs in an image, which is either the name
+    # of an image file that is sent as is, or a NumPy array in the same
+    # format as the input of get_blob_loc. The time limit of the request in
+    # seconds and the parameters of get_blob_loc are passed to the server.
+    # It returns the same outputs as get_blob_loc. The size of the batch of
+    # the request is stored in self.local.batch_size, which is only seen by
+    # the thread that sent the request, so the same client can be used by
+    # several threads at a time.
+    
+    def detect(self,img,timeout=None,**params):
+        
+        if isinstance(img,str):
+            
+            with open(img,'rb') as f:
+                
+                (body,content_type) = (f.read(),'application/octet-stream')
+        
+        else:
+            
+            # import NumPy library only if it is used
+            
+            import numpy as np
+            
+            buffer = io.BytesIO()
+            
+            np.save(buffer,img,allow_pickle=False)
+            
+            (body,content_type) = (buffer.getvalue(),'application/x-npy')
+        
+        if timeout is not None:
+            
+            params['timeout'] = timeout
+        
+        url = '/detect?' + urllib.parse.urlencode(
+                               {name: get_param_str(value)
+                                for (name,value) in params.items()})
+        
+        (status,data) = self.request('POST',url,body,
+                                     {'Content-Type': content_type})
+        
+        response = json.loads(data)
+        
+        if status != 200:
+            
+            raise RuntimeError('the server answered %d: %s' %
+                               (status,response['error']))
+        
+        self.local.batch_size = response['batch_size']
+        
+        maxima_idx = [tuple(idx) for idx in response['maxima_idx']]
+        
+        return (maxima_idx,response['maxima_layer_num'])
+    
+    # This method returns the metrics of the server as a dictionary, where
+    # the keys are the names of the samples, including their labels.
+    
+    def get_metrics(self):
+        
+        (status,data) = self.request('GET','/metrics')
+        
+        metrics = {}
+        
+        for line in data.decode().splitlines():
+            
+            if line and not line.startswith('#'):
+                
+                (name,value) = line.rsplit(' ',1)
+                
+                metrics[name] = float(value)
+        
+        return metrics
+    
+    # This method returns the status of the server.
+    
+    def get_health(self):
+        
+        return json.loads(self.request('GET','/health')[1])
+
+# This class is an HTTP connection over a Unix socket.
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    
+    def __init__(self,path,timeout=None):
+        
+        super().__init__('localhost',timeout=timeout)
+        
+        self.socket_path = path
+    
+    def connect(self):
+        
+        self.sock = socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+        
+        self.sock.settimeout(self.timeout)
+        
+        self.sock.connect(self.socket_path)
+
+# This function converts a parameter of get_blob_loc to the string sent in
+# the query string, where data types are sent by name.
+
+def get_param_str(value):
+    
+    if isinstance(value,type):
+        
+        return value.__name__
+    
+    return str(value)
+
+def main(argv=None):
+    
+    parser = argparse.ArgumentParser(
+                 description='Send images to a local blob detection server.')
+    
+    parser.add_argument('images',nargs='+',
+                        help='image files or glob patterns')
+    
+    parser.add_argument('--host',default='127.0.0.1',
+                        help='host of the server (default: %(default)s)')
+    
+    parser.add_argument('--port',type=int,default=8765,
+                        help='port of the server (default: %(default)s)')
+    
+    parser.add_argument('--unix',default=None,
+                        help='path of the Unix socket of the server')
+    
+    parser.add_argument('--concurrency',type=int,default=4,
+                        help='number of requests sent at the same time')
+    
+    parser.add_argument('--repeat',type=int,default=1,
+                        help='number of times each image is sent')
+    
+    parser.add_argument('--timeout',type=float,default=None,
+                        help='time limit of each request in seconds')
+    
+    parser.add_argument('--param',action='append',default=[],
+                        metavar='NAME=VALUE',
+                        help='parameter of get_blob_loc, such as '
+                             'oct_num=4, which can be repeated')
+    
+    args = parser.parse_args(argv)
+    
+    client = BlobClient(port=args.port,host=args.host,path=args.unix)
+    
+    params = dict([param.split('=',1) for param in args.param])
+    
+    paths = [path for pattern in args.images
+             for path in sorted(glob.glob(pattern)) or [pattern]]
+    
+    # detect the blobs of an image and measure the time of its request
+    
+    def detect(path):
+        
+        start_time = time.perf_counter()
+        
+        try:
+            
+            (maxima_idx,_) = client.detect(path,timeout=args.timeout,
+                                           **params)
+            
+            result = '%d blobs' % len(maxima_idx)
+        
+        except (RuntimeError,OSError) as error:
+            
+            result = str(error)
+        
+        return (path,result,time.perf_counter() - start_time)
+    
+    with futures.ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        
+        for (path,result,seconds) in pool.map(detect,paths*args.repeat):
+            
+            print('%-32s %-40s %7.3fs' % (path,result,seconds))
+    
+    for (name,value) in client.get_metrics().items():
+        
+        print('%s %g' % (name,value))
+
+if __name__ == '__main__':
+    
+    main()
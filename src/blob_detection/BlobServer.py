@@ -0,0 +1,862 @@
+# This class is a long-running local server that detects blobs using
+# get_blob_loc, so the services that detect blobs don't have to import
+# OpenCV, SciPy and scikit-image and warm them up themselves. The server
+# uses asyncio to accept HTTP requests on a TCP port or a Unix socket, and
+# the images are processed by a pool of worker processes. The inputs to
+# the constructor are:
+#
+# workers - The number of worker processes. Each worker is a separate
+# process, so the images are processed on different cores at the same
+# time, and a worker that crashes is replaced without stopping the server.
+#
+# max_batch - The maximum number of images sent to a worker at once
+#
+# batch_delay - The time in seconds that the first image of a batch waits
+# for more images, unless the batch is already full
+#
+# max_pending - The maximum number of requests that are accepted but not
+# answered yet. Any request beyond this limit is rejected right away with
+# the status 503 and a Retry-After header, so a burst of requests can't
+# fill the memory of the server with images.
+#
+# timeout - The default and maximum time in seconds to answer a request.
+# A request that takes longer is answered with the status 504, and it is
+# dropped if it hasn't been sent to a worker yet.
+#
+# max_body - The maximum size of a request in bytes
+#
+# The requests are grouped into batches of images with the same shape and
+# the same parameters, and each batch is sent to a single worker. The
+# Gaussian kernels, their spectra and the FFT plans are stored by each
+# worker process for every shape, so each batch only computes them once.
+# Each worker also prefers the batches with the shape of its last batch,
+# which it has already computed them for. The server has the following
+# endpoints:
+#
+# POST /detect - Detect the blobs in the image in the body of the request,
+# which is either an encoded image file such as a PNG or JPEG file, or a
+# .npy file of a color or grayscale image saved by np.save if the
+# Content-Type is application/x-npy. The parameters of get_blob_loc are
+# given in the query string, for example /detect?oct_num=4&thresh=otsu, as
+# well as the time limit of the request in seconds, for example
+# timeout=5. The response is a JSON object with the outputs of
+# get_blob_loc in maxima_idx and maxima_layer_num, and the number of images
+# in the batch of the request in batch_size.
+#
+# GET /metrics - The number of requests by status, the number of queued
+# and running requests, the number and size of the batches, and the time
+# spent in the requests and workers, in the text format of Prometheus.
+#
+# GET /health - A JSON object with the status of the server
+#
+# Errors are answered with a JSON object with an error message. The server
+# only listens on the local host by default, and it doesn't need a network
+# connection. For example:
+#
+# python -m blob_detection.BlobServer --port 8765 --workers 2
+#
+# starts a server on port 8765 with 2 workers, which can be used by the
+# BlobClient class. Please run python -m blob_detection.BlobServer --help
+# for all of the options.
+
+# import the argparse library
+
+import argparse
+
+# import the asyncio library
+
+import asyncio
+
+# import the collections library
+
+import collections
+
+# import the io library
+
+import io
+
+# import the json library
+
+import json
+
+# import the multiprocessing library
+
+import multiprocessing
+
+# import the signal library
+
+import signal
+
+# import the sys library
+
+import sys
+
+# import the urllib library
+
+import urllib.parse
+
+# import the futures library
+
+from concurrent import futures
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import OpenCV library
+
+cv = lazy_import('cv2')
+
+# import NumPy library
+
+import numpy as np
+
+# import the get_blob_loc function
+
+from .get_blob_loc import get_blob_loc
+
+# import the get_workspace function
+
+from .Workspace import get_workspace
+
+# the parameters of get_blob_loc that can be given in the query string of
+# a request, and the functions that convert them from strings
+
+SERVER_PARAMS = {'oct_num': int,'DoG_layer_num': int,'sigma': float,
+                 'k': float,'conv_engine': str,'ss_mode': str,
+                 'fft_backend': str,'nms_engine': str,'nms_margin': int,
+                 'pipeline': str,
+                 'dtype': lambda value: get_dtype(value),
+                 'thresh': lambda value: get_thresh_value(value)}
+
+# the reason phrases of the status codes used by the server
+
+STATUS_REASONS = {200: 'OK',400: 'Bad Request',404: 'Not Found',
+                  405: 'Method Not Allowed',413: 'Payload Too Large',
+                  500: 'Internal Server Error',503: 'Service Unavailable',
+                  504: 'Gateway Timeout'}
+
+class BlobServer:
+    
+    def __init__(self,workers=1,max_batch=8,batch_delay=0.005,
+                 max_pending=64,timeout=30.0,max_body=2**26):
+        
+        self.num_workers = workers
+        
+        self.max_batch = max_batch
+        
+        self.batch_delay = batch_delay
+        
+        self.max_pending = max_pending
+        
+        self.timeout = timeout
+        
+        self.max_body = max_body
+        
+        # the queued requests of each batch key, in the order in which the
+        # keys were first queued
+        
+        self.buckets = collections.OrderedDict()
+        
+        # the number of requests that are accepted but not answered yet,
+        # and the number of requests that are processed by the workers
+        
+        self.pending = 0
+        
+        self.running = 0
+        
+        self.stats = {'responses': collections.Counter(),'batches': 0,
+                      'batch_images': 0,'request_seconds': 0.0,
+                      'requests': 0,'worker_seconds': 0.0,
+                      'worker_restarts': 0}
+        
+        self.workers = []
+        
+        self.tasks = []
+        
+        self.server = None
+    
+    # This method starts the worker processes, waits until every worker is
+    # warmed up, and then starts to accept requests on the TCP port of the
+    # host, or on the Unix socket at path if it is given. It returns the
+    # asyncio server.
+    
+    async def start(self,host='127.0.0.1',port=8765,path=None):
+        
+        loop = asyncio.get_running_loop()
+        
+        self.ready = asyncio.Condition()
+        
+        self.start_time = loop.time()
+        
+        self.workers = [{'executor': get_executor(),'key': None}
+                        for _ in range(self.num_workers)]
+        
+        await asyncio.gather(*[loop.run_in_executor(worker['executor'],
+                                                    warm_up)
+                               for worker in self.workers])
+        
+        self.tasks = [asyncio.create_task(self.run_worker(worker))
+                      for worker in self.workers]
+        
+        if path is not None:
+            
+            self.server = await asyncio.start_unix_server(
+                              self.handle_connection,path=path)
+        
+        else:
+            
+            self.server = await asyncio.start_server(self.handle_connection,
+                                                     host,port)
+        
+        return self.server
+    
+    # This method stops accepting requests, answers the queued requests
+    # with an error and stops the worker processes.
+    
+    async def close(self):
+        
+        if self.server is not None:
+            
+            self.server.close()
+            
+            await self.server.wait_closed()
+        
+        for task in self.tasks:
+            
+            task.cancel()
+        
+        await asyncio.gather(*self.tasks,return_exceptions=True)
+        
+        for jobs in self.buckets.values():
+            
+            for job in jobs:
+                
+                if not job['future'].done():
+                    
+                    job['future'].set_exception(
+                        RuntimeError('the server is shutting down'))
+        
+        self.buckets.clear()
+        
+        # wait for the worker processes to exit, without blocking the loop
+        
+        await asyncio.gather(*[asyncio.to_thread(worker['executor'].shutdown,
+                                                 cancel_futures=True)
+                               for worker in self.workers])
+    
+    # This method reads the HTTP requests of a connection one after the
+    # other and writes their responses, until the client closes the
+    # connection or asks to close it.
+    
+    async def handle_connection(self,reader,writer):
+        
+        try:
+            
+            while True:
+                
+                request_line = await reader.readline()
+                
+                if not request_line:
+                    
+                    break
+                
+                try:
+                    
+                    (method,target,version) = request_line.decode(
+                                                  'latin-1').split()
+                
+                except ValueError:
+                    
+                    await write_response(writer,400,
+                                         get_error('bad request line'),
+                                         keep_alive=False)
+                    
+                    break
+                
+                # the header names are case-insensitive
+                
+                headers = {}
+                
+                while True:
+                    
+                    line = await reader.readline()
+                    
+                    if line in (b'\r\n',b'\n',b''):
+                        
+                        break
+                    
+                    (name,_,value) = line.decode('latin-1').partition(':')
+                    
+                    headers[name.strip().lower()] = value.strip()
+                
+                length = int(headers.get('content-length',0))
+                
+                keep_alive = (version == 'HTTP/1.1' and
+                              headers.get('connection','').lower() != 'close')
+                
+                if length > self.max_body:
+                    
+                    # the body isn't read, so the connection is closed
+                    
+                    self.stats['responses'][413] += 1
+                    
+                    await write_response(writer,413,
+                                         get_error('the request is larger '
+                                                   'than %d bytes' %
+                                                   self.max_body),
+                                         keep_alive=False)
+                    
+                    break
+                
+                body = await reader.readexactly(length)
+                
+                (status,content,extra) = await self.handle_request(
+                                             method,target,headers,body)
+                
+                await write_response(writer,status,content,extra,
+                                     keep_alive)
+                
+                if not keep_alive:
+                    
+                    break
+        
+        except (asyncio.IncompleteReadError,ConnectionError):
+            
+            pass
+        
+        finally:
+            
+            writer.close()
+    
+    # This method returns the status, the content and the extra headers of
+    # the response to a request, where the content is either a dictionary
+    # that is sent as JSON or a string.
+    
+    async def handle_request(self,method,target,headers,body):
+        
+        url = urllib.parse.urlsplit(target)
+        
+        routes = {'/detect': 'POST','/metrics': 'GET','/health': 'GET'}
+        
+        if url.path not in routes:
+            
+            return (404,get_error("unknown path '%s'" % url.path),{})
+        
+        if method != routes[url.path]:
+            
+            return (405,get_error('use %s for %s' % (routes[url.path],
+                                                      url.path)),
+                    {'Allow': routes[url.path]})
+        
+        if url.path == '/metrics':
+            
+            return (200,self.get_metrics(),{})
+        
+        if url.path == '/health':
+            
+            return (200,{'status': 'ok','workers': len(self.workers),
+                         'pending': self.pending},{})
+        
+        response = await self.detect(body,headers.get('content-type',''),
+                                     urllib.parse.parse_qs(url.query))
+        
+        self.stats['responses'][response[0]] += 1
+        
+        return response
+    
+    # This method detects the blobs of a request and returns the status,
+    # the content and the extra headers of its response.
+    
+    async def detect(self,body,content_type,query):
+        
+        loop = asyncio.get_running_loop()
+        
+        start_time = loop.time()
+        
+        # reject the request right away if too many requests are pending
+        
+        if self.pending >= self.max_pending:
+            
+            return (503,get_error('too many pending requests'),
+                    {'Retry-After': '1'})
+        
+        try:
+            
+            params = get_server_params(query)
+            
+            timeout = min(float(query.pop('timeout',[self.timeout])[-1]),
+                          self.timeout)
+        
+        except ValueError as error:
+            
+            return (400,get_error(str(error)),{})
+        
+        self.pending += 1
+        
+        try:
+            
+            # the image is decoded by a thread, so the other requests
+            # aren't blocked
+            
+            try:
+                
+                img = await loop.run_in_executor(None,decode_image,body,
+                                                 content_type)
+            
+            except ValueError as error:
+                
+                return (400,get_error(str(error)),{})
+            
+            # the requests with the same key are processed in the same
+            # batch
+            
+            key = (img.shape,img.dtype.str,tuple(sorted(params.items())))
+            
+            job = {'img': img,'params': params,'time': loop.time(),
+                   'future': loop.create_future()}
+            
+            async with self.ready:
+                
+                self.buckets.setdefault(key,[]).append(job)
+                
+                self.ready.notify_all()
+            
+            try:
+                
+                (result,batch_size) = await asyncio.wait_for(
+                                          job['future'],
+                                          start_time + timeout - loop.time())
+            
+            except asyncio.TimeoutError:
+                
+                return (504,get_error('the request took longer than %g '
+                                      'seconds' % timeout),{})
+            
+            except RuntimeError as error:
+                
+                return (503,get_error(str(error)),{})
+            
+            if isinstance(result,ValueError):
+                
+                return (400,get_error(str(result)),{})
+            
+            elif isinstance(result,Exception):
+                
+                return (500,get_error('%s: %s' % (type(result).__name__,
+                                                  result)),{})
+            
+            self.stats['requests'] += 1
+            
+            self.stats['request_seconds'] += loop.time() - start_time
+            
+            return (200,{'maxima_idx': result[0],
+                         'maxima_layer_num': result[1],
+                         'batch_size': batch_size},{})
+        
+        finally:
+            
+            self.pending -= 1
+    
+    # This method sends the batches of requests to a worker process one
+    # after the other, and sets the result of every request of the batch.
+    
+    async def run_worker(self,worker):
+        
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            
+            (key,jobs) = await self.get_batch(worker)
+            
+            worker['key'] = key
+            
+            self.running += len(jobs)
+            
+            start_time = loop.time()
+            
+            try:
+                
+                results = await loop.run_in_executor(worker['executor'],
+                                                     detect_batch,
+                                                     [job['img']
+                                                      for job in jobs],
+                                                     jobs[0]['params'])
+            
+            except futures.process.BrokenProcessPool as error:
+                
+                # the worker process died, so it is shut down and replaced by
+                # a new one
+                
+                results = [error]*len(jobs)
+                
+                worker['executor'].shutdown(wait=False)
+                
+                worker['executor'] = get_executor()
+                
+                worker['key'] = None
+                
+                self.stats['worker_restarts'] += 1
+            
+            except Exception as error:
+                
+                # any other error, such as an image that can't be sent to
+                # the worker process, is the result of every request of the
+                # batch, and the worker keeps handling the next batches
+                
+                results = [error]*len(jobs)
+            
+            finally:
+                
+                self.running -= len(jobs)
+            
+            self.stats['batches'] += 1
+            
+            self.stats['batch_images'] += len(jobs)
+            
+            self.stats['worker_seconds'] += loop.time() - start_time
+            
+            for (job,result) in zip(jobs,results):
+                
+                if not job['future'].done():
+                    
+                    job['future'].set_result((result,len(jobs)))
+    
+    # This method waits for the next batch of a worker and returns its key
+    # and its requests. The worker takes the batch with the same key as its
+    # last batch if there is one, and the oldest batch otherwise. A batch
+    # that isn't full waits until its first request is batch_delay seconds
+    # old. The requests that timed out are dropped.
+    
+    async def get_batch(self,worker):
+        
+        loop = asyncio.get_running_loop()
+        
+        async with self.ready:
+            
+            while True:
+                
+                await self.ready.wait_for(lambda: self.buckets)
+                
+                if worker['key'] in self.buckets:
+                    
+                    key = worker['key']
+                
+                else:
+                    
+                    key = next(iter(self.buckets))
+                
+                jobs = [job for job in self.buckets[key]
+                        if not job['future'].done()]
+                
+                if not jobs:
+                    
+                    del self.buckets[key]
+                    
+                    continue
+                
+                self.buckets[key] = jobs
+                
+                delay = jobs[0]['time'] + self.batch_delay - loop.time()
+                
+                if len(jobs) >= self.max_batch or delay <= 0:
+                    
+                    break
+                
+                # wait for more requests, or for the delay to pass
+                
+                try:
+                    
+                    await asyncio.wait_for(self.ready.wait(),delay)
+                
+                except asyncio.TimeoutError:
+                    
+                    pass
+            
+            if len(jobs) > self.max_batch:
+                
+                self.buckets[key] = jobs[self.max_batch:]
+            
+            else:
+                
+                del self.buckets[key]
+            
+            return (key,jobs[:self.max_batch])
+    
+    # This method returns the metrics of the server in the text format of
+    # Prometheus.
+    
+    def get_metrics(self):
+        
+        queued = sum([len([job for job in jobs if not job['future'].done()])
+                      for jobs in self.buckets.values()])
+        
+        metrics = [('requests_total','counter',
+                    'Number of detection requests by status',
+                    [('{status="%d"}' % status,count) for (status,count)
+                     in sorted(self.stats['responses'].items())]),
+                   ('pending','gauge',
+                    'Number of accepted requests that are not answered yet',
+                    [('',self.pending)]),
+                   ('queued','gauge',
+                    'Number of requests waiting for a worker',
+                    [('',queued)]),
+                   ('running','gauge',
+                    'Number of requests processed by the workers',
+                    [('',self.running)]),
+                   ('max_pending','gauge',
+                    'Maximum number of pending requests',
+                    [('',self.max_pending)]),
+                   ('workers','gauge','Number of worker processes',
+                    [('',len(self.workers))]),
+                   ('worker_restarts_total','counter',
+                    'Number of worker processes that were replaced',
+                    [('',self.stats['worker_restarts'])]),
+                   ('batches_total','counter','Number of batches',
+                    [('',self.stats['batches'])]),
+                   ('batch_images_total','counter',
+                    'Number of images in all of the batches',
+                    [('',self.stats['batch_images'])]),
+                   ('worker_seconds_total','counter',
+                    'Time spent by the workers in the batches',
+                    [('',self.stats['worker_seconds'])]),
+                   ('request_seconds','summary',
+                    'Time taken by the successful requests',
+                    [('_sum',self.stats['request_seconds']),
+                     ('_count',self.stats['requests'])]),
+                   ('uptime_seconds','gauge','Time since the server started',
+                    [('',asyncio.get_running_loop().time() -
+                      self.start_time)])]
+        
+        lines = []
+        
+        for (name,kind,description,samples) in metrics:
+            
+            lines.append('# HELP blob_server_%s %s' % (name,description))
+            
+            lines.append('# TYPE blob_server_%s %s' % (name,kind))
+            
+            for (suffix,value) in samples:
+                
+                lines.append('blob_server_%s%s %s' % (name,suffix,
+                                                      repr(value)))
+        
+        return '\n'.join(lines) + '\n'
+
+# This function returns a pool with a single worker process. Each worker
+# has its own pool, so every batch with the same key can be sent to the
+# same worker. The workers are spawned instead of forked, since the server
+# has a running event loop and several threads.
+
+def get_executor():
+    
+    return futures.ProcessPoolExecutor(
+               max_workers=1,mp_context=multiprocessing.get_context('spawn'))
+
+# This function is run by every worker process when it starts, so the
+# libraries are imported and their first calls are done before the
+# requests arrive.
+
+def warm_up():
+    
+    img = np.random.default_rng(0).integers(0,256,(64,64,3),dtype=np.uint8)
+    
+    get_blob_loc(img,oct_num=2)
+
+# This function detects the blobs in a batch of images using the same
+# parameters, and is run by the worker processes. It returns a list with
+# the (maxima_idx,maxima_layer_num) lists of each image, or the exception
+# raised by the image.
+
+def detect_batch(images,params):
+    
+    results = []
+    
+    # the images of the process are computed in the same workspace
+    
+    workspace = get_workspace()
+    
+    for img in images:
+        
+        try:
+            
+            (maxima_idx,maxima_layer_num) = get_blob_loc(img,
+                                                         workspace=workspace,
+                                                         **params)
+            
+            results.append((maxima_idx,np.asarray(maxima_layer_num).tolist()))
+        
+        except Exception as error:
+            
+            results.append(error)
+    
+    return results
+
+# This function converts the query string of a request to the parameters
+# of get_blob_loc, except for the timeout which is left in the query.
+
+def get_server_params(query):
+    
+    params = {}
+    
+    for (name,values) in query.items():
+        
+        if name == 'timeout':
+            
+            continue
+        
+        if name not in SERVER_PARAMS:
+            
+            raise ValueError("unknown parameter '%s'" % name)
+        
+        params[name] = SERVER_PARAMS[name](values[-1])
+    
+    return params
+
+# This function converts the name of a floating-point data type to the
+# data type.
+
+def get_dtype(name):
+    
+    dtypes = {'float32': np.float32,'float64': np.float64}
+    
+    if name not in dtypes:
+        
+        raise ValueError("unknown dtype '%s'" % name)
+    
+    return dtypes[name]
+
+# This function converts the thresh parameter to a fixed threshold value if
+# it is a number, and leaves the name of a thresholding method unchanged.
+
+def get_thresh_value(value):
+    
+    try:
+        
+        return float(value)
+    
+    except ValueError:
+        
+        return value
+
+# This function decodes the body of a request into a BGR or grayscale
+# image.
+
+def decode_image(body,content_type):
+    
+    if content_type.split(';')[0].strip() == 'application/x-npy':
+        
+        img = np.load(io.BytesIO(body),allow_pickle=False)
+    
+    else:
+        
+        img = cv.imdecode(np.frombuffer(body,dtype=np.uint8),cv.IMREAD_COLOR)
+        
+        if img is None:
+            
+            raise ValueError('the image can not be decoded')
+    
+    if img.ndim != 2 and (img.ndim != 3 or img.shape[2] != 3):
+        
+        raise ValueError('the image must have 1 or 3 channels, not shape %s'
+                         % (img.shape,))
+    
+    return img
+
+# This function returns the content of an error response.
+
+def get_error(message):
+    
+    return {'error': message}
+
+# This function writes an HTTP response, where the content is either a
+# dictionary that is sent as JSON or a string that is sent as plain text.
+
+async def write_response(writer,status,content,extra=None,keep_alive=True):
+    
+    if isinstance(content,dict):
+        
+        (body,content_type) = (json.dumps(content).encode(),
+                               'application/json')
+    
+    else:
+        
+        (body,content_type) = (content.encode(),
+                               'text/plain; version=0.0.4')
+    
+    headers = {'Content-Type': content_type,'Content-Length': len(body),
+               'Connection': 'keep-alive' if keep_alive else 'close'}
+    
+    headers.update(extra or {})
+    
+    head = ['HTTP/1.1 %d %s' % (status,STATUS_REASONS[status])]
+    
+    head += ['%s: %s' % item for item in headers.items()]
+    
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+    
+    await writer.drain()
+
+# This function runs a server until it is interrupted.
+
+async def serve(server,host,port,path):
+    
+    await server.start(host,port,path)
+    
+    stop = asyncio.Event()
+    
+    loop = asyncio.get_running_loop()
+    
+    for signum in (signal.SIGINT,signal.SIGTERM):
+        
+        loop.add_signal_handler(signum,stop.set)
+    
+    print('listening on %s' % (path or '%s:%d' % (host,port)),
+          file=sys.stderr)
+    
+    await stop.wait()
+    
+    await server.close()
+
+def main(argv=None):
+    
+    parser = argparse.ArgumentParser(
+                 description='Serve blob detection on a local port.')
+    
+    parser.add_argument('--host',default='127.0.0.1',
+                        help='host to listen on (default: %(default)s)')
+    
+    parser.add_argument('--port',type=int,default=8765,
+                        help='port to listen on (default: %(default)s)')
+    
+    parser.add_argument('--unix',default=None,
+                        help='path of a Unix socket to listen on instead '
+                             'of a port')
+    
+    parser.add_argument('--workers',type=int,default=1,
+                        help='number of worker processes')
+    
+    parser.add_argument('--max-batch',type=int,default=8,
+                        help='maximum number of images in a batch')
+    
+    parser.add_argument('--batch-delay',type=float,default=0.005,
+                        help='seconds that a batch waits for more images')
+    
+    parser.add_argument('--max-pending',type=int,default=64,
+                        help='maximum number of pending requests before '
+                             'new requests are rejected')
+    
+    parser.add_argument('--timeout',type=float,default=30.0,
+                        help='maximum seconds to answer a request')
+    
+    args = parser.parse_args(argv)
+    
+    server = BlobServer(workers=args.workers,max_batch=args.max_batch,
+                        batch_delay=args.batch_delay,
+                        max_pending=args.max_pending,timeout=args.timeout)
+    
+    asyncio.run(serve(server,args.host,args.port,args.unix))
+
+if __name__ == '__main__':
+    
+    main()
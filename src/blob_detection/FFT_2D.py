@@ -0,0 +1,25 @@
+# This function computes the 2D FFT as an iteration of two 1D FFTs. The
+# 2D FFT is computed over the last two axes of the input, so a stack of
+# 2D arrays with a shape of L x M x N can be transformed in a single call.
+# If overwrite_x = True and img is a contiguous complex array, the FFT is
+# computed in the memory of img, so no new array is allocated.
+#
+# Tested 11/24/2019
+
+from .lazy_import import lazy_import
+
+dsp = lazy_import('scipy.fftpack')
+
+def FFT_2D(img,overwrite_x=False):
+    
+    # compute the 1D FFT of the input image row-wise
+    
+    fft_1D = dsp.fft(img,axis=-2,overwrite_x=overwrite_x)
+    
+    # compute the 1D FFT of the already computed 1D FFT column-wise to
+    # obtain the 2D FFT. The row-wise FFT is a new array or img itself, so
+    # it can always be overwritten.
+    
+    fft_2D = dsp.fft(fft_1D,axis=-1,overwrite_x=True)
+    
+    return fft_2D
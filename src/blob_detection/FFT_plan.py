@@ -0,0 +1,125 @@
+# This class holds the real-input 2D FFTs used to convolve arrays with a
+# fixed padded size. The inputs to the constructor are:
+#
+# shape - A 2-element tuple representing the padded size of the arrays.
+# The inputs of the forward FFT are zero-padded after their last row and
+# column to this size.
+#
+# workers - The number of threads used to compute each FFT
+#
+# use_pyfftw - If True and the pyFFTW library is installed, the FFTs are
+# planned once by FFTW for every input shape and the plans are reused for
+# every later FFT with the same input shape. Otherwise, the FFTs are
+# computed using scipy.fft, which caches its own plans internally.
+#
+# planner_effort - The FFTW planner effort used by pyFFTW
+#
+# The FFTs are computed over the last two axes of the inputs, so stacks of
+# 2D arrays can be transformed in a single call. For example:
+#
+# plan = FFT_plan((512,512))
+#
+# F = plan.rfft2(f)
+#
+# f = plan.irfft2(F)
+#
+# Note that irfft2 may overwrite its input. The FFTW plans own their input
+# and output arrays, so the same FFT_plan shouldn't be used by more than
+# one thread at a time, and get_fft_plan returns different plans to
+# different threads. Both methods also accept an
+# out input, which is an array with the shape and data type of their
+# output. The output of an FFTW plan is written into out instead of a new
+# array, which is returned. The FFTs of scipy.fft can't write into an
+# existing array, so out isn't used by them and a new array is returned.
+# The returned array should always be used.
+
+# import the importlib library
+
+import importlib.util
+
+# import the NumPy library
+
+import numpy as np
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import the FFT library
+
+fft = lazy_import('scipy.fft')
+
+# import the pyFFTW library if it is installed, which is only loaded by
+# the first plan that uses it
+
+if importlib.util.find_spec('pyfftw') is not None:
+    
+    pyfftw_builders = lazy_import('pyfftw.builders')
+
+else:
+    
+    pyfftw_builders = None
+
+class FFT_plan:
+    
+    def __init__(self,shape,workers=1,use_pyfftw=False,
+                 planner_effort='FFTW_MEASURE'):
+        
+        self.shape = (int(shape[0]),int(shape[1]))
+        
+        self.workers = workers
+        
+        self.use_pyfftw = use_pyfftw and pyfftw_builders is not None
+        
+        self.planner_effort = planner_effort
+        
+        # dictionary to store the FFTW plans for every input shape
+        
+        self.plans = {}
+    
+    def get_plan(self,name,x):
+        
+        key = (name,x.shape,x.dtype.str)
+        
+        if key not in self.plans:
+            
+            # plan the FFT the first time an input with this shape is
+            # transformed
+            
+            builder = getattr(pyfftw_builders,name)
+            
+            self.plans[key] = builder(x,s=self.shape,axes=(-2,-1),
+                                      threads=self.workers,
+                                      planner_effort=self.planner_effort)
+        
+        return self.plans[key]
+    
+    def rfft2(self,x,out=None):
+        
+        if self.use_pyfftw:
+            
+            return get_output(self.get_plan('rfft2',x)(x),out)
+        
+        return fft.rfft2(x,s=self.shape,axes=(-2,-1),workers=self.workers)
+    
+    def irfft2(self,X,out=None):
+        
+        if self.use_pyfftw:
+            
+            return get_output(self.get_plan('irfft2',X)(X),out)
+        
+        return fft.irfft2(X,s=self.shape,axes=(-2,-1),workers=self.workers)
+
+# This function returns the output of an FFTW plan. The output array of a
+# plan is reused by every call, so it is copied into out, or into a new
+# array if out = None, before it is returned.
+
+def get_output(plan_out,out=None):
+    
+    if out is None:
+        
+        return plan_out.copy()
+    
+    np.copyto(out,plan_out)
+    
+    return out
@@ -0,0 +1,237 @@
+# This class computes the Gaussian kernels used by get_ss_octave and the
+# DFTs of the kernels of each octave, and stores them, so they are only
+# computed once for every image with the same size. The inputs to the
+# constructor are:
+#
+# mode - The way the kernels are computed. If mode = 'reflect', the kernels
+# are exactly the same as filtering an impulse using the scipy.ndimage
+# Gaussian filters, where the length of each kernel is the smallest odd
+# integer that is at least 6*sigma. These filters sample the Gaussian over
+# 4 standard deviations on each side, which is wider than the kernels, and
+# the samples that fall outside of the kernel are reflected back into it. Each
+# sample at offset x from the center is added to the kernel at the index
+# that (center + x) mod 2m is reflected to, where m is the length of the
+# kernel, so the kernels are computed directly instead of filtering an
+# impulse. If mode = 'sampled', the kernels are the samples of the Gaussian
+# over the length of the kernel, normalized to sum to one, without
+# reflection.
+#
+# max_bytes - The maximum total size in bytes of the stored DFTs. When it
+# is exceeded, the least recently used DFTs are deleted.
+#
+# The kernels are stored for each sigma and data type, and the DFTs are
+# stored for each padded shape, list of sigmas, data type and FFT backend.
+# All of the stored arrays are read-only. The same filter bank can be used
+# by many threads at the same time, and get_filter_bank returns a filter
+# bank that is shared by every call of get_ss_octave that isn't given its
+# own. For example, if the frames of a camera all have the same size:
+#
+# bank = FilterBank()
+#
+# for frame in frames:
+#     ...
+#     scale_space = get_ss_octave(img,filter_bank=bank)
+#
+# only computes the kernels and their DFTs for the first frame.
+
+# import the collections library
+
+import collections
+
+# import the threading library
+
+import threading
+
+# import the NumPy library
+
+import numpy as np
+
+# import the get_pad_shape() and get_kernel_spectra() functions
+
+from .conv_FFT_multi import get_pad_shape, get_kernel_spectra
+
+class FilterBank:
+    
+    def __init__(self,mode='reflect',max_bytes=2**28):
+        
+        if mode not in ('reflect','sampled'):
+            
+            raise ValueError("unknown mode '%s'" % mode)
+        
+        self.mode = mode
+        
+        self.max_bytes = max_bytes
+        
+        # the stored kernels, and the stored DFTs from the least recently
+        # used to the most recently used
+        
+        self.kernels = {}
+        
+        self.spectra = collections.OrderedDict()
+        
+        self.size = 0
+        
+        self.lock = threading.Lock()
+    
+    def get_kernel_1D(self,sigma,dtype=np.float64):
+        
+        return self.get_kernel(sigma,dtype,ndim=1)
+    
+    def get_kernel(self,sigma,dtype=np.float64,ndim=2):
+        
+        key = (float(sigma),np.dtype(dtype).str,ndim)
+        
+        kernel = self.kernels.get(key)
+        
+        if kernel is None:
+            
+            weights = get_kernel_weights(sigma,self.mode)
+            
+            # the 1D kernel is the sum of the weights of each index
+            
+            kernel = weights.sum(axis=1)
+            
+            if ndim == 2:
+                
+                # the 2D kernel is the 1D kernel filtered along the other
+                # axis with the same weights, in the same order as the
+                # separable filter of scipy.ndimage
+                
+                kernel = (kernel[:,None,None]*weights[None]).sum(axis=2)
+            
+            kernel = kernel.astype(dtype)
+            
+            kernel.flags.writeable = False
+            
+            with self.lock:
+                
+                kernel = self.kernels.setdefault(key,kernel)
+        
+        return kernel
+    
+    def get_spectra(self,shape,sigmas,dtype=np.float64,fft_backend='fftpack',
+                    workers=1,profiler=None):
+        
+        # return the DFTs of the 2D kernels of sigmas, padded to convolve an
+        # array of the given shape, which are passed to conv_FFT_multi
+        
+        hs = [self.get_kernel(sigma,dtype) for sigma in sigmas]
+        
+        pad_shape = get_pad_shape(shape,hs,fft_backend)
+        
+        key = (pad_shape,tuple(float(s) for s in sigmas),
+               np.dtype(dtype).str,fft_backend)
+        
+        with self.lock:
+            
+            H = self.spectra.get(key)
+            
+            if H is not None:
+                
+                self.spectra.move_to_end(key)
+                
+                return H
+        
+        # the DFTs are computed outside of the lock, so other threads aren't
+        # blocked
+        
+        H = get_kernel_spectra(hs,pad_shape,fft_backend,workers=workers,
+                               profiler=profiler)
+        
+        H.flags.writeable = False
+        
+        if H.nbytes > self.max_bytes:
+            
+            return H
+        
+        with self.lock:
+            
+            if key not in self.spectra:
+                
+                self.spectra[key] = H
+                
+                self.size += H.nbytes
+            
+            # delete the least recently used DFTs
+            
+            while self.size > self.max_bytes:
+                
+                (_,old_H) = self.spectra.popitem(last=False)
+                
+                self.size -= old_H.nbytes
+        
+        return H
+    
+    def clear(self):
+        
+        with self.lock:
+            
+            self.kernels.clear()
+            
+            self.spectra.clear()
+            
+            self.size = 0
+
+# This function returns the weights of the Gaussian samples of a kernel as
+# an m x L array, where m is the length of the kernel and L is the number
+# of samples. Each column contains the weight of one sample at the index of
+# the kernel that it is added to, and zeros elsewhere.
+
+def get_kernel_weights(sigma,mode='reflect'):
+    
+    # kernel length, which is odd
+    
+    m = int(np.ceil(6*sigma))
+    
+    if not (m % 2):
+        
+        m = m + 1
+    
+    if mode == 'reflect':
+        
+        # the radius of the samples of the scipy.ndimage Gaussian filters
+        
+        r = int(4*float(sigma) + 0.5)
+    
+    else:
+        
+        r = m//2
+    
+    # the normalized samples of the Gaussian
+    
+    x = np.arange(-r,r + 1)
+    
+    samples = np.exp(-0.5/sigma**2*x**2)
+    
+    samples = samples/samples.sum()
+    
+    # the index of the kernel that each sample is added to, where the
+    # indices outside of the kernel are reflected about its edges
+    
+    idx = (np.arange(m)[:,None] + x) % (2*m)
+    
+    idx = np.where(idx < m,idx,2*m - 1 - idx)
+    
+    return np.where(idx == m//2,samples,0)
+
+# dictionary to store the shared filter bank
+
+filter_banks = {}
+
+# the lock that makes sure that concurrent first calls only create one
+# shared filter bank
+
+filter_banks_lock = threading.Lock()
+
+# This function returns the filter bank that is shared by every call of
+# get_ss_octave in the process that isn't given its own.
+
+def get_filter_bank():
+    
+    with filter_banks_lock:
+        
+        if 'shared' not in filter_banks:
+            
+            filter_banks['shared'] = FilterBank()
+        
+        return filter_banks['shared']
@@ -0,0 +1,303 @@
+# This class records the time spent in each stage of the blob detection
+# pipeline. A profiler is passed to get_blob_loc, get_ss_octave,
+# conv_FFT, conv_FFT_multi and get_maxima_loc in their profiler input, and
+# each of these functions records a span for each of its stages, with the
+# octave, the layer, the shape of the arrays and the number of candidates
+# and maxima as arguments. If profiler = None, which is the default,
+# nothing is recorded and the only overhead is a few checks per octave.
+# The inputs to the constructor are:
+#
+# trace_memory - If True, the memory allocated by each span and the peak
+# memory allocated during each span are also recorded using tracemalloc,
+# which slows down the pipeline considerably.
+#
+# callbacks - A list of functions that are called with each span as soon
+# as it ends, for example to log slow stages while images are processed.
+#
+# Each span is a dictionary with the name of the stage, its start time and
+# duration in seconds, the thread that ran it, its depth in the stack of
+# spans of that thread and a dictionary of arguments. The tags set by
+# set_tags, such as the octave number set by get_blob_loc, are added to the
+# arguments of every later span of the same thread. The profiler can
+# also be used as a context manager, which starts and stops tracemalloc if
+# trace_memory = True. For example:
+#
+# with Profiler() as profiler:
+#     get_blob_loc(img,profiler=profiler)
+#
+# profiler.save_chrome_trace('trace.json')
+#
+# stats = profiler.get_stats()
+#
+# where trace.json can be opened using chrome://tracing or Perfetto, and
+# stats is a flat dictionary with the number of calls, the total, mean and
+# maximum durations of each stage, the total number of candidates, maxima
+# and allocated bytes, and the largest peak of allocated bytes.
+# The stages can also be split by the values of some of their arguments,
+# for example profiler.get_stats(keys=('octave',)) returns the statistics
+# of each stage in each octave under names such as 'get_maxima_loc[0]'.
+# The same profiler can be used by more than one thread at a time.
+
+# import the json library
+
+import json
+
+# import the os library
+
+import os
+
+# import the threading library
+
+import threading
+
+# import the time library
+
+import time
+
+# import the tracemalloc library
+
+import tracemalloc
+
+class Profiler:
+    
+    def __init__(self,trace_memory=False,callbacks=None):
+        
+        self.trace_memory = trace_memory
+        
+        self.callbacks = list(callbacks) if callbacks else []
+        
+        # the spans that ended, in the order they ended
+        
+        self.spans = []
+        
+        # the stack of open spans of each thread
+        
+        self.local = threading.local()
+        
+        self.lock = threading.Lock()
+        
+        self.start_time = time.perf_counter()
+        
+        self.started_tracemalloc = False
+    
+    def __enter__(self):
+        
+        if self.trace_memory and not tracemalloc.is_tracing():
+            
+            tracemalloc.start()
+            
+            self.started_tracemalloc = True
+        
+        return self
+    
+    def __exit__(self,*exc):
+        
+        if self.started_tracemalloc:
+            
+            tracemalloc.stop()
+            
+            self.started_tracemalloc = False
+    
+    def add_callback(self,callback):
+        
+        self.callbacks.append(callback)
+    
+    def span(self,name,**args):
+        
+        tags = getattr(self.local,'tags',None)
+        
+        if tags:
+            
+            args = dict(tags,**args)
+        
+        return Span(self,name,args)
+    
+    def set_tags(self,**tags):
+        
+        self.local.tags = tags
+    
+    def get_stack(self):
+        
+        stack = getattr(self.local,'stack',None)
+        
+        if stack is None:
+            
+            stack = self.local.stack = []
+        
+        return stack
+    
+    def begin(self,span):
+        
+        stack = self.get_stack()
+        
+        if self.trace_memory and tracemalloc.is_tracing():
+            
+            # the peak of the parent span is kept before the peak is reset
+            # for this span
+            
+            (current,peak) = tracemalloc.get_traced_memory()
+            
+            if stack:
+                
+                stack[-1].peak = max(stack[-1].peak,peak)
+            
+            tracemalloc.reset_peak()
+            
+            span.memory = current
+            
+            span.peak = current
+        
+        stack.append(span)
+        
+        span.start = time.perf_counter()
+    
+    def end(self,span):
+        
+        end = time.perf_counter()
+        
+        stack = self.get_stack()
+        
+        stack.pop()
+        
+        if span.memory is not None and tracemalloc.is_tracing():
+            
+            (current,peak) = tracemalloc.get_traced_memory()
+            
+            span.peak = max(span.peak,peak)
+            
+            span.args['allocated'] = current - span.memory
+            
+            span.args['peak_allocated'] = span.peak - span.memory
+            
+            if stack:
+                
+                stack[-1].peak = max(stack[-1].peak,span.peak)
+        
+        record = {'name':span.name,'start':span.start - self.start_time,
+                  'duration':end - span.start,
+                  'thread':threading.get_ident(),'depth':len(stack),
+                  'args':span.args}
+        
+        with self.lock:
+            
+            self.spans.append(record)
+        
+        for callback in self.callbacks:
+            
+            callback(record)
+    
+    def clear(self):
+        
+        with self.lock:
+            
+            self.spans = []
+    
+    def get_stats(self,keys=()):
+        
+        # the number of calls and the durations of each stage, and the sums
+        # of their numeric arguments such as the number of maxima
+        
+        stats = {}
+        
+        for record in self.spans:
+            
+            name = record['name']
+            
+            values = [str(record['args'][key]) for key in keys
+                      if key in record['args']]
+            
+            if values:
+                
+                name = '%s[%s]' % (name,','.join(values))
+            
+            stat = stats.setdefault(name,{'count':0,'total':0.0,'max':0.0})
+            
+            stat['count'] += 1
+            
+            stat['total'] += record['duration']
+            
+            stat['max'] = max(stat['max'],record['duration'])
+            
+            for (key,value) in record['args'].items():
+                
+                if key in ('candidates','maxima','allocated'):
+                    
+                    stat[key] = stat.get(key,0) + value
+                
+                elif key == 'peak_allocated':
+                    
+                    stat[key] = max(stat.get(key,0),value)
+        
+        for stat in stats.values():
+            
+            stat['mean'] = stat['total']/stat['count']
+        
+        return stats
+    
+    def get_chrome_trace(self):
+        
+        # complete events of the Chrome trace event format, in microseconds
+        
+        events = [{'name':record['name'],'ph':'X','pid':os.getpid(),
+                   'tid':record['thread'],'ts':1e6*record['start'],
+                   'dur':1e6*record['duration'],
+                   'args':{key:to_json(value) for (key,value) in
+                           record['args'].items()}}
+                  for record in self.spans]
+        
+        events.sort(key=lambda event:event['ts'])
+        
+        return {'traceEvents':events,'displayTimeUnit':'ms'}
+    
+    def save_chrome_trace(self,filename):
+        
+        with open(filename,'w') as f:
+            
+            json.dump(self.get_chrome_trace(),f)
+
+# This class is the context manager returned by Profiler.span(). The
+# arguments of the span can be added inside the with statement using the
+# dictionary returned by it.
+
+class Span:
+    
+    __slots__ = ('profiler','name','args','start','memory','peak')
+    
+    def __init__(self,profiler,name,args):
+        
+        self.profiler = profiler
+        
+        self.name = name
+        
+        self.args = args
+        
+        self.memory = None
+    
+    def __enter__(self):
+        
+        self.profiler.begin(self)
+        
+        return self.args
+    
+    def __exit__(self,*exc):
+        
+        self.profiler.end(self)
+
+# This function converts the arguments of the spans, such as the shapes of
+# the arrays, to JSON types.
+
+def to_json(value):
+    
+    if isinstance(value,(bool,int,float,str)) or value is None:
+        
+        return value
+    
+    if isinstance(value,(tuple,list)):
+        
+        return [to_json(v) for v in value]
+    
+    if hasattr(value,'item'):
+        
+        return value.item()
+    
+    return str(value)
@@ -0,0 +1,294 @@
+# This class detects blobs in a stream of frames, such as the frames of a
+# video or of a camera. Each frame is processed just like get_blob_loc,
+# but the state that doesn't depend on the contents of the frames is kept
+# between frames. The inputs to the constructor are the same as the inputs
+# of get_blob_loc, in addition to:
+#
+# thresh_interval - The threshold values of the layers are computed on the
+# first frame and then recomputed every thresh_interval frames. The frames
+# in between reuse the last threshold values, which skips the computation
+# of the histograms of the layers. The threshold values are computed using
+# the thresholding strategy in the thresh input, just like get_blob_loc.
+# If thresh is a list of threshold values of the middle layers, they are
+# used by every octave of every frame instead.
+#
+# target_fps - The desired frame rate. If it is given, the frames whose
+# latency is longer than 1/target_fps are counted by get_stats.
+#
+# history - The number of latest frames used by get_stats
+#
+# The DFTs of the Gaussian kernels are stored by the FilterBank of the
+# detector, and the padded arrays, the DFTs, the layers and the squared DoG
+# layers are stored by the Workspace of the detector. Both are reused by
+# every frame, as well as the grayscale frame. If the size of the frames
+# changes, the stored state is cleared. For example:
+#
+# detector = StreamDetector(thresh_interval=10,target_fps=30)
+#
+# for (maxima_idx,maxima_layer_num,latency) in detector.run(capture):
+#     ...
+#
+# where capture is a cv.VideoCapture object or any iterable of frames. The
+# frames can be color frames in the same format as the input of
+# get_blob_loc, or grayscale frames. The same detector shouldn't be used by
+# more than one thread at a time.
+
+# import the time library
+
+import time
+
+# import the collections library
+
+import collections
+
+# import NumPy library
+
+import numpy as np
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import OpenCV library
+
+cv = lazy_import('cv2')
+
+# import the get_thresh_strategy() function
+
+from .ThreshStrategy import get_thresh_strategy
+
+# import the FilterBank class
+
+from .FilterBank import FilterBank
+
+# import the Workspace class
+
+from .Workspace import Workspace
+
+# import the get_ss_octave() function
+
+from .get_ss_octave import get_ss_octave
+
+# import the get_DoG_squared() function
+
+from .get_DoG_squared import get_DoG_squared
+
+# import the get_maxima_loc() function
+
+from .get_maxima_loc import get_maxima_loc
+
+class StreamDetector:
+    
+    def __init__(self,oct_num=3,DoG_layer_num=4,sigma=1.6,k=np.sqrt(2),
+                 thresh_interval=30,target_fps=None,history=1000,
+                 conv_engine='auto',ss_mode='direct',fft_backend='fftpack',
+                 workers=1,dtype=np.float64,nms_engine='vectorized',
+                 thresh=None):
+        
+        self.oct_num = oct_num
+        
+        self.DoG_layer_num = DoG_layer_num
+        
+        self.sigma = sigma
+        
+        self.k = k
+        
+        self.thresh_interval = thresh_interval
+        
+        self.target_fps = target_fps
+        
+        self.dtype = dtype
+        
+        self.nms_engine = nms_engine
+        
+        self.thresh_strategy = get_thresh_strategy(thresh)
+        
+        # the Gaussian kernels of the frames and their DFTs
+        
+        self.filter_bank = FilterBank()
+        
+        # parameters used to compute each octave in scale space
+        
+        self.ss_params = dict(conv_engine=conv_engine,ss_mode=ss_mode,
+                              fft_backend=fft_backend,workers=workers)
+        
+        # the latencies of the latest frames
+        
+        self.latencies = collections.deque(maxlen=history)
+        
+        self.frame_num = 0
+        
+        self.reset()
+    
+    def reset(self):
+        
+        # clear the state that depends on the size of the frames
+        
+        self.frame_shape = None
+        
+        self.workspace = Workspace()
+        
+        self.gray = None
+        
+        self.thresh = None
+    
+    def detect(self,frame):
+        
+        start_time = time.perf_counter()
+        
+        if frame.shape != self.frame_shape:
+            
+            self.reset()
+            
+            self.frame_shape = frame.shape
+        
+        # convert the frame to grayscale, reusing the same grayscale array,
+        # unless it only has one channel
+        
+        if frame.ndim == 3 and frame.shape[2] > 1:
+            
+            self.gray = cv.cvtColor(frame,cv.COLOR_BGR2GRAY,dst=self.gray)
+            
+            gray = self.gray
+        
+        else:
+            
+            gray = frame.reshape(frame.shape[:2])
+        
+        # convert the grayscale frame to the data type of the pipeline,
+        # reusing the same array
+        
+        img = self.workspace.get('frame',gray.shape,self.dtype)
+        
+        np.copyto(img,gray,casting='unsafe')
+        
+        # recompute the threshold values every thresh_interval frames
+        
+        update_thresh = (self.thresh is None or
+                         self.frame_num % self.thresh_interval == 0)
+        
+        if update_thresh:
+            
+            self.thresh = [None]*self.oct_num
+        
+        # initialize lists to store results
+        
+        maxima_idx = []
+        
+        maxima_layer_num = []
+        
+        for i in range(self.oct_num): # loop through each octave
+            
+            # compute octave in scale space and its squared difference of
+            # Gaussians
+            
+            scale_space = get_ss_octave(img,self.DoG_layer_num + 1,
+                                        sigma_init=self.sigma,k_init=self.k,
+                                        filter_bank=self.filter_bank,
+                                        workspace=self.workspace,
+                                        **self.ss_params)
+            
+            DoG_out = self.workspace.get('DoG',
+                                         (self.DoG_layer_num,) + img.shape,
+                                         scale_space[0].dtype)
+            
+            DoG_squared = get_DoG_squared(scale_space,out=DoG_out)
+            
+            if update_thresh:
+                
+                if isinstance(self.thresh_strategy,(list,tuple,np.ndarray)):
+                    
+                    # the threshold values are given
+                    
+                    self.thresh[i] = self.thresh_strategy
+                
+                else:
+                    
+                    self.thresh[i] = self.thresh_strategy.get_thresh(
+                                     DoG_squared)
+            
+            (max_idx,max_layer_num) = get_maxima_loc(DoG_squared,
+                                                     thresh=self.thresh[i],
+                                                     engine=self.nms_engine)
+            
+            # scale indices to account for down-sampling and shift layer
+            # number to account for different octaves
+            
+            maxima_idx.append(max_idx.reshape((-1,2))*np.power(2,i))
+            
+            maxima_layer_num.append(max_layer_num + self.DoG_layer_num*i)
+            
+            # down-sample the third image in scale-space
+            
+            img = scale_space[2][::2,::2]
+        
+        # convert the indices of the maxima to a list of (x,y) tuple
+        # coordinates
+        
+        maxima_idx = [tuple(i[::-1]) for i in np.vstack(maxima_idx).tolist()]
+        
+        maxima_layer_num = np.hstack(maxima_layer_num)
+        
+        self.frame_num += 1
+        
+        self.latencies.append(time.perf_counter() - start_time)
+        
+        return (maxima_idx,maxima_layer_num)
+    
+    def run(self,source):
+        
+        # read the frames from a cv.VideoCapture object until it ends, or
+        # iterate through the frames of any other source
+        
+        if isinstance(source,cv.VideoCapture):
+            
+            frames = self.read_frames(source)
+        
+        else:
+            
+            frames = iter(source)
+        
+        for frame in frames:
+            
+            (maxima_idx,maxima_layer_num) = self.detect(frame)
+            
+            yield (maxima_idx,maxima_layer_num,self.latencies[-1])
+    
+    def read_frames(self,capture):
+        
+        while True:
+            
+            (ret,frame) = capture.read()
+            
+            if not ret:
+                
+                break
+            
+            yield frame
+    
+    def get_stats(self):
+        
+        # statistics of the latencies of the latest frames, in seconds
+        
+        latencies = np.array(self.latencies)
+        
+        stats = {'frames':self.frame_num}
+        
+        if latencies.size:
+            
+            stats['mean_latency'] = float(np.mean(latencies))
+            
+            stats['p50_latency'] = float(np.percentile(latencies,50))
+            
+            stats['p95_latency'] = float(np.percentile(latencies,95))
+            
+            stats['max_latency'] = float(np.max(latencies))
+            
+            stats['fps'] = float(1/np.mean(latencies))
+            
+            if self.target_fps is not None:
+                
+                stats['late_frames'] = int(np.sum(latencies >
+                                                  1/self.target_fps))
+        
+        return stats
@@ -0,0 +1,253 @@
+# This class computes the threshold values of the middle layers of a
+# squared DoG octave, which are used by get_maxima_loc to discard weak
+# maxima. The inputs to the constructor are:
+#
+# method - The thresholding method. If method = 'yen' or method = 'otsu',
+# Yen's or Otsu's method from the scikit-image library is used. If
+# method = 'mean', the mean of the layer is used. If
+# method = 'percentile', the q-th percentile of the layer is used. If
+# method = 'fixed', value is used for every layer. The method can also be a
+# function that takes the histogram of a layer, as a tuple of the counts
+# and the bin centers, and returns its threshold value. Please refer to the
+# loop engine of get_maxima_loc for a discussion of the first three
+# methods.
+#
+# per_octave - If False, a threshold value is computed for each middle
+# layer. Otherwise, a single threshold value is computed from the
+# histogram of all of the middle layers of the octave together, and used
+# for every middle layer.
+#
+# subsample - The layers are subsampled by this factor along both axes
+# before their histograms are computed. A factor of 2 computes the
+# histograms from a quarter of the pixels.
+#
+# q - The percentile used by the 'percentile' method, between 0 and 100
+#
+# value - The threshold value used by the 'fixed' method
+#
+# bins - The number of bins of the histograms
+#
+# All of the methods, except for 'fixed', compute the threshold values
+# from a histogram of each layer with bins bins over the range of the
+# layer, which is the same histogram used by flt.threshold_yen(). The mean
+# and the percentiles are computed from the bin centers, so they are within
+# half of a bin of the exact values. The histograms are returned by
+# get_hists and can be passed to get_thresh, so several strategies with
+# the same per_octave and subsample can share them. For example:
+#
+# yen = ThreshStrategy('yen')
+#
+# otsu = ThreshStrategy('otsu')
+#
+# hists = yen.get_hists(DoG_squared)
+#
+# thresh_yen = yen.get_thresh(DoG_squared,hists)
+#
+# thresh_otsu = otsu.get_thresh(DoG_squared,hists)
+#
+# where the histograms of the layers are only computed once. With the
+# default inputs, the threshold values are the same as the threshold values
+# computed by flt.threshold_yen() on each layer. If a boolean mask with the
+# shape of the layers is given, only the pixels inside the mask are used.
+# The histograms of arrays of values of the middle layers, such as the
+# pixels of several regions of interest, are returned by get_layers_hists.
+
+# import the NumPy library
+
+import numpy as np
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import different functions from the scikit-image library to compute an
+# appropriate global thresholding value
+
+flt = lazy_import('skimage.filters')
+
+class ThreshStrategy:
+    
+    def __init__(self,method='yen',per_octave=False,subsample=1,q=99.0,
+                 value=None,bins=256):
+        
+        if not callable(method) and method not in ('yen','otsu','mean',
+                                                   'percentile','fixed'):
+            
+            raise ValueError("unknown thresholding method '%s'" % method)
+        
+        if method == 'fixed' and value is None:
+            
+            raise ValueError("the 'fixed' method needs a value")
+        
+        self.method = method
+        
+        self.per_octave = per_octave
+        
+        self.subsample = int(subsample)
+        
+        self.q = q
+        
+        self.value = value
+        
+        self.bins = bins
+    
+    def get_hists(self,ss_DoG_squared,mask=None):
+        
+        # the middle layers of the octave, subsampled
+        
+        s = self.subsample
+        
+        layers = [ss_DoG_squared[i][::s,::s]
+                  for i in range(1,len(ss_DoG_squared)-1)]
+        
+        if mask is not None:
+            
+            layers = [layer[mask[::s,::s]] for layer in layers]
+        
+        return self.get_layers_hists(layers)
+    
+    def get_layers_hists(self,layers):
+        
+        # the histograms of the values of the middle layers, which can be
+        # arrays of any shape
+        
+        if not self.per_octave:
+            
+            return [get_hist(layer,self.bins) for layer in layers]
+        
+        # the histogram of all of the middle layers together, over the range
+        # of all of the layers
+        
+        hist_range = (min([layer.min() for layer in layers]),
+                      max([layer.max() for layer in layers]))
+        
+        hists = [get_hist(layer,self.bins,hist_range) for layer in layers]
+        
+        counts = np.sum([counts for (counts,_) in hists],axis=0)
+        
+        return [(counts,hists[0][1])]
+    
+    def get_thresh(self,ss_DoG_squared,hists=None,mask=None):
+        
+        # the number of middle layers
+        
+        n = len(ss_DoG_squared) - 2
+        
+        if self.method == 'fixed':
+            
+            return [self.value]*n
+        
+        if hists is None:
+            
+            hists = self.get_hists(ss_DoG_squared,mask)
+        
+        return self.get_hists_thresh(hists,n)
+    
+    def get_hists_thresh(self,hists,n):
+        
+        # compute the threshold values of n middle layers from the
+        # histograms returned by get_hists
+        
+        thresh = [self.get_hist_thresh(hist) for hist in hists]
+        
+        if self.per_octave:
+            
+            thresh = thresh*n
+        
+        return thresh
+    
+    def get_hist_thresh(self,hist):
+        
+        # compute the threshold value of a single histogram
+        
+        (counts,centers) = hist
+        
+        if callable(self.method):
+            
+            return self.method(hist)
+        
+        elif self.method == 'yen':
+            
+            return flt.threshold_yen(hist=hist)
+        
+        elif self.method == 'otsu':
+            
+            return flt.threshold_otsu(hist=hist)
+        
+        elif self.method == 'mean':
+            
+            return np.sum(counts*centers)/np.sum(counts)
+        
+        elif self.method == 'percentile':
+            
+            # the first bin whose cumulative count reaches the percentile
+            
+            cdf = np.cumsum(counts)
+            
+            i = np.searchsorted(cdf,self.q/100*cdf[-1])
+            
+            return centers[min(i,len(centers)-1)]
+        
+        else:
+            
+            return self.value
+
+# This function returns the histogram of a layer with the given number of
+# bins over hist_range, or over the range of the layer if hist_range is
+# None, just like the histograms of the scikit-image library. If the layer
+# is constant, its range is widened by 0.5 on each side.
+
+def get_hist(layer,bins=256,hist_range=None):
+    
+    if hist_range is None:
+        
+        hist_range = (layer.min(),layer.max())
+    
+    (counts,bin_edges) = np.histogram(layer,bins=bins,range=hist_range)
+    
+    bin_centers = (bin_edges[:-1] + bin_edges[1:])/2
+    
+    return (counts,bin_centers)
+
+# This function returns the thresholding strategy described by thresh. If
+# thresh is None, Yen's method is used. If thresh is a string or a
+# function, it is the thresholding method. If thresh is a number, it is
+# used as a fixed threshold value. In these cases, the remaining inputs of
+# the strategy can be given in kwargs. Otherwise, thresh is returned as it
+# is.
+
+def get_thresh_strategy(thresh,**kwargs):
+    
+    if thresh is None:
+        
+        return ThreshStrategy('yen',**kwargs)
+    
+    elif isinstance(thresh,str) or callable(thresh):
+        
+        return ThreshStrategy(thresh,**kwargs)
+    
+    elif np.isscalar(thresh):
+        
+        return ThreshStrategy('fixed',value=thresh,**kwargs)
+    
+    return thresh
+
+# This function returns the thresholding strategy given by the --thresh,
+# --thresh-q, --thresh-per-octave and --thresh-subsample arguments of the
+# command-line tools, which are parsed into args.
+
+def get_thresh_arg(args):
+    
+    # a number is a fixed threshold value
+    
+    try:
+        
+        thresh = float(args.thresh)
+    
+    except ValueError:
+        
+        thresh = args.thresh
+    
+    return get_thresh_strategy(thresh,q=args.thresh_q,
+                               per_octave=args.thresh_per_octave,
+                               subsample=args.thresh_subsample)
@@ -0,0 +1,132 @@
+# This class stores the scratch arrays used by conv_FFT, conv_FFT_multi,
+# get_ss_octave and get_DoG_squared, so they are allocated once and reused
+# by every later call with the same padded shape and data type, instead of
+# allocating the padded inputs, the spectra and the inverse DFTs of every
+# layer of every octave again. When many images with the same size are
+# processed, such as the frames of a video or a batch of photos from the
+# same camera, the pipeline then runs without allocating the large arrays,
+# and their memory pages are only faulted in by the first image. The input
+# to the constructor is:
+#
+# max_bytes - The maximum total size in bytes of the stored arrays, or None
+# for no limit. When it is exceeded, the least recently used arrays are
+# deleted, so the arrays of image sizes that are no longer used are freed.
+#
+# Each array is stored under a name, its shape and its data type. The name
+# is the role of the array in the function that uses it, such as 'pad' or
+# 'spectrum', so the different arrays used by the same call don't share
+# memory. For example:
+#
+# workspace = Workspace()
+#
+# for frame in frames:
+#     ...
+#     blobs = get_blob_loc(frame,workspace=workspace)
+#
+# only allocates the arrays for the first frame. Note that the outputs of
+# the functions that are given a workspace can be views of its arrays,
+# which are overwritten by the next call with the same workspace. Unlike a
+# FilterBank, the same workspace shouldn't be used by more than one thread
+# at a time, and get_workspace returns a different workspace to every
+# thread, which is used by the worker processes of get_blob_loc_batch and
+# BlobServer.
+
+# import the collections library
+
+import collections
+
+# import the threading library
+
+import threading
+
+# import the NumPy library
+
+import numpy as np
+
+# the maximum total size in bytes of the arrays of each workspace returned
+# by get_workspace
+
+WORKSPACE_BYTES = 2**28
+
+# the workspaces returned by get_workspace to each thread
+
+workspaces = threading.local()
+
+class Workspace:
+    
+    def __init__(self,max_bytes=None):
+        
+        self.max_bytes = max_bytes
+        
+        # the stored arrays from the least recently used to the most
+        # recently used
+        
+        self.arrays = collections.OrderedDict()
+        
+        self.size = 0
+        
+        self.stats = {'allocations': 0,'reuses': 0}
+    
+    def get(self,name,shape,dtype=np.float64):
+        
+        # return the array stored under name with the given shape and data
+        # type, which is allocated the first time it is requested. The
+        # contents of the array are whatever its last user left in it.
+        
+        shape = tuple(int(s) for s in shape)
+        
+        key = (name,shape,np.dtype(dtype).str)
+        
+        arr = self.arrays.get(key)
+        
+        if arr is not None:
+            
+            self.arrays.move_to_end(key)
+            
+            self.stats['reuses'] += 1
+            
+            return arr
+        
+        arr = np.empty(shape,dtype=dtype)
+        
+        self.stats['allocations'] += 1
+        
+        self.arrays[key] = arr
+        
+        self.size += arr.nbytes
+        
+        # delete the least recently used arrays, except for the new one.
+        # The arrays that are still used by the caller are only freed
+        # once the caller is done with them.
+        
+        while (self.max_bytes is not None and self.size > self.max_bytes and
+               len(self.arrays) > 1):
+            
+            (_,old_arr) = self.arrays.popitem(last=False)
+            
+            self.size -= old_arr.nbytes
+        
+        return arr
+    
+    def get_stats(self):
+        
+        return dict(self.stats,arrays=len(self.arrays),size=self.size)
+    
+    def clear(self):
+        
+        self.arrays.clear()
+        
+        self.size = 0
+
+# This function returns the workspace of the calling thread, which is
+# created the first time that the thread calls it. The worker processes
+# that handle many images one at a time use it, so the arrays of the images
+# with the same size are only allocated once in each process.
+
+def get_workspace():
+    
+    if not hasattr(workspaces,'shared'):
+        
+        workspaces.shared = Workspace(max_bytes=WORKSPACE_BYTES)
+    
+    return workspaces.shared
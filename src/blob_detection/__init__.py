@@ -0,0 +1,94 @@
+# This package detects blobs in images using the difference of Gaussians,
+# which approximates the Laplacian of Gaussian. The public functions and
+# classes of the package are listed in PUBLIC_API below, and they can be
+# imported from the package itself. For example:
+#
+# from blob_detection import get_blob_loc, load_images
+#
+# Each public name is defined in the module with the same name, but the
+# modules are only imported when their names are first used, using the
+# module __getattr__ of PEP 562, so importing the package doesn't import
+# NumPy, OpenCV or SciPy. The modules also load OpenCV, SciPy and
+# scikit-image lazily using lazy_import, so they are only loaded by the
+# code paths that use them. Please refer to the check_import_time script
+# for the time it takes to import the package and its command-line tools.
+#
+# The other modules of the package can still be imported directly, such as
+# blob_detection.get_ss_octave, but they aren't part of the public API and
+# they can change between versions.
+
+# import the importlib library
+
+import importlib
+
+# import the sys library
+
+import sys
+
+# import the types library
+
+import types
+
+# the public names of the package and the modules that define them
+
+PUBLIC_API = {'get_blob_loc': 'get_blob_loc',
+              'get_blob_loc_batch': 'get_blob_loc_batch',
+              'get_blob_loc_tiled': 'get_blob_loc_tiled',
+              'get_blob_loc_roi': 'get_blob_loc_roi',
+              'get_blob_array': 'get_blob_array',
+              'get_maxima_loc': 'get_maxima_loc',
+              'show_blobs': 'show_blobs',
+              'draw_blobs': 'draw_blobs',
+              'load_images': 'load_images',
+              'read_image': 'load_images',
+              'StreamDetector': 'StreamDetector',
+              'BlobCache': 'BlobCache',
+              'FilterBank': 'FilterBank',
+              'Workspace': 'Workspace',
+              'ThreshStrategy': 'ThreshStrategy',
+              'get_thresh_strategy': 'ThreshStrategy',
+              'Profiler': 'Profiler',
+              'BlobServer': 'BlobServer',
+              'BlobClient': 'BlobClient'}
+
+__all__ = sorted(PUBLIC_API)
+
+# This function imports the module of a public name the first time that the
+# name is used, and stores the name in the package.
+
+def __getattr__(name):
+    
+    if name not in PUBLIC_API:
+        
+        raise AttributeError("module '%s' has no attribute '%s'" %
+                             (__name__,name))
+    
+    module = importlib.import_module('.' + PUBLIC_API[name],__name__)
+    
+    value = getattr(module,name)
+    
+    globals()[name] = value
+    
+    return value
+
+def __dir__():
+    
+    return sorted(set(globals()) | set(__all__))
+
+# This class is the type of the package. Most modules have the same name as
+# the function that they define, and the import system stores each module
+# in the package under its name when the module is imported, which would
+# hide the function. The modules of the public names are not stored, so
+# blob_detection.get_blob_loc is always the function.
+
+class Package(types.ModuleType):
+    
+    def __setattr__(self,name,value):
+        
+        if name in PUBLIC_API and isinstance(value,types.ModuleType):
+            
+            return
+        
+        super().__setattr__(name,value)
+
+sys.modules[__name__].__class__ = Package
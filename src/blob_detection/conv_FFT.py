@@ -0,0 +1,295 @@
+# This function convolves the inputs f and h using forward and inverse
+# FFTs. The output g has the same shape as the the input f. For example,
+# if f is an A x B array and h is a C x D array, then:
+#
+# g = conv_FFT(f,h,img_filter=False)
+#
+# will yield a an array g with a size of A x B. This function
+# yields the same result as scipy.signal.convolve(f,h,mode='same'), where
+# f and h are two 2D NumPy arrays.
+# 
+# Note that the img_filter flag is used to determine the output date type
+# of this function if it will be used to filter an image. Hence, if
+# img_filter = True, f is an input image, and h is the filter kernel,
+# then the function will behave like the OpenCV function filter2D:
+#
+# cv.filter2D(img,-1,np.rot90(h,2),borderType=cv.BORDER_CONSTANT)
+#
+# Note that the filter kernel h was rotated by 180 degrees in this case
+# because the cv.filter2D function actually computes correlation not
+# convolution. For image filtering, the following use cases have been
+# tested:
+#
+# - f.dtype = uint8, h.dtype = int32
+# - f.dtype = uint8, h.dtype = float64
+# - f.dtype = float64, h.dtype = float64
+# - f.dtype = float64, h.dtype = int32
+#
+# The fft_backend input determines how the FFTs are computed. If
+# fft_backend = 'fftpack', the complex FFT_2D and iFFT_2D functions are
+# used. If fft_backend = 'rfft', real-input FFTs from scipy.fft are used
+# instead, which only compute half of the spectrum since the inputs are
+# real, and the arrays are padded up to a size that is fast for the FFT
+# as computed by get_fast_shape. If fft_backend = 'fftw', the real-input
+# FFTs are planned by FFTW once per padded size and reused, which requires
+# the pyFFTW library. The workers input sets the number of threads used by
+# the 'rfft' and 'fftw' backends, and a pre-planned FFT_plan can be passed
+# in the plan input, as long as its shape is large enough. All of the
+# backends yield the same result within floating-point tolerance.
+#
+# If profiler is a Profiler object, the time spent computing the forward
+# and inverse DFTs is recorded by it.
+#
+# If workspace is a Workspace object, the padded arrays, the DFTs and the
+# inverse DFT are written into its arrays for the padded size instead of
+# new arrays. If out is an array with the shape of f and the data type of
+# the output, the output is written into out, which is returned. With both
+# of them, a loop that convolves arrays with the same size allocates
+# nothing large after its first call:
+#
+# g = None
+#
+# for f in frames:
+#     g = conv_FFT(f,h,workspace=workspace,out=g)
+#
+# The output is the same with or without a workspace and out.
+# 
+# Tested 11/27/2019
+
+# import NumPy library
+
+import numpy as np
+
+# import FFT_2D function
+
+from .FFT_2D import FFT_2D
+
+# import iFFT_2D function
+
+from .iFFT_2D import iFFT_2D
+
+# import the pad_img function
+
+from .pad_img import pad_img
+
+# import the get_arr_ctr function
+
+from .get_arr_ctr import get_arr_ctr
+
+# import the get_array() and get_complex_dtype() functions
+
+from .conv_FFT_multi import get_array, get_complex_dtype
+
+# import the get_fast_shape function
+
+from .get_fast_shape import get_fast_shape
+
+# import the get_fft_plan function
+
+from .get_fft_plan import get_fft_plan
+
+# import the get_span() function
+
+from .get_span import get_span
+
+def conv_FFT(f,h,img_filter=False,fft_backend='fftpack',workers=1,
+             plan=None,profiler=None,workspace=None,out=None):
+        
+    # minimum dimensions of padded arrays to avoid wrap-around error
+    
+    P = f.shape[0] + h.shape[0] - 1
+    
+    Q = f.shape[1] + h.shape[1] - 1
+    
+    if fft_backend in ('rfft','fftw'):
+        
+        # get the real-input FFTs for a fast padded size
+        
+        if plan is None:
+            
+            plan = get_fft_plan(get_fast_shape((P,Q)),workers=workers,
+                                use_pyfftw=(fft_backend == 'fftw'))
+        
+        # compute the DFTs of the two inputs, which are zero-padded after
+        # their last rows and columns, then compute their element-wise
+        # product and the inverse FFT. The FFTs of scipy.fft always return
+        # new arrays, so only the FFTs planned by FFTW are written into the
+        # workspace.
+        
+        fft_workspace = workspace if plan.use_pyfftw else None
+        
+        spec_shape = (plan.shape[0],plan.shape[1]//2 + 1)
+        
+        with get_span(profiler,'fft',shape=plan.shape):
+            
+            F = plan.rfft2(f,out=get_array(fft_workspace,'spectrum',
+                                           spec_shape,
+                                           get_complex_dtype(f.dtype)))
+            
+            H = plan.rfft2(h,out=get_array(fft_workspace,'kernel_spectrum',
+                                           spec_shape,
+                                           get_complex_dtype(h.dtype)))
+        
+        with get_span(profiler,'ifft',shape=plan.shape):
+            
+            G = np.multiply(F,H,out=get_array(workspace,'product',
+                                              spec_shape,
+                                              np.result_type(F,H)))
+            
+            g = plan.irfft2(G,out=get_array(fft_workspace,'layers',
+                                            plan.shape,G.real.dtype))
+        
+        # the full convolution starts at the top-left corner of g, so the
+        # output is shifted by half of the size of h
+        
+        out_start_idx = ((h.shape[0]-1)//2,(h.shape[1]-1)//2)
+        
+        # cropped output
+        
+        cropped_out = g[out_start_idx[0]:out_start_idx[0]+f.shape[0],
+                        out_start_idx[1]:out_start_idx[1]+f.shape[1]]
+        
+    elif fft_backend == 'fftpack':
+        
+        # zero-pad arrays to ensure linear, and not circular, convolution
+        # in spatial domain
+        
+        pad_size_f = (int(np.ceil((P-f.shape[0])/2)),
+                      int(np.floor((P-f.shape[0])/2)),
+                      int(np.ceil((Q-f.shape[1])/2)),
+                      int(np.floor((Q-f.shape[1])/2)))
+        
+        pad_size_h = (int(np.ceil((P-h.shape[0])/2)),
+                      int(np.floor((P-h.shape[0])/2)),
+                      int(np.ceil((Q-h.shape[1])/2)),
+                      int(np.floor((Q-h.shape[1])/2)))
+        
+        padded_f = pad_img(f,pad_size_f,
+                           out=get_array(workspace,'pad',(P,Q),f.dtype))
+        
+        padded_h = pad_img(h,pad_size_h,
+                           out=get_array(workspace,'kernel_pad',(P,Q),
+                                         h.dtype))
+        
+        # compute the DFTs of the two zero-padded inputs
+        
+        with get_span(profiler,'fft',shape=(P,Q)):
+            
+            F = FFT_2D(padded_f)
+            
+            H = FFT_2D(padded_h)
+        
+        with get_span(profiler,'ifft',shape=(P,Q)):
+            
+            # compute the element-wise product of the two DFTs, which is
+            # the same as spatial convolution
+            
+            G = np.multiply(F,H,out=get_array(workspace,'product',(P,Q),
+                                              np.result_type(F,H)))
+            
+            # compute the inverse FFT in place then take the real part
+            
+            g = np.real(iFFT_2D(G,overwrite_x=True))
+                
+        # compute the indices of the centers of the f and g arrays
+        
+        f_ctr = get_arr_ctr(f.shape)
+        
+        g_ctr = get_arr_ctr(g.shape)
+        
+        # compute the top-left index used to crop out the convolved result
+        
+        out_start_idx = g_ctr - f_ctr
+        
+        # the convolved result is centered by np.fft.ifftshift, which
+        # rolls each axis of g by half of its size. Instead of rolling the
+        # whole array, only the rows and columns of the cropped output are
+        # gathered from their positions before the roll.
+        
+        rows = (np.arange(f.shape[0]) + out_start_idx[0] + P//2) % P
+        
+        cols = (np.arange(f.shape[1]) + out_start_idx[1] + Q//2) % Q
+        
+        g_rows = np.take(g,rows,axis=0,
+                         out=get_array(workspace,'rows',(f.shape[0],Q),
+                                       g.dtype))
+        
+        cropped_out = np.take(g_rows,cols,axis=1,
+                              out=get_array(workspace,'crop',f.shape,
+                                            g.dtype))
+    
+    else:
+        
+        raise ValueError("unknown fft_backend '%s'" % fft_backend)
+    
+    # check if f and h contain floating-point numbers to determine the
+    # output data type
+    
+    f_isfloat = issubclass(f.dtype.type, np.floating)
+    
+    h_isfloat = issubclass(h.dtype.type, np.floating)
+    
+    # the following if statements determine the data type of the output
+    # based on the img_filter flag passed into the input argument and
+    # based on the data types of f and h. The cropped output is a new
+    # array or an array of the workspace, so it is rounded and clipped in
+    # place.
+    
+    # if either f or h contain floating-point numbers and the function
+    # isn't used to filter an image
+    
+    if (f_isfloat or h_isfloat) and img_filter == False:
+        
+        conv_out = cropped_out
+    
+    # if both f and h contain floating-point numbers and the function
+    # is used to filter an image
+    
+    elif (f_isfloat and h_isfloat) and img_filter == True:
+        
+        conv_out = np.clip(cropped_out,0,255,out=cropped_out)
+    
+    # if f does not contain floating-point numbers and the function is
+    # used to filter an image
+    
+    elif (not f_isfloat) and img_filter == True:
+        
+        np.clip(cropped_out,0,255,out=cropped_out)
+        
+        conv_out = cast_out(np.around(cropped_out,out=cropped_out),np.uint8,
+                            out)
+        
+    # if neither f nor h contain floating-point numbers and if the
+    # function isn't used to filter an image
+    
+    elif img_filter == False:
+        
+        conv_out = cast_out(np.around(cropped_out,out=cropped_out),f.dtype,
+                            out)
+    
+    # if all of the above fails
+    
+    else:
+        
+        conv_out = cropped_out
+    
+    if out is None or conv_out is out:
+        
+        return conv_out
+    
+    np.copyto(out,conv_out)
+    
+    return out
+
+# This function converts arr to dtype, writing the result into out if out
+# is given, just like arr.astype(dtype) otherwise.
+
+def cast_out(arr,dtype,out=None):
+    
+    if out is None:
+        
+        return arr.astype(dtype)
+    
+    np.copyto(out,arr,casting='unsafe')
+    
+    return out
@@ -0,0 +1,321 @@
+# This function convolves the input f with each of the kernels in the list
+# hs using forward and inverse FFTs. It yields the same result as calling
+# conv_FFT(f,h,img_filter=False) for each kernel h in hs, but the input f
+# is padded and transformed only once. For example, if f is an A x B array
+# and hs is a list of L kernels, then:
+#
+# g = conv_FFT_multi(f,hs)
+#
+# will yield a list g of L arrays, each with a size of A x B.
+#
+# The input f is zero-padded once according to the size of the largest
+# kernel, which is large enough to avoid wrap-around error for all of the
+# kernels. Every kernel is zero-padded to the same size and the padded
+# kernels are stacked together, so the DFTs of all of the kernels, their
+# products with the DFT of f and the inverse DFTs are each computed in a
+# single call over the stacked axis.
+#
+# The fft_backend, workers and plan inputs are the same as in conv_FFT.
+# For the 'rfft' and 'fftw' backends, the padded size is also rounded up
+# to a size that is fast for the FFT.
+#
+# If cache is a dictionary, the DFTs of the kernels are stored in it and
+# reused by every later call with the same kernels and padded size, and
+# the array used to pad f is also stored and reused. This is useful when
+# many images with the same size are filtered with the same kernels, such
+# as the frames of a video. The same dictionary shouldn't be used by more
+# than one thread at a time.
+#
+# If workspace is a Workspace object, the padded input, the DFTs and the
+# inverse DFTs are written into its arrays for the padded size instead of
+# new arrays, and the FFTs of the 'fftpack' backend are computed in place,
+# so nothing large is allocated once the arrays exist. The outputs are
+# then views of the arrays of the workspace, which are overwritten by the
+# next call with the same workspace and padded size. The outputs are the
+# same with or without a workspace.
+#
+# If spectra is given, it is used as the DFTs of the kernels instead of
+# computing them. It has to be computed by get_kernel_spectra for the same
+# kernels and the padded shape returned by get_pad_shape, which is done by
+# the FilterBank class.
+#
+# If profiler is a Profiler object, the time spent computing the DFTs of
+# the input and of the kernels and the inverse DFTs are recorded by it.
+
+# import NumPy library
+
+import numpy as np
+
+# import FFT_2D function
+
+from .FFT_2D import FFT_2D
+
+# import iFFT_2D function
+
+from .iFFT_2D import iFFT_2D
+
+# import the pad_img function
+
+from .pad_img import pad_img
+
+# import the get_fast_shape function
+
+from .get_fast_shape import get_fast_shape
+
+# import the get_fft_plan function
+
+from .get_fft_plan import get_fft_plan
+
+# import the get_span() function
+
+from .get_span import get_span
+
+def conv_FFT_multi(f,hs,fft_backend='fftpack',workers=1,plan=None,
+                   cache=None,profiler=None,spectra=None,workspace=None):
+    
+    # the padded size, which is large enough to avoid wrap-around error
+    
+    (P,Q) = get_pad_shape(f.shape,hs,fft_backend)
+    
+    if fft_backend in ('rfft','fftw'):
+        
+        # get the real-input FFTs for a fast padded size
+        
+        if plan is None:
+            
+            plan = get_fft_plan((P,Q),workers=workers,
+                                use_pyfftw=(fft_backend == 'fftw'))
+        
+        # compute the DFTs of all of the kernels at once, unless they are
+        # already stored
+        
+        H_key = get_kernel_key(hs,plan.shape,fft_backend)
+        
+        if spectra is not None:
+            
+            H = spectra
+        
+        elif cache is not None and H_key in cache:
+            
+            H = cache[H_key]
+        
+        else:
+            
+            H = get_kernel_spectra(hs,plan.shape,fft_backend,plan=plan,
+                                   profiler=profiler)
+            
+            if cache is not None:
+                
+                cache[H_key] = H
+        
+        # compute the DFT of the input once, then compute its element-wise
+        # products with the DFTs of the kernels and all of the inverse FFTs
+        # at once. The FFTs of scipy.fft always return new arrays, so only
+        # the FFTs planned by FFTW are written into the workspace.
+        
+        fft_workspace = workspace if plan.use_pyfftw else None
+        
+        with get_span(profiler,'fft',shape=plan.shape):
+            
+            F = plan.rfft2(f,out=get_array(fft_workspace,'spectrum',
+                                           H.shape[1:],
+                                           get_complex_dtype(f.dtype)))
+        
+        with get_span(profiler,'ifft',kernels=len(hs),shape=plan.shape):
+            
+            G = np.multiply(F,H,out=get_array(workspace,'product',H.shape,
+                                              np.result_type(F,H)))
+            
+            g = plan.irfft2(G,out=get_array(fft_workspace,'layers',
+                                            (len(hs),) + plan.shape,
+                                            G.real.dtype))
+    
+    elif fft_backend == 'fftpack':
+        
+        # zero-pad the input after its last row and column. Since the padded
+        # size is the same for every kernel, the input is only padded and
+        # transformed once.
+        
+        with get_span(profiler,'fft',shape=(P,Q)):
+            
+            if workspace is not None:
+                
+                padded_f = pad_img(f,(0,P-f.shape[0],0,Q-f.shape[1]),
+                                   out=workspace.get('pad',(P,Q),f.dtype))
+            
+            elif cache is None:
+                
+                padded_f = pad_img(f,(0,P-f.shape[0],0,Q-f.shape[1]))
+            
+            else:
+                
+                # reuse the stored padded array if there is one
+                
+                pad_key = ('pad',(P,Q),f.dtype.str)
+                
+                if pad_key not in cache:
+                    
+                    cache[pad_key] = np.empty((P,Q),dtype=f.dtype)
+                
+                padded_f = pad_img(f,(0,P-f.shape[0],0,Q-f.shape[1]),
+                                   out=cache[pad_key])
+            
+            F = FFT_2D(padded_f)
+        
+        # compute the DFTs of all of the kernels at once, unless they are
+        # already stored
+        
+        H_key = get_kernel_key(hs,(P,Q),fft_backend)
+        
+        if spectra is not None:
+            
+            H = spectra
+        
+        elif cache is not None and H_key in cache:
+            
+            H = cache[H_key]
+        
+        else:
+            
+            H = get_kernel_spectra(hs,(P,Q),fft_backend,profiler=profiler)
+            
+            if cache is not None:
+                
+                cache[H_key] = H
+        
+        # compute the element-wise product of the DFT of the input with the
+        # DFT of each kernel, which is the same as spatial convolution
+        
+        with get_span(profiler,'ifft',kernels=len(hs),shape=(P,Q)):
+            
+            G = np.multiply(F,H,out=get_array(workspace,'product',H.shape,
+                                              np.result_type(F,H)))
+            
+            # compute all of the inverse FFTs at once then take the real
+            # part. The products aren't used anymore, so the inverse FFTs
+            # are computed in place.
+            
+            g = np.real(iFFT_2D(G,overwrite_x=True))
+    
+    else:
+        
+        raise ValueError("unknown fft_backend '%s'" % fft_backend)
+    
+    # initialize list to store results
+    
+    conv_out = []
+    
+    for i in range(len(hs)): # loop through each kernel
+        
+        # compute the top-left index used to crop out the convolved
+        # result. The full convolution with the i-th kernel starts at the
+        # top-left corner of the padded array, so the output is shifted
+        # by half of the size of the kernel.
+        
+        out_start_idx = ((hs[i].shape[0]-1)//2,(hs[i].shape[1]-1)//2)
+        
+        # cropped output
+        
+        cropped_out = g[i,
+                        out_start_idx[0]:out_start_idx[0]+f.shape[0],
+                        out_start_idx[1]:out_start_idx[1]+f.shape[1]]
+        
+        # append result to list
+        
+        conv_out.append(cropped_out)
+    
+    return conv_out
+
+# This function returns the padded shape used to convolve an array of
+# shape f_shape with the kernels hs, which is the minimum shape that avoids
+# wrap-around error, rounded up to a shape that is fast for the FFT for the
+# 'rfft' and 'fftw' backends.
+
+def get_pad_shape(f_shape,hs,fft_backend):
+    
+    # the largest kernel dimensions determine the padded size
+    
+    m = max([h.shape[0] for h in hs])
+    
+    n = max([h.shape[1] for h in hs])
+    
+    # minimum dimensions of padded arrays to avoid wrap-around error
+    
+    P = f_shape[0] + m - 1
+    
+    Q = f_shape[1] + n - 1
+    
+    if fft_backend in ('rfft','fftw'):
+        
+        return get_fast_shape((P,Q))
+    
+    return (P,Q)
+
+# This function returns the array of workspace with the given name, shape
+# and data type, or None if workspace = None, so a new array is allocated
+# by the function that it is passed to.
+
+def get_array(workspace,name,shape,dtype):
+    
+    if workspace is None:
+        
+        return None
+    
+    return workspace.get(name,shape,dtype)
+
+# This function returns the complex data type of the DFT of an array with
+# the given data type, which is complex64 for float32 arrays and complex128
+# otherwise, just like the FFTs of the backends.
+
+def get_complex_dtype(dtype):
+    
+    return np.complex64 if dtype == np.float32 else np.complex128
+
+# This function returns the DFTs of the kernels hs zero-padded to
+# pad_shape, stacked along the first axis. For the 'rfft' and 'fftw'
+# backends, the real-input FFTs of plan are used, or the FFTs returned by
+# get_fft_plan if plan = None.
+
+def get_kernel_spectra(hs,pad_shape,fft_backend,plan=None,workers=1,
+                       profiler=None):
+    
+    (P,Q) = pad_shape
+    
+    with get_span(profiler,'kernel_fft',kernels=len(hs),shape=pad_shape):
+        
+        if fft_backend in ('rfft','fftw'):
+            
+            if plan is None:
+                
+                plan = get_fft_plan(pad_shape,workers=workers,
+                                    use_pyfftw=(fft_backend == 'fftw'))
+            
+            # the real-input FFTs zero-pad their inputs after the last row
+            # and column, so the kernels only need to be padded to the size
+            # of the largest kernel to be stacked together
+            
+            m = max([h.shape[0] for h in hs])
+            
+            n = max([h.shape[1] for h in hs])
+            
+            padded_hs = np.stack([pad_img(h,(0,m-h.shape[0],0,n-h.shape[1]))
+                                  for h in hs])
+            
+            return plan.rfft2(padded_hs)
+        
+        # zero-pad each kernel in the same way and stack the padded kernels
+        # together
+        
+        padded_hs = np.stack([pad_img(h,(0,P-h.shape[0],0,Q-h.shape[1]))
+                              for h in hs])
+        
+        return FFT_2D(padded_hs)
+
+# This function returns the key used to store the DFTs of the kernels hs
+# padded to pad_shape in the cache. The kernels are identified by their
+# contents, so equal kernels share the same DFTs.
+
+def get_kernel_key(hs,pad_shape,fft_backend):
+    
+    return ('kernels',tuple(pad_shape),fft_backend,
+            tuple((h.shape,h.dtype.str,h.tobytes()) for h in hs))
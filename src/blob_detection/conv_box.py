@@ -0,0 +1,118 @@
+# This function approximates the convolution of the input f with a
+# Gaussian kernel with a standard deviation of sigma by filtering f with
+# several box filters one after the other. The output g has the same shape
+# as the input f. For example:
+#
+# g = conv_box(f,2)
+#
+# is close to conv_sep(f,get_filter_bank().get_kernel_1D(2)), since the
+# input is zero-padded in the same way. The inputs to this function are:
+#
+# f - The input array
+#
+# sigma - The standard deviation of the Gaussian
+#
+# passes - The number of box filters. By the central limit theorem,
+# repeated box filters converge to a Gaussian, and 3 passes are already
+# within a few percent of it.
+#
+# Box filters with an odd width can only have a few different variances,
+# so extended box filters are used instead, where the two samples just
+# outside of the box are added with a weight alpha between 0 and 1. The
+# half-width and alpha of the boxes are computed by get_box_params, so the
+# variance of the combined filter is exactly sigma^2. The 2D box is
+# separable, so each box is applied to the rows and then to the columns,
+# and the sums of the boxes are computed by cv.boxFilter() from running
+# sums along the rows and columns, which are the 1D integral images of the
+# array. Each sum only takes an addition and a subtraction per pixel
+# whatever the width of the box, so the cost of each layer doesn't depend
+# on sigma. The output has the same data type as the input if it is a
+# floating-point array.
+
+# import NumPy library
+
+import numpy as np
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import OpenCV library
+
+cv = lazy_import('cv2')
+
+def conv_box(f,sigma,passes=3):
+    
+    # the data type of the output, which is also used by the box filters
+    
+    out_dtype = np.result_type(f.dtype,np.float32)
+    
+    (r,alpha) = get_box_params(sigma,passes)
+    
+    # zero-pad the input by the total half-width of all of the boxes, so
+    # the boxes spill over the borders of the input just like a
+    # zero-padded convolution
+    
+    R = passes*(r+1)
+    
+    g = np.zeros((f.shape[0]+2*R,f.shape[1]+2*R),dtype=out_dtype)
+    
+    g[R:R+f.shape[0],R:R+f.shape[1]] = f
+    
+    for _ in range(passes): # loop through each box filter
+        
+        # filter the columns, and then the rows
+        
+        g = box_filter_1D(g,r,alpha,axis=0)
+        
+        g = box_filter_1D(g,r,alpha,axis=1)
+    
+    return g[R:R+f.shape[0],R:R+f.shape[1]]
+
+# This function returns the weighted mean of the 1D extended box around
+# every pixel of g along the given axis, where the pixels outside of g are
+# zeros. The box has a weight of 1 from -r to r and a weight of alpha at
+# -(r+1) and r+1, so it is (1-alpha) times the box from -r to r plus alpha
+# times the box from -(r+1) to r+1.
+
+def box_filter_1D(g,r,alpha,axis):
+    
+    # the sizes of the two boxes, where OpenCV sizes are (width,height)
+    
+    if axis == 0:
+        
+        sizes = ((1,2*r+1),(1,2*r+3))
+    
+    else:
+        
+        sizes = ((2*r+1,1),(2*r+3,1))
+    
+    out = cv.boxFilter(g,-1,sizes[0],normalize=False,
+                       borderType=cv.BORDER_CONSTANT)
+    
+    if alpha > 0:
+        
+        out *= 1 - alpha
+        
+        out += alpha*cv.boxFilter(g,-1,sizes[1],normalize=False,
+                                  borderType=cv.BORDER_CONSTANT)
+    
+    out /= 2*r + 1 + 2*alpha
+    
+    return out
+
+# This function returns the half-width r and the weight alpha of the
+# extended box filters, so that the variance of passes box filters is
+# sigma^2. The variance of each box is v = sigma^2/passes, r is the largest
+# half-width whose box has a variance r(r+1)/3 below v, and alpha adds the
+# rest of the variance.
+
+def get_box_params(sigma,passes=3):
+    
+    v = sigma**2/passes
+    
+    r = int(np.floor(0.5*np.sqrt(12*v + 1) - 0.5))
+    
+    alpha = (2*r + 1)*(3*v - r*(r + 1))/(6*((r + 1)**2 - v))
+    
+    return (r,alpha)
@@ -0,0 +1,40 @@
+# This function convolves the input f with a separable kernel in the
+# spatial domain, where h is the 1D kernel that is applied to the rows and
+# then to the columns of f. The output g has the same shape as the input f
+# and is the same as the output of:
+#
+# g = conv_FFT(f,np.outer(h,h),img_filter=False)
+#
+# since the input is zero-padded in the same way as conv_FFT. For a kernel
+# with a length of m, the separable convolution only requires 2m
+# multiplications per pixel instead of m^2, which is much cheaper than
+# going through the frequency domain for small kernels.
+
+# import NumPy library
+
+import numpy as np
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import NDimage library
+
+ndimage = lazy_import('scipy.ndimage')
+
+def conv_sep(f,h):
+    
+    # make sure the convolution is computed in floating-point arithmetic
+    
+    f = np.asarray(f,dtype=np.result_type(f.dtype,h.dtype,np.float32))
+    
+    # convolve the columns of the input with the 1D kernel. The input is
+    # padded with zeros, just like conv_FFT.
+    
+    g = ndimage.convolve1d(f,h,axis=0,mode='constant',cval=0.0)
+    
+    # convolve the rows of the result with the 1D kernel
+    
+    g = ndimage.convolve1d(g,h,axis=1,mode='constant',cval=0.0)
+    
+    return g
@@ -0,0 +1,599 @@
+# This file is a command-line tool that detects blobs in many images
+# without a GUI, so it can be run on a headless server. The inputs can be
+# image files, glob patterns or directories, and all of the parameters of
+# get_blob_loc can be set. For example:
+#
+# python -m blob_detection.detect_blobs ../images -o blobs.jsonl --processes 4
+#
+# detects the blobs in every image in the images folder using 4 worker
+# processes and writes them to blobs.jsonl. The results are written as
+# soon as each image is processed, in one of the following formats:
+#
+# jsonl - One JSON object per line for each image, with the path of the
+# image and a list of [x,y,layer] blobs, or an error message if the image
+# failed.
+#
+# csv - One row per blob with the columns path, x, y and layer. Images
+# without any blobs are written as a single row with empty x, y and layer.
+#
+# npz - One NumPy .npz file per image in the output directory, with the
+# path of the image, the (x,y) indices of the blobs in maxima_idx and their
+# layer numbers in maxima_layer_num.
+#
+# If --resume is given, the images that are already in the output are
+# skipped and the new results are appended to the output, so an
+# interrupted run can be continued. Otherwise, the output file is
+# overwritten. An npz output directory that isn't empty is only used if
+# --overwrite is given, in which case the .npz files written by an earlier
+# run of this tool are deleted, so the output only contains the results of
+# this run. Any other file in the directory is kept.
+# If --cache is given, the results are also stored in a BlobCache in that
+# directory, so the images that were already processed with the same
+# parameters by any earlier run are read from it instead of being computed.
+#
+# The --pipeline argument chooses the pipeline of get_blob_loc, and every
+# --roi argument adds a rectangle x,y,w,h to the regions of interest, which
+# are the same for every image. The blobs are always written as the (x,y)
+# indices and layer numbers of the default out_format of get_blob_loc,
+# so its structured out_format isn't an option of this tool. Please run
+# python -m blob_detection.detect_blobs --help for all of the options.
+
+# import the argparse library
+
+import argparse
+
+# import the csv library
+
+import csv
+
+# import the glob library
+
+import glob
+
+# import the hashlib library
+
+import hashlib
+
+# import the json library
+
+import json
+
+# import the os library
+
+import os
+
+# import the re library
+
+import re
+
+# import the sys library
+
+import sys
+
+# import NumPy library
+
+import numpy as np
+
+# import the get_blob_loc_batch function
+
+from .get_blob_loc_batch import get_blob_loc_batch
+
+# import the BlobCache class
+
+from .BlobCache import BlobCache
+
+# import the get_thresh_arg function
+
+from .ThreshStrategy import get_thresh_arg
+
+# default extensions of the image files found in directories
+
+IMAGE_EXTENSIONS = '.jpg,.jpeg,.png,.bmp,.tif,.tiff'
+
+def main(argv=None):
+    
+    parser = argparse.ArgumentParser(
+                 description='Detect blobs in images without a GUI.')
+    
+    parser.add_argument('inputs',nargs='+',
+                        help='image files, glob patterns or directories')
+    
+    parser.add_argument('-o','--output',required=True,
+                        help='output file, or output directory for npz')
+    
+    parser.add_argument('-f','--format',choices=('jsonl','csv','npz'),
+                        help='output format (default: from the extension '
+                             'of the output, or jsonl). The structured '
+                             'out_format of get_blob_loc is not supported.')
+    
+    parser.add_argument('-r','--recursive',action='store_true',
+                        help='search directories recursively')
+    
+    parser.add_argument('--extensions',default=IMAGE_EXTENSIONS,
+                        help='comma-separated extensions of the images in '
+                             'directories (default: %(default)s)')
+    
+    parser.add_argument('--gray',action='store_true',
+                        help='decode the images straight to grayscale, '
+                             'which is faster but can change a few blobs')
+    
+    parser.add_argument('-j','--processes',type=int,default=1,
+                        help='number of worker processes (default: 1)')
+    
+    parser.add_argument('--max-in-flight',type=int,default=None,
+                        help='maximum number of pending images')
+    
+    parser.add_argument('--resume',action='store_true',
+                        help='skip the images that are already in the '
+                             'output and append to it. Otherwise, the '
+                             'output file is overwritten.')
+    
+    parser.add_argument('--overwrite',action='store_true',
+                        help='use an npz output directory that is not '
+                             'empty, and delete the npz files written by '
+                             'an earlier run')
+    
+    parser.add_argument('--cache',default=None,
+                        help='directory of the cache of the results')
+    
+    parser.add_argument('--cache-size',type=float,default=1.0,
+                        help='maximum size of the cache in GB '
+                             '(default: %(default)s)')
+    
+    # parameters of get_blob_loc
+    
+    parser.add_argument('--oct-num',type=int,default=3)
+    
+    parser.add_argument('--DoG-layer-num',type=int,default=4)
+    
+    parser.add_argument('--sigma',type=float,default=1.6)
+    
+    parser.add_argument('--k',type=float,default=np.sqrt(2))
+    
+    parser.add_argument('--pipeline',default='full',
+                        choices=('full','rolling'),
+                        help='compute all of the layers of each octave at '
+                             'once, or one layer at a time to use less '
+                             'memory (default: %(default)s)')
+    
+    parser.add_argument('--roi',type=get_roi_arg,action='append',
+                        default=None,metavar='X,Y,W,H',
+                        help='rectangle of a region of interest in every '
+                             'image, which can be repeated (default: the '
+                             'whole image)')
+    
+    parser.add_argument('--conv-engine',default='auto',
+                        choices=('auto','fft','spatial','box'))
+    
+    parser.add_argument('--ss-mode',default='direct',
+                        choices=('direct','incremental'))
+    
+    parser.add_argument('--fft-backend',default='fftpack',
+                        choices=('fftpack','rfft','fftw'))
+    
+    parser.add_argument('--fft-workers',type=int,default=1,
+                        help='number of threads used by each FFT')
+    
+    parser.add_argument('--threads',type=int,default=1,
+                        help='number of threads used by the stages of each '
+                             'octave')
+    
+    parser.add_argument('--dtype',default='float64',
+                        choices=('float64','float32'))
+    
+    parser.add_argument('--nms-engine',default='vectorized',
+                        choices=('vectorized','loop','coarse'))
+    
+    parser.add_argument('--nms-margin',type=int,default=2,
+                        help='number of pixels searched around each '
+                             'candidate of the coarse NMS engine')
+    
+    parser.add_argument('--thresh',default='yen',
+                        help='thresholding method (yen, otsu, mean or '
+                             'percentile) or a fixed threshold value '
+                             '(default: %(default)s)')
+    
+    parser.add_argument('--thresh-q',type=float,default=99.0,
+                        help='percentile used by --thresh percentile '
+                             '(default: %(default)s)')
+    
+    parser.add_argument('--thresh-per-octave',action='store_true',
+                        help='use a single threshold value per octave')
+    
+    parser.add_argument('--thresh-subsample',type=int,default=1,
+                        help='subsampling factor of the layers used to '
+                             'compute the threshold values (default: 1)')
+    
+    args = parser.parse_args(argv)
+    
+    # determine the output format
+    
+    out_format = args.format
+    
+    if out_format is None:
+        
+        out_format = os.path.splitext(args.output)[1].lstrip('.').lower()
+        
+        if out_format not in ('jsonl','csv','npz'):
+            
+            out_format = 'jsonl'
+    
+    # an npz output directory that isn't empty can contain files that
+    # weren't written by this tool, so it is only used if asked for
+    
+    if (out_format == 'npz' and not (args.resume or args.overwrite) and
+        os.path.isdir(args.output) and os.listdir(args.output)):
+        
+        parser.error('the output directory %s is not empty, please use '
+                     '--resume or --overwrite' % args.output)
+    
+    # find all of the input images
+    
+    extensions = tuple(e.strip().lower() for e in args.extensions.split(','))
+    
+    paths = find_images(args.inputs,extensions,args.recursive)
+    
+    # find the images that are already processed
+    
+    if args.resume:
+        
+        done = get_done_paths(args.output,out_format)
+        
+        skipped = len(paths)
+        
+        paths = [p for p in paths if p not in done]
+        
+        skipped = skipped - len(paths)
+        
+        print('skipping %d processed images' % skipped,file=sys.stderr)
+    
+    params = dict(thresh=get_thresh_arg(args),
+                  oct_num=args.oct_num,DoG_layer_num=args.DoG_layer_num,
+                  sigma=args.sigma,k=args.k,conv_engine=args.conv_engine,
+                  ss_mode=args.ss_mode,fft_backend=args.fft_backend,
+                  workers=args.fft_workers,threads=args.threads,
+                  dtype=np.dtype(args.dtype).type,nms_engine=args.nms_engine,
+                  nms_margin=args.nms_margin,pipeline=args.pipeline,
+                  roi=args.roi)
+    
+    cache = None
+    
+    if args.cache is not None:
+        
+        cache = BlobCache(args.cache,max_bytes=int(args.cache_size*2**30))
+    
+    results = get_blob_loc_batch(paths,processes=args.processes,
+                                 max_in_flight=args.max_in_flight,
+                                 ordered=False,on_error='report',cache=cache,
+                                 color=not args.gray,**params)
+    
+    # write the results as soon as they are produced
+    
+    failed = 0
+    
+    with open_writer(args.output,out_format,args.resume) as writer:
+        
+        for (count,(i,result,error)) in enumerate(results,1):
+            
+            writer.write(paths[i],result,error)
+            
+            if error is not None:
+                
+                failed += 1
+                
+                print('%s: %s' % (paths[i],error),file=sys.stderr)
+            
+            if count % 100 == 0:
+                
+                print('processed %d of %d images' % (count,len(paths)),
+                      file=sys.stderr)
+    
+    print('processed %d images, %d failed' % (len(paths),failed),
+          file=sys.stderr)
+    
+    if cache is not None:
+        
+        stats = cache.get_stats()
+        
+        print('cache: %d hits, %d misses (%.1f%%), %d evictions' %
+              (stats['hits'],stats['misses'],100*stats['hit_rate'],
+               stats['evictions']),file=sys.stderr)
+    
+    return 1 if failed else 0
+
+# This function returns the (x,y,w,h) rectangle of a --roi argument.
+
+def get_roi_arg(value):
+    
+    try:
+        
+        roi = tuple(int(v) for v in value.split(','))
+    
+    except ValueError:
+        
+        roi = ()
+    
+    if len(roi) != 4 or roi[2] <= 0 or roi[3] <= 0:
+        
+        raise argparse.ArgumentTypeError("invalid rectangle '%s'" % value)
+    
+    return roi
+
+# This function expands the input files, glob patterns and directories
+# into a sorted list of image paths without duplicates.
+
+def find_images(inputs,extensions,recursive):
+    
+    paths = []
+    
+    for name in inputs:
+        
+        if os.path.isdir(name):
+            
+            if recursive:
+                
+                found = [os.path.join(root,f)
+                         for (root,_,files) in os.walk(name) for f in files]
+            
+            else:
+                
+                found = [os.path.join(name,f) for f in os.listdir(name)]
+            
+            found = [f for f in found if f.lower().endswith(extensions)
+                     and os.path.isfile(f)]
+        
+        elif glob.has_magic(name):
+            
+            found = glob.glob(name,recursive=recursive)
+        
+        else:
+            
+            found = [name]
+        
+        paths.extend(sorted(found))
+    
+    # remove duplicates while keeping the order
+    
+    return list(dict.fromkeys(os.path.normpath(p) for p in paths))
+
+# This function returns the set of image paths that are already in the
+# output.
+
+def get_done_paths(output,out_format):
+    
+    done = set()
+    
+    if out_format == 'npz':
+        
+        if os.path.isdir(output):
+            
+            for f in os.listdir(output):
+                
+                if f.endswith('.npz'):
+                    
+                    try:
+                        
+                        with np.load(os.path.join(output,f)) as data:
+                            
+                            done.add(str(data['path']))
+                    
+                    except (OSError,ValueError,KeyError):
+                        
+                        pass
+    
+    elif os.path.exists(output):
+        
+        with open(output,newline='') as f:
+            
+            if out_format == 'jsonl':
+                
+                for line in f:
+                    
+                    # ignore the last line if it is incomplete, and retry
+                    # the images that failed
+                    
+                    try:
+                        
+                        record = json.loads(line)
+                    
+                    except ValueError:
+                        
+                        continue
+                    
+                    if 'error' not in record:
+                        
+                        done.add(record['path'])
+            
+            else:
+                
+                for row in csv.DictReader(f):
+                    
+                    done.add(row['path'])
+    
+    return done
+
+# This function returns the writer of the output format.
+
+def open_writer(output,out_format,append):
+    
+    if out_format == 'jsonl':
+        
+        return JSONLWriter(output,append)
+    
+    elif out_format == 'csv':
+        
+        return CSVWriter(output,append)
+    
+    else:
+        
+        return NPZWriter(output,append)
+
+# The writers below write the result of each image to the output and flush
+# it immediately, so the output is always up to date.
+
+class JSONLWriter:
+    
+    def __init__(self,output,append):
+        
+        self.file = open(output,'a' if append else 'w')
+    
+    def write(self,path,result,error):
+        
+        if error is None:
+            
+            (maxima_idx,maxima_layer_num) = result
+            
+            blobs = [[x,y,layer] for ((x,y),layer) in
+                     zip(maxima_idx,maxima_layer_num.tolist())]
+            
+            record = {'path':path,'blobs':blobs}
+        
+        else:
+            
+            record = {'path':path,'error':str(error)}
+        
+        self.file.write(json.dumps(record) + '\n')
+        
+        self.file.flush()
+    
+    def __enter__(self):
+        
+        return self
+    
+    def __exit__(self,*exc):
+        
+        self.file.close()
+
+class CSVWriter:
+    
+    def __init__(self,output,append):
+        
+        write_header = not (append and os.path.exists(output) and
+                            os.path.getsize(output) > 0)
+        
+        self.file = open(output,'a' if append else 'w',newline='')
+        
+        self.writer = csv.writer(self.file)
+        
+        if write_header:
+            
+            self.writer.writerow(('path','x','y','layer'))
+    
+    def write(self,path,result,error):
+        
+        # failed images aren't written, so they are retried by --resume
+        
+        if error is not None:
+            
+            return
+        
+        (maxima_idx,maxima_layer_num) = result
+        
+        rows = [(path,x,y,layer) for ((x,y),layer) in
+                zip(maxima_idx,maxima_layer_num.tolist())]
+        
+        if not rows:
+            
+            rows = [(path,'','','')]
+        
+        self.writer.writerows(rows)
+        
+        self.file.flush()
+    
+    def __enter__(self):
+        
+        return self
+    
+    def __exit__(self,*exc):
+        
+        self.file.close()
+
+class NPZWriter:
+    
+    def __init__(self,output,append):
+        
+        os.makedirs(output,exist_ok=True)
+        
+        self.output = output
+        
+        # delete the results of any earlier run, unless they are resumed
+        
+        if not append:
+            
+            for f in os.listdir(output):
+                
+                if is_npz_result(output,f):
+                    
+                    os.remove(os.path.join(output,f))
+    
+    def write(self,path,result,error):
+        
+        if error is not None:
+            
+            return
+        
+        (maxima_idx,maxima_layer_num) = result
+        
+        name = get_npz_name(path)
+        
+        # write to a temporary file first, so an interrupted run doesn't
+        # leave an incomplete file behind
+        
+        tmp_name = os.path.join(self.output,name + '.tmp')
+        
+        with open(tmp_name,'wb') as f:
+            
+            np.savez(f,path=path,
+                     maxima_idx=np.array(maxima_idx,dtype=int).reshape((-1,2)),
+                     maxima_layer_num=maxima_layer_num)
+        
+        os.replace(tmp_name,os.path.join(self.output,name))
+    
+    def __enter__(self):
+        
+        return self
+    
+    def __exit__(self,*exc):
+        
+        pass
+
+# This function returns the name of the npz file of the image in path. The
+# name is made unique using a hash of the path, since images in different
+# directories can have the same name.
+
+def get_npz_name(path):
+    
+    name = os.path.splitext(os.path.basename(path))[0]
+    
+    return '%s_%s.npz' % (name,hashlib.sha1(path.encode()).hexdigest()[:8])
+
+# This function returns True if the file f in the output directory was
+# written by NPZWriter, which is the case if it holds the results of an
+# image whose npz name is f. The incomplete temporary files are recognized
+# by their names only.
+
+def is_npz_result(output,f):
+    
+    if f.endswith('.npz.tmp'):
+        
+        return re.fullmatch(r'.*_[0-9a-f]{8}\.npz\.tmp',f) is not None
+    
+    elif not f.endswith('.npz'):
+        
+        return False
+    
+    try:
+        
+        with np.load(os.path.join(output,f)) as data:
+            
+            return (set(data.files) ==
+                    {'path','maxima_idx','maxima_layer_num'} and
+                    get_npz_name(str(data['path'])) == f)
+    
+    except (OSError,ValueError):
+        
+        return False
+
+if __name__ == '__main__':
+    
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# This function draws circles around the blobs detected by get_blob_loc on
+# a copy of an image, without a GUI. The inputs to this function are:
+#
+# img - The image where the blobs are detected
+#
+# blobs - The structured array of blobs returned by get_blob_loc with
+# out_format = 'struct'
+#
+# color - The BGR color of the circles
+#
+# thickness - The thickness of the circles
+#
+# filename - If it is given, the image with the circles is also written to
+# this file using cv.imwrite()
+#
+# The circles are drawn in bulk instead of calling cv.circle() for every
+# blob. Since the radius of each blob only depends on its octave and
+# layer, there are only a few different radii. For each radius, a single
+# circle is drawn using cv.circle() to find the offsets of its pixels from
+# its center, and then the pixels of all of the circles with that radius
+# are set at once. The result is the same as calling cv.circle() for every
+# blob, except for a few pixels of the circles that are clipped by the
+# borders of the image. This function returns the image with the circles.
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import OpenCV library
+
+cv = lazy_import('cv2')
+
+# import NumPy library
+
+import numpy as np
+
+def draw_blobs(img,blobs,color=(0,0,255),thickness=2,filename=None):
+    
+    out = img.copy()
+    
+    # just like cv.circle(), only the first element of the color is used
+    # for grayscale images
+    
+    if out.ndim == 2:
+        
+        color = color[0]
+    
+    # the circles are drawn in chunks to limit the memory used by the
+    # indices of their pixels
+    
+    max_pixels = 2**22
+    
+    for radius in np.unique(blobs['radius']):
+        
+        # draw a single circle with this radius to find the offsets of its
+        # pixels from its center
+        
+        size = 2*(radius + thickness) + 1
+        
+        stamp = np.zeros((size,size),dtype=np.uint8)
+        
+        cv.circle(stamp,(radius + thickness,radius + thickness),int(radius),
+                  255,thickness)
+        
+        (dy,dx) = np.nonzero(stamp)
+        
+        dy = dy - (radius + thickness)
+        
+        dx = dx - (radius + thickness)
+        
+        # the centers of all of the blobs with this radius
+        
+        centers = blobs[blobs['radius'] == radius]
+        
+        chunk = max(1,max_pixels//len(dy))
+        
+        for i in range(0,len(centers),chunk):
+            
+            # compute the positions of the pixels of all of the circles in
+            # this chunk
+            
+            y = (centers['y'][i:i+chunk,np.newaxis] + dy).ravel()
+            
+            x = (centers['x'][i:i+chunk,np.newaxis] + dx).ravel()
+            
+            # only keep the pixels inside the image
+            
+            inside = ((y >= 0) & (y < out.shape[0]) &
+                      (x >= 0) & (x < out.shape[1]))
+            
+            out[y[inside],x[inside]] = color
+    
+    if filename is not None:
+        
+        cv.imwrite(filename,out)
+    
+    return out
@@ -0,0 +1,59 @@
+# This function computes the squared Difference of Gaussian layers
+# for a scale-space octave. The inputs to this function are:
+#
+# scale_space - a single octave in scale space
+#
+# pool - A pool of threads from get_thread_pool, or None. If a pool is
+# given, the layers are computed by the threads of the pool at the same
+# time, and they are returned in the same order.
+#
+# out - An (n-1) x M x N array, where n is the number of layers in the
+# octave, or None. If out is given, every squared DoG layer is written into
+# it instead of a new array, and the layers that are returned are its views
+# out[0], ..., out[n-2].
+
+# import the NumPy library
+
+import numpy as np
+
+def get_DoG_squared(scale_space,pool=None,out=None):
+    
+    if pool is not None:
+        
+        # compute the squared difference of every two consecutive layers
+        # on the pool
+        
+        return list(pool.map(lambda i: get_DoG_layer(scale_space,i,out),
+                             range(len(scale_space)-1)))
+    
+    # initialize list to store squared DoG layers
+    
+    DoG_squared = []
+    
+    # loop through each layer in the octave
+    
+    for i in range(len(scale_space)-1):
+        
+        # compute the squared difference of gaussians
+        
+        DoG_layer_squared = get_DoG_layer(scale_space,i,out)
+        
+        # append result to list
+        
+        DoG_squared.append(DoG_layer_squared)
+    
+    return DoG_squared
+
+# This function returns the squared difference of the layers i+1 and i of
+# scale_space, which is written into out[i] if out is given.
+
+def get_DoG_layer(scale_space,i,out=None):
+    
+    # compute the difference of gaussians
+    
+    DoG_layer = np.subtract(scale_space[i+1],scale_space[i],
+                            out=None if out is None else out[i])
+    
+    # square the result in place
+    
+    return np.power(DoG_layer,2,out=DoG_layer)
@@ -0,0 +1,76 @@
+# This function stores the blobs detected by get_blob_loc in a compact
+# NumPy structured array, with one element for each blob and the following
+# fields:
+#
+# x, y - The x and y co-ordinates of the center of the blob
+#
+# octave - The octave in which the blob is detected
+#
+# layer - The DoG layer of the octave in which the blob is detected
+#
+# sigma - The characteristic scale of the blob in the original image
+#
+# radius - The radius of the circle drawn around the blob, which is
+# sigma*sqrt(2) rounded up, just like show_blobs
+#
+# response - The value of the squared DoG at the center of the blob
+#
+# The inputs to this function are:
+#
+# maxima_idx - An N x 2 array with the row and column numbers of the blobs
+#
+# maxima_layer_num - An array with the layer number of each blob, where the
+# layer numbers are shifted to account for different octaves, just like
+# the output of get_blob_loc
+#
+# response - An array with the value of the squared DoG of each blob
+#
+# DoG_layer_num, sigma, k - The parameters of get_blob_loc
+#
+# For example, the x co-ordinates of all of the blobs are blobs['x'], and
+# the blobs detected in the second octave are blobs[blobs['octave'] == 1].
+
+# import NumPy library
+
+import numpy as np
+
+# the data type of each blob
+
+BLOB_DTYPE = np.dtype([('x',np.int32),
+                       ('y',np.int32),
+                       ('octave',np.int16),
+                       ('layer',np.int16),
+                       ('sigma',np.float32),
+                       ('radius',np.int32),
+                       ('response',np.float32)])
+
+def get_blob_array(maxima_idx,maxima_layer_num,response,DoG_layer_num,
+                   sigma,k):
+    
+    blobs = np.empty(len(maxima_layer_num),dtype=BLOB_DTYPE)
+    
+    # the indices are stored as (row,column), which is (y,x)
+    
+    blobs['x'] = maxima_idx[:,1]
+    
+    blobs['y'] = maxima_idx[:,0]
+    
+    # split the layer numbers into the octave and the layer of the octave
+    
+    (octave,layer) = np.divmod(maxima_layer_num,DoG_layer_num)
+    
+    blobs['octave'] = octave
+    
+    blobs['layer'] = layer
+    
+    # the sigma of each layer is scaled to account for down-sampling
+    
+    blob_sigma = sigma*np.power(k,layer)*np.power(2.0,octave)
+    
+    blobs['sigma'] = blob_sigma
+    
+    blobs['radius'] = np.ceil(np.sqrt(2)*blob_sigma)
+    
+    blobs['response'] = response
+    
+    return blobs
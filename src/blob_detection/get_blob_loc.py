@@ -0,0 +1,355 @@
+# This function computes the indices of the blobs in an image. The inputs
+# to the function are:
+#
+# input_img - The main input image where blobs are detected. It is either
+# a BGR color image, which is converted to grayscale, or a single-channel
+# grayscale image, which is used without any conversion. Please refer to
+# the load_images function to decode images straight to grayscale.
+#
+# oct_num - The number of octaves desired in scale space. The default
+# value was chosen based on the suggestions in section 11.7 of the
+# 4th edition of the 'Digital Image Processing' book by Rafael C. Gonzalez.
+#
+# DoG_layer_num - The number of Difference of Gaussian layers desired
+# in each octave. The default value was chosen based on the suggestions in
+# section 11.7 of the 4th edition of the 'Digital Image Processing' book
+# by Rafael C. Gonzalez.
+#
+# sigma - The initial sigma value to be used for blurring. The default
+# value was chosen based on the suggestions in section 11.7 of the 4th
+# edition of the 'Digital Image Processing' book by Rafael C. Gonzalez.
+#
+# k - The initial scaling factor for sigma. The default value was chosen
+# based on the suggestions in section 11.7 of the 4th edition of the
+# 'Digital Image Processing' book by Rafael C. Gonzalez.
+#
+# conv_engine - The engine used to compute the Gaussian layers. Please
+# refer to the get_ss_octave function for the available engines, including
+# the approximate 'box' engine.
+#
+# ss_mode - The way the layers of each octave are computed. Please refer
+# to the get_ss_octave function for the available modes and the tolerance
+# of the incremental mode with respect to the direct mode.
+#
+# fft_backend - The backend used to compute FFTs. Please refer to the
+# conv_FFT function for the available backends.
+#
+# workers - The number of threads used by the FFT backend
+#
+# threads - The number of threads used to compute the independent stages
+# of each octave at the same time, which are the layers of the octave, the
+# squared DoG layers and the non-maximum suppression of each layer. If
+# threads > 1, a pool of threads from get_thread_pool is shared by every
+# call with the same number of threads. The outputs are the same for any
+# number of threads.
+#
+# pipeline - If pipeline = 'full', all of the layers of each octave are
+# computed and stored before its maxima are computed. If
+# pipeline = 'rolling', the maxima of each octave are computed one layer at
+# a time by get_maxima_rolling, which only stores a few layers at any
+# moment, so much less memory is used. The threads input isn't used by the
+# rolling pipeline, and the nms_engine, nms_margin and workspace inputs are
+# passed to get_maxima_rolling. Please refer to the get_maxima_rolling
+# function for the engines that it supports.
+#
+# dtype - The floating-point data type used by the whole pipeline. The
+# grayscale image is converted to dtype, which is then carried through the
+# padding, the FFTs, the squared DoG layers and the non-maximum
+# suppression. Using np.float32 halves the memory used by each octave.
+#
+# nms_engine - The engine used for non-maximum suppression. Please refer to
+# the get_maxima_loc function for the available engines. If
+# nms_engine = 'coarse', the candidate maxima are found on down-sampled
+# layers first, which is faster but misses a few of the maxima.
+#
+# thresh - The thresholding strategy used to compute the threshold values
+# of the middle layers of each octave. If thresh = None, Yen's method is
+# used on each layer. Please refer to the ThreshStrategy class for the
+# other strategies.
+#
+# out_format - If out_format = 'tuples', the outputs described below are
+# returned. If out_format = 'struct', a single NumPy structured array with
+# the position, octave, layer, sigma, radius and response of each blob is
+# returned instead, which is much more compact when there are many blobs.
+# Please refer to the get_blob_array function for its fields.
+#
+# profiler - A Profiler object that records the time spent in each stage
+# of every octave, which is also passed to get_ss_octave and
+# get_maxima_loc. If profiler = None, nothing is recorded. Please refer to
+# the Profiler class.
+#
+# roi - The regions of interest, which are either a list of (x,y,w,h)
+# rectangles or a boolean mask with the height and width of the image. If
+# roi = None, the whole image is processed. Otherwise, only the blobs
+# inside the regions of interest are detected by get_blob_loc_roi, which
+# only processes the regions and their surroundings, and the threshold
+# values only depend on the pixels inside the regions. The threads and
+# pipeline inputs aren't used in this case. Please refer to the
+# get_blob_loc_roi function.
+#
+# nms_margin - The number of pixels searched around each candidate of the
+# coarse engine. Please refer to the get_maxima_coarse function.
+#
+# workspace - A Workspace object, or None. If a workspace is given, the
+# padded images, the DFTs, the layers and the squared DoG layers of every
+# octave are computed in its arrays instead of new arrays, so a loop over
+# many images with the same size only allocates them for the first image.
+# The results are the same with or without a workspace. The regions of
+# interest don't use the workspace. Please refer to the Workspace class.
+#
+# This function outputs maxima_idx, which is list of tuples representing
+# the x and y co-ordinates of the center of the blobs. This function also
+# outputs maxima_layer_num, which is a 1D array that contains the layer
+# number in which each maximum is detected. For example, if the number
+# of desired octaves is 3 and the number of DoG layers is 4, then a
+# maximum detected in the second layer in the third octave will have
+# maxima_layer_num = 1 + 8 = 9.
+
+# import NumPy library
+
+import numpy as np
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import OpenCV library
+
+cv = lazy_import('cv2')
+
+# import the get_ss_octave() function
+
+from .get_ss_octave import get_ss_octave
+
+# import the get_DoG_squared() function
+
+from .get_DoG_squared import get_DoG_squared
+
+# import the get_maxima_loc() function
+
+from .get_maxima_loc import get_maxima_loc
+
+# import the get_blob_array() function
+
+from .get_blob_array import get_blob_array
+
+# import the get_span() function
+
+from .get_span import get_span
+
+# import the get_maxima_rolling() function
+
+from .get_maxima_rolling import get_maxima_rolling
+
+# import the get_thread_pool() function
+
+from .get_thread_pool import get_thread_pool
+
+# import the get_blob_loc_roi() function
+
+from .get_blob_loc_roi import get_blob_loc_roi
+
+# import the get_array() function
+
+from .conv_FFT_multi import get_array
+
+def get_blob_loc(input_img,oct_num=3,DoG_layer_num=4,sigma=1.6,
+                 k=np.sqrt(2),conv_engine='auto',ss_mode='direct',
+                 fft_backend='fftpack',workers=1,dtype=np.float64,
+                 nms_engine='vectorized',thresh=None,out_format='tuples',
+                 profiler=None,threads=1,pipeline='full',roi=None,
+                 nms_margin=2,workspace=None):
+    
+    if roi is not None:
+        
+        # only process the regions of interest and their surroundings
+        
+        return get_blob_loc_roi(input_img,roi,oct_num,DoG_layer_num,sigma,k,
+                                conv_engine=conv_engine,ss_mode=ss_mode,
+                                fft_backend=fft_backend,workers=workers,
+                                dtype=dtype,nms_engine=nms_engine,
+                                thresh=thresh,out_format=out_format,
+                                profiler=profiler,nms_margin=nms_margin)
+    
+    # the number of layers in each octave in scale space
+    
+    n = DoG_layer_num + 1
+    
+    # the pool of threads shared by the stages of each octave
+    
+    pool = get_thread_pool(threads) if threads > 1 else None
+    
+    with get_span(profiler,'cvtColor',shape=input_img.shape):
+        
+        # convert the input image to grayscale, unless it only has one
+        # channel
+        
+        if input_img.ndim == 3 and input_img.shape[2] > 1:
+            
+            img = cv.cvtColor(input_img,cv.COLOR_BGR2GRAY)
+        
+        else:
+            
+            img = input_img.reshape(input_img.shape[:2])
+        
+        # convert the grayscale image to the data type of the pipeline
+        
+        img = img.astype(dtype)
+    
+    # initialize lists to store results. The lists start with empty arrays,
+    # so they can always be stacked, even if no octave has any middle
+    # layer.
+    
+    maxima_idx = [np.empty((0,2),dtype=int)]
+    
+    maxima_layer_num = [np.empty(0,dtype=int)]
+    
+    maxima_response = [np.empty(0,dtype=dtype)]
+    
+    if pipeline == 'rolling':
+        
+        # compute the maxima of every octave one layer at a time, keeping
+        # only a few layers at any moment
+        
+        for (i,j,max_idx,max_response) in get_maxima_rolling(img,oct_num,
+                                              DoG_layer_num,sigma,k,
+                                              thresh=thresh,
+                                              conv_engine=conv_engine,
+                                              ss_mode=ss_mode,
+                                              fft_backend=fft_backend,
+                                              workers=workers,
+                                              profiler=profiler,
+                                              nms_engine=nms_engine,
+                                              nms_margin=nms_margin,
+                                              workspace=workspace):
+            
+            # scale indices to account for down-sampling and shift layer
+            # number to account for different octaves
+            
+            maxima_idx.append(max_idx*np.power(2,i))
+            
+            maxima_layer_num.append(np.full(len(max_idx),
+                                            j + DoG_layer_num*i))
+            
+            maxima_response.append(max_response)
+    
+    elif pipeline != 'full':
+        
+        raise ValueError("unknown pipeline '%s'" % pipeline)
+    
+    else:
+        
+        for i in range(oct_num): # loop through each octave
+        
+            # the spans of this octave are recorded with its octave number
+            
+            if profiler is not None:
+                
+                profiler.set_tags(octave=i)
+            
+            # compute octave in scale space
+            
+            with get_span(profiler,'get_ss_octave',shape=img.shape):
+                
+                scale_space = get_ss_octave(img,n,sigma_init=sigma,k_init=k,
+                                            conv_engine=conv_engine,
+                                            ss_mode=ss_mode,
+                                            fft_backend=fft_backend,
+                                            workers=workers,profiler=profiler,
+                                            pool=pool,workspace=workspace)
+            
+            # compute the squared difference of Gaussians from this octave
+            
+            with get_span(profiler,'get_DoG_squared'):
+                
+                DoG_out = get_array(workspace,'DoG',(n-1,) + img.shape,
+                                    scale_space[0].dtype)
+                
+                DoG_squared = get_DoG_squared(scale_space,pool=pool,
+                                              out=DoG_out)
+            
+            # compute the indices of the maxima of the squared difference of
+            # Gaussians, and the scale space layers in which they appear
+            
+            with get_span(profiler,'get_maxima_loc') as args:
+                
+                (max_idx,max_layer_num) = get_maxima_loc(DoG_squared,
+                                                         thresh=thresh,
+                                                         engine=nms_engine,
+                                                         profiler=profiler,
+                                                         pool=pool,
+                                                         coarse_margin=
+                                                         nms_margin)
+                
+                args['maxima'] = len(max_layer_num)
+            
+            max_idx = max_idx.reshape((-1,2))
+            
+            if out_format == 'struct':
+                
+                # store the values of the squared DoG at the maxima
+                
+                max_response = np.empty(len(max_layer_num))
+                
+                for j in np.unique(max_layer_num):
+                    
+                    in_layer = max_layer_num == j
+                    
+                    max_response[in_layer] = DoG_squared[j][max_idx[in_layer,0],
+                                                            max_idx[in_layer,1]]
+                
+                maxima_response.append(max_response)
+            
+            # scale indices to account for down-sampling
+            
+            max_idx = max_idx*np.power(2,i)
+            
+            # shift layer number where maxima appear to account for different
+            # octaves
+            
+            max_layer_num = max_layer_num + DoG_layer_num*i
+            
+            # store results in lists
+            
+            maxima_idx.append(max_idx)
+            
+            maxima_layer_num.append(max_layer_num)
+            
+            # down-sample the third image in scale-space and store it
+            
+            with get_span(profiler,'downsample'):
+                
+                dsby2 = scale_space[2]
+                
+                img = dsby2[::2,::2]
+        
+    if profiler is not None:
+        
+        profiler.set_tags()
+    
+    if out_format == 'struct':
+        
+        # store the blobs in a structured array without converting them to
+        # Python objects
+        
+        return get_blob_array(np.vstack(maxima_idx),
+                              np.hstack(maxima_layer_num),
+                              np.hstack(maxima_response),
+                              DoG_layer_num,sigma,k)
+    
+    elif out_format != 'tuples':
+        
+        raise ValueError("unknown out_format '%s'" % out_format)
+    
+    # convert the indices of the maxima to a list of (x,y) tuple
+    # coordinates to use to draw circles on the original image
+    
+    maxima_idx = np.vstack(maxima_idx).tolist()
+    
+    maxima_idx = [tuple(i[::-1]) for i in maxima_idx]
+    
+    # concatenate the list of layer numbers to form a 1D array
+    
+    maxima_layer_num = np.hstack(maxima_layer_num)
+    
+    return (maxima_idx,maxima_layer_num)
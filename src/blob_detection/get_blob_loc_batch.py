@@ -0,0 +1,193 @@
+# This function computes the indices of the blobs in many images using a
+# pool of worker processes. The inputs to this function are:
+#
+# inputs - An iterable of images or image file names. Images are NumPy
+# arrays in the same format as the input of get_blob_loc. File names are
+# read by the worker processes using read_image, so only the file names
+# are sent to the workers. The iterable is consumed lazily, so it can be a
+# generator over a very large number of images.
+#
+# processes - The number of worker processes. If processes = None, the
+# number of CPUs is used.
+#
+# max_in_flight - The maximum number of images that are sent to the
+# workers but whose results haven't been returned yet. This bounds the
+# memory used by the pending images and results. If max_in_flight = None,
+# twice the number of worker processes is used.
+#
+# ordered - If True, the results are returned in the same order as the
+# inputs. Otherwise, the results are returned as soon as they complete.
+#
+# on_error - What to do if an image fails. If on_error = 'report', the
+# exception is returned instead of the result of the image. If
+# on_error = 'skip', the image is skipped. If on_error = 'raise', the
+# exception is raised and the remaining images are cancelled.
+#
+# cache - A BlobCache object. If it is given, each worker process reads the
+# results of the images that are in the cache instead of computing them,
+# and stores the others. The statistics of the workers are added to the
+# statistics of cache as their results are returned.
+#
+# color - If True, the image files are decoded as color images, just like
+# cv.imread(). Otherwise, they are decoded straight to grayscale, which is
+# faster but can change a few of the blobs. Please refer to the
+# read_image function.
+#
+# **kwargs - The remaining parameters are passed to get_blob_loc.
+#
+# This function is a generator that yields a tuple (i,result,error) for
+# every image, where i is the position of the image in inputs, result is
+# the output of get_blob_loc, (maxima_idx,maxima_layer_num), and error is
+# None, or the exception raised by the image while result is None. For
+# example:
+#
+# for (i,result,error) in get_blob_loc_batch(filenames,processes=8):
+#     ...
+#
+# The worker processes are kept for the whole batch, so the Gaussian
+# kernels and FFT plans that are stored by each process are reused by all
+# of the images that the process handles, as well as the arrays of the
+# Workspace of each process. Each worker runs its FFTs on a
+# single thread by default, so the throughput scales with the number of
+# processes.
+
+# import the os library
+
+import os
+
+# import the collections library
+
+import collections
+
+# import the futures library
+
+from concurrent import futures
+
+# import the read_image function
+
+from .load_images import read_image
+
+# import the get_blob_loc function
+
+from .get_blob_loc import get_blob_loc
+
+# import the get_workspace function
+
+from .Workspace import get_workspace
+
+def get_blob_loc_batch(inputs,processes=None,max_in_flight=None,ordered=True,
+                       on_error='report',cache=None,color=True,**kwargs):
+    
+    if on_error not in ('report','skip','raise'):
+        
+        raise ValueError("unknown on_error '%s'" % on_error)
+    
+    if processes is None:
+        
+        processes = os.cpu_count()
+    
+    if max_in_flight is None:
+        
+        max_in_flight = 2*processes
+    
+    # iterator over the numbered inputs
+    
+    inputs = iter(enumerate(inputs))
+    
+    with futures.ProcessPoolExecutor(max_workers=processes) as pool:
+        
+        # queue of the pending images in the same order as the inputs
+        
+        pending = collections.deque()
+        
+        try:
+            
+            while True:
+                
+                # send images to the workers until the limit is reached
+                
+                while len(pending) < max_in_flight:
+                    
+                    item = next(inputs,None)
+                    
+                    if item is None:
+                        
+                        break
+                    
+                    future = pool.submit(get_blob_loc_task,item[1],kwargs,
+                                         cache,color)
+                    
+                    pending.append((item[0],future))
+                
+                if not pending:
+                    
+                    break
+                
+                # wait for the first pending image if the results are
+                # ordered, or for any pending image otherwise
+                
+                if ordered:
+                    
+                    (i,future) = pending.popleft()
+                    
+                    futures.wait([future])
+                
+                else:
+                    
+                    (done,_) = futures.wait([f for (_,f) in pending],
+                                           return_when=futures.FIRST_COMPLETED)
+                    
+                    (i,future) = next(p for p in pending if p[1] in done)
+                    
+                    pending.remove((i,future))
+                
+                error = future.exception()
+                
+                if error is None:
+                    
+                    (result,stats) = future.result()
+                    
+                    if cache is not None:
+                        
+                        cache.add_stats(stats)
+                    
+                    yield (i,result,None)
+                
+                elif on_error == 'report':
+                    
+                    yield (i,None,error)
+                
+                elif on_error == 'raise':
+                    
+                    raise error
+        
+        finally:
+            
+            # cancel the images that haven't started yet if the generator
+            # is closed early or an exception is raised
+            
+            for (_,future) in pending:
+                
+                future.cancel()
+
+# This function is run by the worker processes. It reads the image if a
+# file name is given, and then computes the indices of its blobs, or reads
+# them from the cache. It returns the result and the statistics of the
+# cache.
+
+def get_blob_loc_task(img,kwargs,cache=None,color=True):
+    
+    if isinstance(img,(str,os.PathLike)):
+        
+        img = read_image(img,color=color)
+    
+    # the images of the process are computed in the same workspace, unless
+    # another one is given
+    
+    kwargs = dict({'workspace': get_workspace()},**kwargs)
+    
+    if cache is None:
+        
+        return (get_blob_loc(img,**kwargs),None)
+    
+    return (cache.get_blob_loc(img,**kwargs),cache.stats)
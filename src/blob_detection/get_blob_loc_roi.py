@@ -0,0 +1,427 @@
+# This function computes the indices of the blobs inside regions of
+# interest of an image, without processing the rest of the image. The
+# inputs to the function are the same as the inputs of get_blob_loc, in
+# addition to:
+#
+# roi - The regions of interest. It is either a list of (x,y,w,h)
+# rectangles, where (x,y) is the column and row of the top-left corner of
+# each rectangle and w and h are its width and height, just like the
+# rectangles of OpenCV, or a boolean mask with the same height and width
+# as the image.
+#
+# Only the blobs whose centers are inside the regions of interest are
+# returned. The mask of each octave is down-sampled in the same way as the
+# image, by taking every second row and column of the mask of the previous
+# octave, so thin regions can disappear in the later octaves.
+#
+# The mask is split into boxes around its connected regions, where the
+# regions that are closer to each other than the halo computed by
+# get_tile_halo are put in the same box, since their halos would mostly
+# overlap. Each box is read with its halo and processed by get_tile_DoG,
+# just like the tiles of get_blob_loc_tiled, so its layers are the same as
+# the layers of the whole image inside the box, and the work is
+# proportional to the area of the boxes and their halos instead of the
+# area of the image.
+#
+# The threshold values of each octave are computed by the thresholding
+# strategy from the histograms of the pixels inside the mask of all of the
+# boxes together, so they depend on the regions of interest. If the
+# regions of interest cover the whole image, the blobs are the same as the
+# blobs of get_blob_loc, except for the subsample input of the strategy,
+# which is applied to each box separately. The squared DoG layers of the
+# boxes are stored until the threshold values are computed, unless the
+# threshold values are given or fixed. A list of threshold values contains
+# the values of the middle layers, which are used by every octave, just
+# like get_blob_loc.
+#
+# The outputs of this function are the same as the outputs of
+# get_blob_loc, in the same order.
+
+# import NumPy library
+
+import numpy as np
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import OpenCV library
+
+cv = lazy_import('cv2')
+
+# import the get_thresh_strategy() function
+
+from .ThreshStrategy import get_thresh_strategy
+
+# import the get_maxima_loc() function
+
+from .get_maxima_loc import get_maxima_loc
+
+# import the get_blob_array() function
+
+from .get_blob_array import get_blob_array
+
+# import the get_tile_DoG() function
+
+from .get_blob_loc_tiled import get_tile_DoG
+
+# import the get_tile_halo() function
+
+from .get_tile_halo import get_tile_halo
+
+# import the get_span() function
+
+from .get_span import get_span
+
+def get_blob_loc_roi(input_img,roi,oct_num=3,DoG_layer_num=4,sigma=1.6,
+                     k=np.sqrt(2),conv_engine='auto',ss_mode='direct',
+                     fft_backend='fftpack',workers=1,dtype=np.float64,
+                     nms_engine='vectorized',thresh=None,
+                     out_format='tuples',profiler=None,nms_margin=2):
+    
+    if out_format not in ('tuples','struct'):
+        
+        raise ValueError("unknown out_format '%s'" % out_format)
+    
+    # the number of layers in each octave in scale space
+    
+    n = DoG_layer_num + 1
+    
+    # the boxes are aligned to the down-sampling factor of the last octave
+    
+    align = 2**(oct_num-1)
+    
+    halo = get_tile_halo(oct_num,n,sigma,k,ss_mode=ss_mode)
+    
+    with get_span(profiler,'roi_boxes') as args:
+        
+        mask = get_roi_mask(roi,input_img.shape[:2])
+        
+        boxes = get_roi_boxes(mask,align,halo)
+        
+        args['boxes'] = len(boxes)
+    
+    # the mask of each octave
+    
+    masks = [mask]
+    
+    for i in range(1,oct_num):
+        
+        masks.append(masks[-1][::2,::2])
+    
+    # parameters used to compute each octave in scale space
+    
+    ss_params = dict(conv_engine=conv_engine,ss_mode=ss_mode,
+                     fft_backend=fft_backend,workers=workers)
+    
+    # the threshold values of the middle layers of each octave, which are
+    # computed below unless they are given or fixed
+    
+    oct_thresh = None
+    
+    if isinstance(thresh,(list,tuple,np.ndarray)):
+        
+        oct_thresh = [thresh]*oct_num
+    
+    else:
+        
+        strategy = get_thresh_strategy(thresh)
+        
+        if strategy.method == 'fixed':
+            
+            oct_thresh = [[strategy.value]*(DoG_layer_num-2)]*oct_num
+    
+    # the values of the middle layers inside the mask of each octave, which
+    # are used to compute the threshold values
+    
+    values = [[[] for _ in range(DoG_layer_num-2)] for _ in range(oct_num)]
+    
+    # the squared DoG layers of the boxes and their masks, cropped to the
+    # boxes with a border of one pixel for non-maximum suppression
+    
+    crops = []
+    
+    # initialize lists to store results
+    
+    maxima_idx = []
+    
+    maxima_layer_num = []
+    
+    maxima_response = []
+    
+    for (r0,c0,r1,c1) in boxes:
+        
+        for (i,DoG_squared,core,offset) in get_tile_DoG(input_img,r0,c0,
+                                            (r1-r0,c1-c0),halo,oct_num,n,
+                                            sigma,k,dtype,ss_params):
+            
+            if profiler is not None:
+                
+                profiler.set_tags(octave=i)
+            
+            # the mask of the box in this octave
+            
+            box_mask = np.zeros(DoG_squared[0].shape,dtype=bool)
+            
+            box_mask[core] = masks[i][offset[0]+core[0].start:
+                                      offset[0]+core[0].stop,
+                                      offset[1]+core[1].start:
+                                      offset[1]+core[1].stop]
+            
+            # crop the layers to the box with a border of one pixel, which
+            # is enough to compare the pixels of the box with their
+            # neighbors
+            
+            crop = (slice(max(core[0].start-1,0),core[0].stop+1),
+                    slice(max(core[1].start-1,0),core[1].stop+1))
+            
+            DoG_squared = [layer[crop] for layer in DoG_squared]
+            
+            box_mask = box_mask[crop]
+            
+            crop_offset = offset + [crop[0].start,crop[1].start]
+            
+            if oct_thresh is not None:
+                
+                # the threshold values are known, so the maxima of the box
+                # are computed right away
+                
+                maxima = get_box_maxima(DoG_squared,box_mask,crop_offset,i,
+                                        oct_thresh[i],DoG_layer_num,
+                                        nms_engine,nms_margin,profiler)
+                
+                maxima_idx.append(maxima[0])
+                
+                maxima_layer_num.append(maxima[1])
+                
+                maxima_response.append(maxima[2])
+                
+                continue
+            
+            # store the values of the middle layers inside the mask,
+            # subsampled
+            
+            s = strategy.subsample
+            
+            for j in range(1,DoG_layer_num-1):
+                
+                values[i][j-1].append(DoG_squared[j][::s,::s][
+                                      box_mask[::s,::s]])
+            
+            # store copies of the cropped layers, so the layers of the box
+            # can be freed
+            
+            crops.append((i,[layer.copy() for layer in DoG_squared],
+                          box_mask,crop_offset))
+    
+    if oct_thresh is None:
+        
+        # compute the threshold values of each octave from the values
+        # inside the mask of all of the boxes
+        
+        with get_span(profiler,'threshold',layers=oct_num*(DoG_layer_num-2)):
+            
+            oct_thresh = []
+            
+            for i in range(oct_num):
+                
+                layers = [np.concatenate(v) if v else np.empty(0)
+                          for v in values[i]]
+                
+                if min([layer.size for layer in layers]) == 0:
+                    
+                    # the mask is empty in this octave, so there are no
+                    # maxima
+                    
+                    oct_thresh.append([np.inf]*(DoG_layer_num-2))
+                    
+                    continue
+                
+                hists = strategy.get_layers_hists(layers)
+                
+                oct_thresh.append(strategy.get_hists_thresh(hists,
+                                                            DoG_layer_num-2))
+        
+        values = None
+        
+        for (i,DoG_squared,box_mask,crop_offset) in crops:
+            
+            if profiler is not None:
+                
+                profiler.set_tags(octave=i)
+            
+            maxima = get_box_maxima(DoG_squared,box_mask,crop_offset,i,
+                                    oct_thresh[i],DoG_layer_num,nms_engine,
+                                    nms_margin,profiler)
+            
+            maxima_idx.append(maxima[0])
+            
+            maxima_layer_num.append(maxima[1])
+            
+            maxima_response.append(maxima[2])
+    
+    if profiler is not None:
+        
+        profiler.set_tags()
+    
+    maxima_idx = np.vstack([np.empty((0,2),dtype=int)] + maxima_idx)
+    
+    maxima_layer_num = np.hstack([np.empty(0,dtype=int)] + maxima_layer_num)
+    
+    maxima_response = np.hstack([np.empty(0)] + maxima_response)
+    
+    # sort the maxima by their layer number and then by their indices, which
+    # is the same order as get_blob_loc
+    
+    order = np.lexsort((maxima_idx[:,1],maxima_idx[:,0],maxima_layer_num))
+    
+    maxima_idx = maxima_idx[order]
+    
+    maxima_layer_num = maxima_layer_num[order]
+    
+    if out_format == 'struct':
+        
+        return get_blob_array(maxima_idx,maxima_layer_num,
+                              maxima_response[order],DoG_layer_num,sigma,k)
+    
+    # convert the indices of the maxima to a list of (x,y) tuple
+    # coordinates to use to draw circles on the original image
+    
+    maxima_idx = [tuple(i[::-1]) for i in maxima_idx.tolist()]
+    
+    return (maxima_idx,maxima_layer_num)
+
+# This function computes the maxima inside the mask of the cropped layers
+# of a box in octave i. It returns their indices in the original image,
+# their layer numbers and the values of the squared DoG at the maxima.
+
+def get_box_maxima(DoG_squared,box_mask,crop_offset,i,thresh,DoG_layer_num,
+                   nms_engine,nms_margin,profiler):
+    
+    with get_span(profiler,'get_maxima_loc',shape=box_mask.shape) as args:
+        
+        (max_idx,max_layer_num) = get_maxima_loc(DoG_squared,thresh=thresh,
+                                                 engine=nms_engine,
+                                                 profiler=profiler,
+                                                 mask=box_mask,
+                                                 coarse_margin=nms_margin)
+        
+        args['maxima'] = len(max_layer_num)
+    
+    max_idx = max_idx.reshape((-1,2)).astype(int)
+    
+    max_layer_num = max_layer_num.astype(int)
+    
+    # the values of the squared DoG at the maxima
+    
+    max_response = np.empty(len(max_layer_num))
+    
+    for j in np.unique(max_layer_num):
+        
+        in_layer = max_layer_num == j
+        
+        max_response[in_layer] = DoG_squared[j][max_idx[in_layer,0],
+                                                max_idx[in_layer,1]]
+    
+    # shift the indices by the position of the crop and scale them to
+    # account for down-sampling, and shift the layer numbers to account for
+    # different octaves
+    
+    max_idx = (max_idx + crop_offset)*np.power(2,i)
+    
+    return (max_idx,max_layer_num + DoG_layer_num*i,max_response)
+
+# This function returns the boolean mask of the regions of interest roi in
+# an image of the given shape, where roi is either a list of (x,y,w,h)
+# rectangles or a boolean mask.
+
+def get_roi_mask(roi,shape):
+    
+    if isinstance(roi,np.ndarray) and roi.ndim == 2:
+        
+        if roi.shape != tuple(shape):
+            
+            raise ValueError('the shape of the mask %s is not the shape of '
+                             'the image %s' % (roi.shape,tuple(shape)))
+        
+        return roi.astype(bool,copy=False)
+    
+    mask = np.zeros(shape,dtype=bool)
+    
+    for (x,y,w,h) in roi:
+        
+        mask[max(y,0):max(y+h,0),max(x,0):max(x+w,0)] = True
+    
+    return mask
+
+# This function returns the (r0,c0,r1,c1) boxes that cover the mask, whose
+# corners are multiples of align. The connected regions of the mask that
+# are closer to each other than the halo are covered by the same box, and
+# the boxes that overlap are merged, so every pixel is in a single box.
+
+def get_roi_boxes(mask,align,halo):
+    
+    # connect the regions that are closer than the halo by dilating the mask
+    
+    kernel = np.ones((halo + 1,halo + 1),dtype=np.uint8)
+    
+    dilated = cv.dilate(mask.astype(np.uint8),kernel)
+    
+    (_,_,stats,_) = cv.connectedComponentsWithStats(dilated,connectivity=8)
+    
+    boxes = []
+    
+    for (x,y,w,h,_) in stats[1:]:
+        
+        # the bounding box of the pixels of the mask inside the dilated
+        # region
+        
+        rows = np.flatnonzero(mask[y:y+h,x:x+w].any(axis=1))
+        
+        cols = np.flatnonzero(mask[y:y+h,x:x+w].any(axis=0))
+        
+        if not len(rows):
+            
+            continue
+        
+        r0 = (y + rows[0])//align*align
+        
+        c0 = (x + cols[0])//align*align
+        
+        r1 = min(-(-(y + rows[-1] + 1)//align)*align,mask.shape[0])
+        
+        c1 = min(-(-(x + cols[-1] + 1)//align)*align,mask.shape[1])
+        
+        boxes.append((r0,c0,r1,c1))
+    
+    # merge the boxes that overlap until none of them do
+    
+    merged = True
+    
+    while merged:
+        
+        merged = False
+        
+        for a in range(len(boxes)):
+            
+            for b in range(a+1,len(boxes)):
+                
+                (A,B) = (boxes[a],boxes[b])
+                
+                if (A[0] < B[2] and B[0] < A[2] and
+                    A[1] < B[3] and B[1] < A[3]):
+                    
+                    boxes[a] = (min(A[0],B[0]),min(A[1],B[1]),
+                                max(A[2],B[2]),max(A[3],B[3]))
+                    
+                    del boxes[b]
+                    
+                    merged = True
+                    
+                    break
+            
+            if merged:
+                
+                break
+    
+    return sorted(boxes)
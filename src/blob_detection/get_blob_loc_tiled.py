@@ -0,0 +1,331 @@
+# This function computes the indices of the blobs in an image by splitting
+# the image into tiles, so that very large images can be processed with a
+# bounded amount of memory. The inputs to the function are the same as the
+# inputs of get_blob_loc, in addition to:
+#
+# input_img - The main input image where blobs are detected. It can be a
+# color image in the same format as the input of get_blob_loc, or a
+# grayscale image. The image is only read one tile at a time, so it can
+# be a numpy.memmap to avoid loading the whole image into memory.
+#
+# mem_budget - The maximum number of bytes used to process each tile. The
+# size of the tiles is computed from mem_budget by get_tile_size.
+#
+# tile_size - The width and height of each tile, without its halo. If
+# tile_size = None, it is computed from mem_budget. Otherwise, it is
+# rounded up to a multiple of 2^(oct_num-1).
+#
+# thresh - A list, a tuple or an array of the threshold values of the
+# middle layers, which are used by every octave, just like get_blob_loc.
+# Otherwise, thresh is the thresholding strategy used to compute the
+# threshold values on the whole image, just like get_blob_loc. This
+# requires two additional passes over the tiles, where the first pass
+# finds the range of each layer and the second pass computes the histogram
+# of each layer over that range. The subsample input of the strategy is
+# ignored, and a fixed threshold value doesn't need the additional passes.
+#
+# Each tile is read with a halo around it whose width is computed by
+# get_tile_halo, so the layers of the tile are the same as the layers of
+# the whole image inside the tile. Each blob is only kept by the tile that
+# contains it, so there are no duplicate blobs at the seams between tiles.
+# The outputs of this function are the same as the outputs of get_blob_loc,
+# in the same order.
+
+# import NumPy library
+
+import numpy as np
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import OpenCV library
+
+cv = lazy_import('cv2')
+
+# import the get_thresh_strategy() function
+
+from .ThreshStrategy import get_thresh_strategy
+
+# import the get_ss_octave() function
+
+from .get_ss_octave import get_ss_octave
+
+# import the get_DoG_squared() function
+
+from .get_DoG_squared import get_DoG_squared
+
+# import the get_maxima_loc() function
+
+from .get_maxima_loc import get_maxima_loc
+
+# import the get_tile_halo() function
+
+from .get_tile_halo import get_tile_halo
+
+# import the get_tile_size() function
+
+from .get_tile_size import get_tile_size
+
+def get_blob_loc_tiled(input_img,oct_num=3,DoG_layer_num=4,sigma=1.6,
+                       k=np.sqrt(2),mem_budget=2**30,tile_size=None,
+                       thresh=None,conv_engine='auto',ss_mode='direct',
+                       fft_backend='fftpack',workers=1,dtype=np.float64,
+                       nms_engine='vectorized'):
+    
+    # the number of layers in each octave in scale space
+    
+    n = DoG_layer_num + 1
+    
+    # the tiles and their halos are aligned to the down-sampling factor of
+    # the last octave
+    
+    align = 2**(oct_num-1)
+    
+    halo = get_tile_halo(oct_num,n,sigma,k,ss_mode=ss_mode)
+    
+    if tile_size is None:
+        
+        tile_size = get_tile_size(mem_budget,halo,n,np.dtype(dtype).itemsize,
+                                  align)
+    
+    else:
+        
+        tile_size = int(np.ceil(tile_size/align))*align
+    
+    # the top-left corners of the tiles
+    
+    tiles = [(r0,c0) for r0 in range(0,input_img.shape[0],tile_size)
+                     for c0 in range(0,input_img.shape[1],tile_size)]
+    
+    # parameters used to compute each octave in scale space
+    
+    ss_params = dict(conv_engine=conv_engine,ss_mode=ss_mode,
+                     fft_backend=fft_backend,workers=workers)
+    
+    # the threshold values of the middle layers of each octave. The values
+    # of the middle layers can be given as a list, a tuple or an array,
+    # which is used by every octave.
+    
+    given = isinstance(thresh,(list,tuple,np.ndarray))
+    
+    if not given:
+        
+        strategy = get_thresh_strategy(thresh)
+    
+    if given:
+        
+        oct_thresh = [thresh]*oct_num
+    
+    elif strategy.method == 'fixed':
+        
+        oct_thresh = [[strategy.value]*(DoG_layer_num-2)]*oct_num
+    
+    else:
+        
+        # find the range of the middle layers of each octave over the
+        # whole image
+        
+        layer_min = np.full((oct_num,DoG_layer_num-2),np.inf)
+        
+        layer_max = np.full((oct_num,DoG_layer_num-2),-np.inf)
+        
+        for (r0,c0) in tiles:
+            
+            for (i,DoG_squared,core,offset) in get_tile_DoG(input_img,r0,c0,
+                                                tile_size,halo,oct_num,n,
+                                                sigma,k,dtype,ss_params):
+                
+                for j in range(1,DoG_layer_num-1):
+                    
+                    layer = DoG_squared[j][core]
+                    
+                    if layer.size:
+                        
+                        layer_min[i,j-1] = min(layer_min[i,j-1],layer.min())
+                        
+                        layer_max[i,j-1] = max(layer_max[i,j-1],layer.max())
+        
+        # the histograms of all of the layers of an octave use the same range
+        # if there is a single threshold value per octave
+        
+        if strategy.per_octave:
+            
+            layer_min[:] = layer_min.min(axis=1,keepdims=True)
+            
+            layer_max[:] = layer_max.max(axis=1,keepdims=True)
+        
+        # the histograms use 256 bins over the range of each layer, just
+        # like flt.threshold_yen(). If a layer is constant, its range is
+        # widened by 0.5 on each side, just like np.histogram().
+        
+        is_constant = layer_min == layer_max
+        
+        layer_min[is_constant] -= 0.5
+        
+        layer_max[is_constant] += 0.5
+        
+        bins = strategy.bins
+        
+        counts = np.zeros((oct_num,DoG_layer_num-2,bins),dtype=np.int64)
+        
+        for (r0,c0) in tiles:
+            
+            for (i,DoG_squared,core,offset) in get_tile_DoG(input_img,r0,c0,
+                                                tile_size,halo,oct_num,n,
+                                                sigma,k,dtype,ss_params):
+                
+                for j in range(1,DoG_layer_num-1):
+                    
+                    counts[i,j-1] += np.histogram(DoG_squared[j][core],
+                                                  bins=bins,
+                                                  range=(layer_min[i,j-1],
+                                                         layer_max[i,j-1]))[0]
+        
+        # compute the threshold value of each layer from its histogram
+        
+        oct_thresh = []
+        
+        for i in range(oct_num):
+            
+            hists = []
+            
+            for j in range(DoG_layer_num-2):
+                
+                bin_edges = np.linspace(layer_min[i,j],layer_max[i,j],
+                                        bins+1)
+                
+                bin_centers = (bin_edges[:-1] + bin_edges[1:])/2
+                
+                hists.append((counts[i,j],bin_centers))
+            
+            if strategy.per_octave:
+                
+                hists = [(counts[i].sum(axis=0),hists[0][1])]
+            
+            oct_thresh.append(strategy.get_hists_thresh(hists,
+                                                        DoG_layer_num-2))
+    
+    # initialize lists to store results
+    
+    maxima_idx = []
+    
+    maxima_layer_num = []
+    
+    for (r0,c0) in tiles:
+        
+        for (i,DoG_squared,core,offset) in get_tile_DoG(input_img,r0,c0,
+                                            tile_size,halo,oct_num,n,sigma,k,
+                                            dtype,ss_params):
+            
+            (max_idx,max_layer_num) = get_maxima_loc(DoG_squared,
+                                                     thresh=oct_thresh[i],
+                                                     engine=nms_engine)
+            
+            max_idx = max_idx.reshape((-1,2))
+            
+            # only keep the maxima inside the tile itself, and not in its
+            # halo
+            
+            in_core = ((max_idx[:,0] >= core[0].start) &
+                       (max_idx[:,0] < core[0].stop) &
+                       (max_idx[:,1] >= core[1].start) &
+                       (max_idx[:,1] < core[1].stop))
+            
+            # shift the indices by the position of the tile and scale them
+            # to account for down-sampling
+            
+            max_idx = (max_idx[in_core] + offset)*np.power(2,i)
+            
+            # shift layer number where maxima appear to account for
+            # different octaves
+            
+            max_layer_num = max_layer_num[in_core] + DoG_layer_num*i
+            
+            maxima_idx.append(max_idx)
+            
+            maxima_layer_num.append(max_layer_num)
+    
+    maxima_idx = np.vstack(maxima_idx)
+    
+    maxima_layer_num = np.hstack(maxima_layer_num)
+    
+    # sort the maxima by their layer number and then by their indices, which
+    # is the same order as get_blob_loc
+    
+    order = np.lexsort((maxima_idx[:,1],maxima_idx[:,0],maxima_layer_num))
+    
+    maxima_idx = maxima_idx[order]
+    
+    maxima_layer_num = maxima_layer_num[order]
+    
+    # convert the indices of the maxima to a list of (x,y) tuple
+    # coordinates to use to draw circles on the original image
+    
+    maxima_idx = [tuple(i[::-1]) for i in maxima_idx.tolist()]
+    
+    return (maxima_idx,maxima_layer_num)
+
+# This function is a generator that reads the tile whose top-left corner is
+# at row r0 and column c0 with its halo, and computes the squared DoG
+# layers of each of its octaves. For each octave i, it yields the octave
+# number, the squared DoG layers, the slices of the layers that are inside
+# the tile itself, and the offset of the top-left corner of the layers in
+# the whole image at the scale of the octave. The tile_size input can also
+# be a tuple of the number of rows and columns of the tile.
+
+def get_tile_DoG(input_img,r0,c0,tile_size,halo,oct_num,n,sigma,k,dtype,
+                 ss_params):
+    
+    if np.isscalar(tile_size):
+        
+        tile_size = (tile_size,tile_size)
+    
+    # the tile and its halo, clipped to the borders of the image
+    
+    r1 = min(r0 + tile_size[0],input_img.shape[0])
+    
+    c1 = min(c0 + tile_size[1],input_img.shape[1])
+    
+    hr0 = max(r0 - halo,0)
+    
+    hc0 = max(c0 - halo,0)
+    
+    hr1 = min(r1 + halo,input_img.shape[0])
+    
+    hc1 = min(c1 + halo,input_img.shape[1])
+    
+    # read the tile and convert it to grayscale
+    
+    img = np.ascontiguousarray(input_img[hr0:hr1,hc0:hc1])
+    
+    if img.ndim == 3:
+        
+        img = cv.cvtColor(img,cv.COLOR_BGR2GRAY)
+    
+    img = img.astype(dtype)
+    
+    for i in range(oct_num): # loop through each octave
+        
+        scale = 2**i
+        
+        # compute the squared difference of Gaussians of this octave
+        
+        scale_space = get_ss_octave(img,n,sigma_init=sigma,k_init=k,
+                                    **ss_params)
+        
+        DoG_squared = get_DoG_squared(scale_space)
+        
+        # the pixels of this octave that are inside the tile. The corners of
+        # the tile and its halo are multiples of the down-sampling factor.
+        
+        core = (slice((r0 - hr0)//scale,-(-r1//scale) - hr0//scale),
+                slice((c0 - hc0)//scale,-(-c1//scale) - hc0//scale))
+        
+        yield (i,DoG_squared,core,np.array([hr0//scale,hc0//scale]))
+        
+        # down-sample the third image in scale-space and store it
+        
+        dsby2 = scale_space[2]
+        
+        img = dsby2[::2,::2]
@@ -0,0 +1,50 @@
+# This function is a simple cost model that decides whether a Gaussian
+# layer should be computed using separable spatial convolution or FFT
+# convolution. The inputs to this function are:
+#
+# img_shape - The shape of the image to be filtered
+#
+# m - The length of the 1D Gaussian kernel
+#
+# spatial_cost - The approximate cost, in nanoseconds, of a single
+# multiplication of the separable spatial convolution for one pixel
+#
+# fft_cost - The approximate cost, in nanoseconds, of the forward and
+# inverse FFTs of a layer per P*Q*log2(P*Q), where P x Q is the size of the
+# padded arrays
+#
+# The default costs were measured with SciPy on a single core. The
+# separable convolution requires 2m multiplications per pixel, while the
+# FFT convolution requires a forward FFT of the kernel and an inverse FFT
+# for every layer. The image itself is only transformed once per octave
+# by conv_FFT_multi, so its cost is not included.
+#
+# This function returns 'spatial' or 'fft'.
+
+# import NumPy library
+
+import numpy as np
+
+def get_conv_engine(img_shape,m,spatial_cost=2.0,fft_cost=16.0):
+    
+    # size of the padded arrays used by the FFT convolution
+    
+    P = img_shape[0] + m - 1
+    
+    Q = img_shape[1] + m - 1
+    
+    # estimated cost of each type of convolution
+    
+    spatial = spatial_cost*2*m*img_shape[0]*img_shape[1]
+    
+    fft = fft_cost*P*Q*np.log2(P*Q)
+    
+    if spatial <= fft:
+        
+        conv_engine = 'spatial'
+    
+    else:
+        
+        conv_engine = 'fft'
+    
+    return conv_engine
@@ -0,0 +1,27 @@
+# Given a 2-element tuple representing the minimum dimensions of a padded
+# 2D array as an input, this function returns the smallest dimensions that
+# are at least as large and that can be transformed quickly by the FFT,
+# since the FFT is much slower for sizes with large prime factors. For
+# example:
+#
+# get_fast_shape((1019,1300))
+#
+# would return (1020,1300), since 1019 is a prime number.
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import the FFT library
+
+fft = lazy_import('scipy.fft')
+
+def get_fast_shape(arr_shape):
+    
+    # round each dimension up to the next size that is fast for real-input
+    # FFTs
+    
+    fast_shape = (fft.next_fast_len(int(arr_shape[0]),real=True),
+                  fft.next_fast_len(int(arr_shape[1]),real=True))
+    
+    return fast_shape
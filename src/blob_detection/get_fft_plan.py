@@ -0,0 +1,46 @@
+# This function returns an FFT_plan for the padded size arr_shape. The
+# plans are stored, so the same plan is returned every time this function
+# is called by the same thread with the same inputs, and every FFT planned
+# by FFTW is only planned once per thread. The inputs to this function are:
+#
+# arr_shape - A 2-element tuple representing the padded size of the arrays
+#
+# workers - The number of threads used to compute each FFT
+#
+# use_pyfftw - Please refer to the FFT_plan class
+#
+# The FFTs planned by FFTW own their input and output arrays, so a plan
+# can't be used by two threads at the same time. The plans are stored for
+# each thread, so every thread gets its own plans, such as the threads of
+# get_thread_pool and the threads that share a FilterBank. The wisdom of
+# FFTW is shared by the whole process, so the plans of the later threads
+# are created much faster than the first one.
+
+# import the threading library
+
+import threading
+
+# import the FFT_plan class
+
+from .FFT_plan import FFT_plan
+
+# the dictionaries that store the plans of each thread
+
+fft_plans = threading.local()
+
+def get_fft_plan(arr_shape,workers=1,use_pyfftw=False):
+    
+    plans = getattr(fft_plans,'plans',None)
+    
+    if plans is None:
+        
+        plans = fft_plans.plans = {}
+    
+    key = (tuple(arr_shape),workers,use_pyfftw)
+    
+    if key not in plans:
+        
+        plans[key] = FFT_plan(arr_shape,workers=workers,
+                              use_pyfftw=use_pyfftw)
+    
+    return plans[key]
@@ -0,0 +1,187 @@
+# This function computes the location of the maxima in a squared DoG
+# octave using a coarse-to-fine search, which is used by get_maxima_loc
+# when engine = 'coarse'. The inputs to this function are:
+#
+# ss_DoG_squared - An octave of DoG layers
+#
+# thresh - The threshold values of the middle layers of the octave, where
+# the first value is the threshold of the second layer
+#
+# factor - The down-sampling factor of the coarse layers
+#
+# margin - The number of pixels added around each candidate block when the
+# full-resolution layers are searched
+#
+# mask - A boolean array with the shape of the layers, or None. Please
+# refer to the get_maxima_loc function.
+#
+# profiler - A Profiler object or None. Please refer to the Profiler class.
+#
+# Each layer is first down-sampled by taking the maximum of every
+# factor x factor block, so the value of a block is never smaller than the
+# value of any pixel in it. The candidates are the blocks of the middle
+# layers that are greater than the threshold value of their layer and that
+# are not smaller than the same block in the layers above and below. Then
+# the pixels of each candidate block and the pixels within margin of it are
+# compared with the 26 neighbors of the full-resolution layers, just like
+# the vectorized engine, so the maxima that are found are always the same
+# as the maxima of the exhaustive search. Since only a few pixels around
+# the candidates are searched, the cost of the full-resolution search is
+# proportional to the number of candidates instead of the size of the
+# layers.
+#
+# A maximum is missed if the same block in an adjacent layer has a larger
+# value somewhere else in the block, which happens more often for larger
+# factors. The margin searches the pixels around every candidate block,
+# which recovers some of these maxima. The blocks aren't compared with the
+# blocks next to them, since the maximum of a block already covers the
+# pixels around its own maxima, and the 3x3x3 window of the coarse layers
+# would compare pixels that are up to 3*factor pixels apart, which misses
+# about a third of the maxima. Please refer to the compare_coarse script
+# for the number of maxima that are missed in the sample images.
+#
+# This function returns the indices of the maxima in the octave and their
+# DoG layer numbers, in the same order as get_maxima_loc.
+
+# import the NumPy library
+
+import numpy as np
+
+# import the get_span() function
+
+from .get_span import get_span
+
+def get_maxima_coarse(ss_DoG_squared,thresh,factor=4,margin=2,mask=None,
+                      profiler=None):
+    
+    (H,W) = ss_DoG_squared[0].shape
+    
+    with get_span(profiler,'coarse',factor=factor) as args:
+        
+        # the maximum of every block of each layer
+        
+        coarse = np.stack([get_block_max(layer,factor)
+                           for layer in ss_DoG_squared])
+        
+        # the candidate blocks of the middle layers, which are compared
+        # with the same blocks in the adjacent layers
+        
+        max_value = np.maximum(coarse[:-2],coarse[2:])
+        
+        np.maximum(max_value,coarse[1:-1],out=max_value)
+        
+        thresh = np.asarray(thresh).reshape((-1,1,1))
+        
+        is_candidate = np.logical_and(np.isclose(coarse[1:-1],max_value),
+                                      coarse[1:-1] > thresh)
+        
+        (cl,cr,cc) = np.nonzero(is_candidate)
+        
+        args['candidates'] = len(cl)
+    
+    with get_span(profiler,'refine',margin=margin) as args:
+        
+        # the pixels of every candidate block and its margin, as linear
+        # indices into the middle layers. The indices are sorted, so the
+        # pixels are in the same order as the vectorized engine, and
+        # overlapping windows are only searched once.
+        
+        offsets = np.arange(-margin,factor + margin)
+        
+        rows = (cr*factor)[:,None,None] + offsets[None,:,None]
+        
+        cols = (cc*factor)[:,None,None] + offsets[None,None,:]
+        
+        inside = (rows >= 0) & (rows < H) & (cols >= 0) & (cols < W)
+        
+        idx = (cl[:,None,None]*H + rows)*W + cols
+        
+        idx = np.unique(idx[inside])
+        
+        (layer,rest) = np.divmod(idx,H*W)
+        
+        (x,y) = np.divmod(rest,W)
+        
+        # search each middle layer separately
+        
+        is_max = np.zeros(len(idx),dtype=bool)
+        
+        bounds = np.searchsorted(layer,np.arange(len(ss_DoG_squared)-1))
+        
+        for i in range(len(ss_DoG_squared)-2):
+            
+            s = slice(bounds[i],bounds[i+1])
+            
+            is_max[s] = get_pixel_maxima(ss_DoG_squared,i+1,x[s],y[s],
+                                         thresh.ravel()[i])
+        
+        if mask is not None:
+            
+            is_max = np.logical_and(is_max,mask[x,y])
+        
+        args['pixels'] = len(idx)
+        
+        args['maxima'] = int(np.count_nonzero(is_max))
+    
+    maxima_idx = np.column_stack((x[is_max],y[is_max]))
+    
+    maxima_layer_num = layer[is_max] + 1
+    
+    return (maxima_idx,maxima_layer_num)
+
+# This function returns the maximum of every factor x factor block of a
+# layer, where the layer is padded with zeros if its shape is not a
+# multiple of factor.
+
+def get_block_max(layer,factor):
+    
+    (H,W) = layer.shape
+    
+    (Hc,Wc) = (-(-H//factor),-(-W//factor))
+    
+    if H % factor or W % factor:
+        
+        padded = np.zeros((Hc*factor,Wc*factor),dtype=layer.dtype)
+        
+        padded[:H,:W] = layer
+        
+        layer = padded
+    
+    # the maximum along the rows of each block, and then along its columns
+    
+    layer = layer.reshape((Hc,factor,Wc*factor)).max(axis=1)
+    
+    return layer.reshape((Hc,Wc,factor)).max(axis=2)
+
+# This function returns a boolean array that is True for the pixels (x,y)
+# of the middle layer i that are greater than the threshold value and that
+# are maxima of the 3x3x3 window around them, where the pixels outside of
+# the layers are zeros, just like the vectorized engine.
+
+def get_pixel_maxima(ss_DoG_squared,i,x,y,thresh):
+    
+    (H,W) = ss_DoG_squared[i].shape
+    
+    g = ss_DoG_squared[i][x,y]
+    
+    max_value = np.zeros(len(x),dtype=g.dtype)
+    
+    for dx in (-1,0,1):
+        
+        xx = x + dx
+        
+        for dy in (-1,0,1):
+            
+            yy = y + dy
+            
+            inside = (xx >= 0) & (xx < H) & (yy >= 0) & (yy < W)
+            
+            (xc,yc) = (np.clip(xx,0,H-1),np.clip(yy,0,W-1))
+            
+            for layer in ss_DoG_squared[i-1:i+2]:
+                
+                value = np.where(inside,layer[xc,yc],0)
+                
+                np.maximum(max_value,value,out=max_value)
+    
+    return np.logical_and(np.isclose(g,max_value),g > thresh)
@@ -0,0 +1,300 @@
+# This function computes the location of the maxima in a squared DoG
+# octave. More precisely, it stacks every three layers in the octave
+# and then computes a window around each pixel of the three layers
+# simultaneously to compare the pixel in the middle layer to its 26
+# neighbors in the middle layer and the adjacent layers. The input to this
+# function is:
+#
+# ss_DoG_squared - An octave of DoG layers
+#
+# thresh - The threshold values of the middle layers of the octave, where
+# the first value is the threshold of the second layer. Otherwise, thresh
+# is the thresholding strategy used to compute the threshold values from
+# the layers themselves, which is either a ThreshStrategy object, the name
+# of a thresholding method such as 'otsu', or a number used as a fixed
+# threshold value. If thresh = None, Yen's method is used on each middle
+# layer. Please refer to the ThreshStrategy class.
+#
+# engine - The non-maximum suppression engine. If engine = 'vectorized',
+# all of the DoG layers in the octave are stacked into a single 3D array
+# and the maximum of the 3x3x3 window around every pixel is computed in one
+# pass using a 3D maximum filter. If engine = 'loop', the original
+# pixel-by-pixel loop is used instead. The loop is much slower, but it is
+# kept as a reference to check the results of the vectorized engine. If
+# engine = 'coarse', the candidates are first found on layers that are
+# down-sampled by coarse_factor, and only the pixels around them are
+# compared with their neighbors. The maxima that are found are the same as
+# the vectorized engine, but a few of them can be missed. Please refer to
+# the get_maxima_coarse function.
+#
+# profiler - A Profiler object that records the time spent in the maximum
+# filter, the thresholding and the comparisons, as well as the number of
+# candidates and maxima, or None. Please refer to the Profiler class.
+#
+# pool - A pool of threads from get_thread_pool, or None. If a pool is
+# given, the vectorized engine computes the maximum of the 3x3 window
+# around every pixel of each layer on the pool, and then the maxima of each
+# middle layer on the pool. Since the maximum of a 3x3x3 window is the
+# maximum of the 3x3 windows of its three layers, the results are the same
+# as without a pool, in the same order.
+#
+# mask - A boolean array with the shape of the layers, or None. If a mask
+# is given, only the pixels inside the mask can be maxima, and the
+# threshold values computed by the thresholding strategy only use the
+# pixels inside the mask. The pixels outside of the mask are still
+# compared with their neighbors inside the mask.
+#
+# coarse_factor - The down-sampling factor of the coarse engine
+#
+# coarse_margin - The number of pixels searched around each candidate block
+# by the coarse engine. A larger margin misses fewer maxima, but searches
+# more pixels.
+#
+# This function returns the indices of the maxima in the octave in
+# maxima_idx and the DoG layer number where the maxima are located in
+# maxima_layer_num. 
+
+# import the NumPy library
+
+import numpy as np
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import NDimage library
+
+ndimage = lazy_import('scipy.ndimage')
+
+# import the get_span() function
+
+from .get_span import get_span
+
+# import the get_maxima_coarse() function
+
+from .get_maxima_coarse import get_maxima_coarse
+
+# import the get_thresh_strategy() function
+
+from .ThreshStrategy import get_thresh_strategy
+
+def get_maxima_loc(ss_DoG_squared,thresh=None,engine='vectorized',
+                   profiler=None,pool=None,mask=None,coarse_factor=4,
+                   coarse_margin=2):
+    
+    # compute the threshold value of each middle layer, unless they are
+    # given. Please refer to the loop engine below for a discussion of the
+    # different thresholding methods.
+    
+    if not isinstance(thresh,(list,tuple,np.ndarray)):
+        
+        with get_span(profiler,'threshold',layers=len(ss_DoG_squared)-2):
+            
+            thresh = get_thresh_strategy(thresh).get_thresh(ss_DoG_squared,
+                                                            mask=mask)
+    
+    if engine == 'vectorized' and pool is not None:
+        
+        # compute the maximum value in the 3x3 window around every pixel
+        # of each layer, which is padded with zeros just like the stack
+        # below
+        
+        with get_span(profiler,'maximum_filter',
+                      shape=(len(ss_DoG_squared),)+ss_DoG_squared[0].shape):
+            
+            max_2D = list(pool.map(lambda layer: ndimage.maximum_filter(
+                                   layer,size=3,mode='constant',cval=0),
+                                   ss_DoG_squared))
+        
+        with get_span(profiler,'compare',
+                      shape=(len(ss_DoG_squared),)+ss_DoG_squared[0].shape
+                      ) as args:
+            
+            # compute the maxima of each middle layer, which are returned
+            # in the order of the layers
+            
+            layer_maxima = list(pool.map(lambda i: get_layer_maxima(
+                                         ss_DoG_squared,max_2D,thresh,i,
+                                         mask),
+                                         range(1,len(ss_DoG_squared)-1)))
+            
+            args['candidates'] = sum([m[2] for m in layer_maxima])
+            
+            args['maxima'] = sum([len(m[0]) for m in layer_maxima])
+        
+        # the empty arrays are stacked first, so there is always something
+        # to stack, even if the octave has no middle layers
+        
+        maxima_idx = np.vstack([np.empty((0,2),dtype=int)] +
+                               [np.column_stack((x,y))
+                                for (x,y,_) in layer_maxima])
+        
+        maxima_layer_num = np.hstack([np.empty(0,dtype=int)] +
+                                     [np.full(len(x),i+1) for (i,(x,_,_))
+                                      in enumerate(layer_maxima)])
+        
+        return (maxima_idx,maxima_layer_num)
+    
+    elif engine == 'vectorized':
+        
+        # stack all of the DoG layers in the octave along the first axis
+        
+        g = np.stack(ss_DoG_squared)
+        
+        # compute the maximum value in the 3x3x3 window around every pixel
+        # in the stack. The stack is padded with zeros to match the 
+        # padding used by the loop engine. The window of the layers i-1,
+        # i and i+1 is used for every middle layer i, just like stacking
+        # every three layers together.
+        
+        with get_span(profiler,'maximum_filter',shape=g.shape):
+            
+            max_value = ndimage.maximum_filter(g,size=3,mode='constant',
+                                               cval=0)
+        
+        thresh = np.asarray(thresh).reshape((-1,1,1))
+        
+        with get_span(profiler,'compare',shape=g.shape) as args:
+            
+            # a pixel in a middle layer is a maximum if it is the same as
+            # the maximum value in its window and if it is greater than the
+            # threshold value of its layer
+            
+            is_local_max = np.isclose(g[1:-1],max_value[1:-1])
+            
+            is_max = np.logical_and(is_local_max,g[1:-1] > thresh)
+            
+            if mask is not None:
+                
+                is_max = np.logical_and(is_max,mask)
+            
+            # compute the layer numbers and indices of the maxima. The
+            # layer numbers are sorted in ascending order, followed by the
+            # row and column numbers, which is the same order as the loop
+            # engine.
+            
+            (layer,x,y) = np.nonzero(is_max)
+            
+            # the local maxima are the candidates before thresholding
+            
+            if profiler is not None:
+                
+                args['candidates'] = int(np.count_nonzero(is_local_max))
+                
+                args['maxima'] = len(layer)
+        
+        maxima_idx = np.column_stack((x,y))
+        
+        maxima_layer_num = layer + 1
+        
+        return (maxima_idx,maxima_layer_num)
+    
+    elif engine == 'coarse':
+        
+        return get_maxima_coarse(ss_DoG_squared,thresh,factor=coarse_factor,
+                                 margin=coarse_margin,mask=mask,
+                                 profiler=profiler)
+    
+    elif engine != 'loop':
+        
+        raise ValueError("unknown engine '%s'" % engine)
+    
+    # initialize lists to store results
+    
+    maxima_idx = []
+    
+    maxima_layer_num = []
+    
+    for i in range(1,len(ss_DoG_squared)-1):
+        
+        # stack 3 consecutive layers together to prepare for non-max
+        # suppression
+        
+        g = np.dstack(ss_DoG_squared[i-1:i+2])
+        
+        # the threshold value of the middle image for later comparison. The
+        # default method is Yen's method. However, different thresholds
+        # obtained from different statistical methods will yield different
+        # results for blob detection. For example, the statistical mean can
+        # be used by passing thresh = 'mean'.
+        #
+        # The mean detects many of the blobs. However, it does
+        # lead to many false positives. On the other hand, Otsu's method
+        # can be used by passing thresh = 'otsu'. This method
+        # is the second most precise out of the three methods. It
+        # detects less blobs than the mean, but contains more false
+        # positives than Yen's method.
+        #
+        # Yen's method is by far the most precise of the three methods.
+        # However, it is sometimes susceptible to false negatives, where it
+        # does not detect certain blobs.
+        #
+        # Note that Dr. Tianfu Wu was consulted before using these
+        # built-in functions. Please refer to our conversation on Slack on
+        # November 27th 2019 at 5:13 PM and 10:43 PM.
+        
+        thresh_layer = thresh[i-1]
+        
+        # pad the stacked images with 1 zero before and 1 zero after their
+        # rows and columns to make room for a 3x3 sliding window
+        
+        padded_stack = np.zeros((g.shape[0]+2,g.shape[1]+2,g.shape[2]),
+                                dtype=g.dtype)
+        
+        padded_stack[1:-1,1:-1,:] = g
+        
+        # iterate through the stack of layers
+        
+        for x in range(padded_stack.shape[0]-2):
+            for y in range(padded_stack.shape[1]-2):
+                
+                # generate a 3x3x3 window around each pixel in the stack
+                
+                window = padded_stack[x:x+3,y:y+3,:]
+                
+                # compute the maximum value in the 3x3x3 window
+                
+                max_value = np.amax(window)
+                
+                # compare the value of the center pixel with the maximum
+                # value to see if they are the same. Also, make sure that
+                # the value of the center pixel is greater than the
+                # threshold value to make sure it is a maximum.
+                
+                if (np.isclose(window[1,1,1],max_value) and
+                   (window[1,1,1] > thresh_layer) and
+                   (mask is None or mask[x,y])):
+                    
+                    # append results to lists
+                    
+                    maxima_idx.append((x,y))
+                    
+                    maxima_layer_num.append(i)
+    
+    return (np.asarray(maxima_idx),np.asarray(maxima_layer_num))
+
+# This function computes the maxima of the middle layer i of an octave,
+# where max_2D contains the maximum values of the 3x3 windows of every
+# layer, and only the pixels inside mask can be maxima if a mask is given.
+# It returns the row and column numbers of the maxima and the number of
+# local maxima before thresholding.
+
+def get_layer_maxima(ss_DoG_squared,max_2D,thresh,i,mask=None):
+    
+    # the maximum value in the 3x3x3 window around every pixel
+    
+    max_value = np.maximum(np.maximum(max_2D[i-1],max_2D[i]),max_2D[i+1])
+    
+    g = ss_DoG_squared[i]
+    
+    is_local_max = np.isclose(g,max_value)
+    
+    is_max = np.logical_and(is_local_max,g > thresh[i-1])
+    
+    if mask is not None:
+        
+        is_max = np.logical_and(is_max,mask)
+    
+    (x,y) = np.nonzero(is_max)
+    
+    return (x,y,int(np.count_nonzero(is_local_max)))
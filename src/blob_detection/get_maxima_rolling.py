@@ -0,0 +1,338 @@
+# This function computes the maxima of the squared DoG layers of every
+# octave one layer at a time, so that only a few layers are stored at any
+# moment instead of the whole octave. The inputs to this function are the
+# same as the inputs of get_blob_loc, except that img is the grayscale
+# image in the data type of the pipeline.
+#
+# The Gaussian layers of each octave are computed one after the other by
+# get_ss_octave, and only the last two layers are kept. Every squared DoG
+# layer is written into one of three buffers that are reused by all of the
+# layers of the octave, and the maximum of the 3x3 window around each of
+# its pixels is also written into one of three buffers. As soon as the
+# three squared DoG layers around a middle layer are computed, the maxima
+# of the middle layer are computed in the same way as get_maxima_loc, since
+# the maximum of a 3x3x3 window is the maximum of the 3x3 windows of its
+# three layers. Only a quarter of the third layer is kept to compute the
+# next octave.
+#
+# This function is a generator that yields a tuple
+# (octave,layer_num,maxima_idx,maxima_response) for every middle layer of
+# every octave, in the same order as get_blob_loc, where layer_num is the
+# DoG layer number of the middle layer in the octave, maxima_idx contains
+# the indices of its maxima in the octave and maxima_response contains the
+# values of the squared DoG at the maxima. For example:
+#
+# for (i,j,maxima_idx,maxima_response) in get_maxima_rolling(img):
+#     ...
+#
+# The nms_engine input is the engine used to find the maxima of each middle
+# layer. The 'vectorized' and 'loop' engines of get_maxima_loc find the
+# same maxima, so both use the exact test above. If nms_engine = 'coarse',
+# the maxima of each middle layer are found by get_maxima_coarse on the
+# three squared DoG layers around it, with the margin nms_margin, which
+# finds the same maxima as the coarse engine on the whole octave.
+#
+# If workspace is a Workspace object, the buffers of the squared DoG layers
+# and the Gaussian layers are stored in it and reused by every later call
+# with the same shape of img. Please refer to the Workspace class.
+#
+# The thresholding strategy can't use a single threshold value per octave,
+# since the layers of an octave aren't stored together. With the 'spatial'
+# engine, the results are the same as get_blob_loc. With the 'fft' engine,
+# each layer is padded for its own kernel instead of the largest kernel of
+# the octave, so the layers are only the same within floating-point
+# tolerance.
+
+# import the NumPy library
+
+import numpy as np
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import NDimage library
+
+ndimage = lazy_import('scipy.ndimage')
+
+# import the get_ss_octave() function
+
+from .get_ss_octave import get_ss_octave
+
+# import the get_filter_bank() function
+
+from .FilterBank import get_filter_bank
+
+# import the get_conv_engine() function
+
+from .get_conv_engine import get_conv_engine
+
+# import the pad_img() function
+
+from .pad_img import pad_img
+
+# import the get_span() function
+
+from .get_span import get_span
+
+# import the get_thresh_strategy() function
+
+from .ThreshStrategy import get_thresh_strategy
+
+# import the get_maxima_coarse() function
+
+from .get_maxima_coarse import get_maxima_coarse
+
+def get_maxima_rolling(img,oct_num=3,DoG_layer_num=4,sigma=1.6,k=np.sqrt(2),
+                       thresh=None,conv_engine='auto',ss_mode='direct',
+                       fft_backend='fftpack',workers=1,profiler=None,
+                       nms_engine='vectorized',nms_margin=2,workspace=None):
+    
+    # the number of layers in each octave in scale space
+    
+    n = DoG_layer_num + 1
+    
+    if nms_engine not in ('vectorized','loop','coarse'):
+        
+        raise ValueError("unknown nms_engine '%s'" % nms_engine)
+    
+    if not isinstance(thresh,(list,tuple,np.ndarray)):
+        
+        thresh = get_thresh_strategy(thresh)
+        
+        if thresh.per_octave:
+            
+            raise ValueError('a threshold value per octave needs all of '
+                             'the layers of the octave')
+    
+    # the kernels are taken from the filter bank that is shared with
+    # get_ss_octave
+    
+    filter_bank = get_filter_bank()
+    
+    # generate the sigma values for the octave
+    
+    sigmas = list(sigma*np.power(k,np.arange(n)))
+    
+    if ss_mode == 'incremental':
+        
+        # compute the differential sigma values, where the first layer is
+        # blurred from the input image directly. The image is zero-padded
+        # by the total half-width of all of the kernels, just like
+        # get_ss_octave.
+        
+        sigmas = [sigmas[0]] + [np.sqrt(sigmas[i]**2 - sigmas[i-1]**2)
+                                for i in range(1,n)]
+        
+        R = sum([filter_bank.get_kernel_1D(s).shape[0]//2 for s in sigmas])
+    
+    elif ss_mode == 'direct':
+        
+        R = 0
+    
+    else:
+        
+        raise ValueError("unknown ss_mode '%s'" % ss_mode)
+    
+    for i in range(oct_num): # loop through each octave
+        
+        if profiler is not None:
+            
+            profiler.set_tags(octave=i)
+        
+        # choose the convolution engine of each layer based on the shape of
+        # the image, just like get_ss_octave
+        
+        if conv_engine == 'auto':
+            
+            engines = [get_conv_engine(img.shape,
+                                       filter_bank.get_kernel_1D(s).shape[0])
+                       for s in sigmas]
+        
+        else:
+            
+            engines = [conv_engine]*n
+        
+        # the buffers of the three latest squared DoG layers and of the
+        # maxima of their 3x3 windows, which are allocated by the first
+        # layer
+        
+        DoG_squared = None
+        
+        max_2D = None
+        
+        g_layer = pad_img(img,(R,R,R,R)) if R else img
+        
+        for j in range(n): # loop through each layer
+            
+            # blur the input image, or the previous layer if the layers are
+            # incremental
+            
+            with get_span(profiler,'get_ss_octave',layer=j):
+                
+                source = g_layer if R else img
+                
+                # with a workspace, the layers are written into two
+                # buffers in turn, so the previous layer isn't overwritten
+                # by the arrays of the workspace
+                
+                if workspace is not None:
+                    
+                    out = workspace.get('rolling_layer%d' % (j % 2),
+                                        (1,) + source.shape,
+                                        get_layer_dtype(source))
+                
+                else:
+                    
+                    out = None
+                
+                g_layer = get_ss_octave(source,1,sigma_init=sigmas[j],
+                                        conv_engine=engines[j],
+                                        fft_backend=fft_backend,
+                                        workers=workers,workspace=workspace,
+                                        out=out)[0]
+            
+            # crop out the layer
+            
+            layer = g_layer[R:R+img.shape[0],R:R+img.shape[1]]
+            
+            if DoG_squared is None:
+                
+                DoG_squared = list(get_buffer(workspace,'rolling_DoG',
+                                              (3,) + img.shape,layer.dtype))
+                
+                max_2D = list(get_buffer(workspace,'rolling_max',
+                                         (3,) + img.shape,layer.dtype))
+                
+                max_value = get_buffer(workspace,'rolling_max_value',
+                                       img.shape,layer.dtype)
+                
+                max_diff = get_buffer(workspace,'rolling_max_diff',
+                                      img.shape,layer.dtype)
+            
+            if j == 2:
+                
+                # down-sample the third layer and store it
+                
+                with get_span(profiler,'downsample'):
+                    
+                    dsby2 = layer[::2,::2].copy()
+            
+            if j >= 1:
+                
+                # compute the squared difference of Gaussians in place in
+                # the buffer of the oldest squared DoG layer, and the
+                # maximum of the 3x3 window around each of its pixels
+                
+                d = (j-1) % 3
+                
+                with get_span(profiler,'get_DoG_squared',layer=j-1):
+                    
+                    np.subtract(layer,prev_layer,out=DoG_squared[d])
+                    
+                    np.square(DoG_squared[d],out=DoG_squared[d])
+                
+                # the coarse engine doesn't use the 3x3 windows
+                
+                if nms_engine != 'coarse':
+                    
+                    with get_span(profiler,'maximum_filter',layer=j-1):
+                        
+                        ndimage.maximum_filter(DoG_squared[d],size=3,
+                                               mode='constant',cval=0,
+                                               output=max_2D[d])
+            
+            if j >= 3:
+                
+                # compute the maxima of the middle layer of the three
+                # latest squared DoG layers
+                
+                m = j - 2
+                
+                (prev_d,mid_d,next_d) = ((m-1) % 3,m % 3,(m+1) % 3)
+                
+                g = DoG_squared[mid_d]
+                
+                if isinstance(thresh,(list,tuple,np.ndarray)):
+                    
+                    thresh_layer = thresh[m-1]
+                
+                else:
+                    
+                    with get_span(profiler,'threshold',layer=m):
+                        
+                        thresh_layer = thresh.get_thresh(
+                                       [DoG_squared[prev_d],g,
+                                        DoG_squared[next_d]])[0]
+                
+                if nms_engine == 'coarse':
+                    
+                    (max_idx,_) = get_maxima_coarse([DoG_squared[prev_d],g,
+                                                     DoG_squared[next_d]],
+                                                    [thresh_layer],
+                                                    margin=nms_margin,
+                                                    profiler=profiler)
+                
+                else:
+                    
+                    with get_span(profiler,'compare',layer=m) as args:
+                        
+                        # the maximum value in the 3x3x3 window around
+                        # every pixel of the middle layer
+                        
+                        np.maximum(max_2D[prev_d],max_2D[mid_d],
+                                   out=max_value)
+                        
+                        np.maximum(max_value,max_2D[next_d],out=max_value)
+                        
+                        # a pixel is a local maximum if it is close to the
+                        # maximum value in its window. This is the same
+                        # test as np.isclose(g,max_value), computed in the
+                        # buffers since max_value >= g >= 0.
+                        
+                        np.subtract(max_value,g,out=max_diff)
+                        
+                        np.multiply(max_value,1e-05,out=max_value)
+                        
+                        np.add(max_value,1e-08,out=max_value)
+                        
+                        is_max = np.logical_and(max_diff <= max_value,
+                                                g > thresh_layer)
+                        
+                        (x,y) = np.nonzero(is_max)
+                        
+                        args['maxima'] = len(x)
+                    
+                    max_idx = np.column_stack((x,y))
+                
+                yield (i,m,max_idx,g[max_idx[:,0],max_idx[:,1]])
+            
+            prev_layer = layer
+        
+        img = dsby2
+    
+    if profiler is not None:
+        
+        profiler.set_tags()
+
+# This function returns a new array, or the array of workspace with the
+# given name, shape and data type if workspace is given.
+
+def get_buffer(workspace,name,shape,dtype):
+    
+    if workspace is None:
+        
+        return np.empty(shape,dtype=dtype)
+    
+    return workspace.get(name,shape,dtype)
+
+# This function returns the data type of the layers computed from img by
+# get_ss_octave.
+
+def get_layer_dtype(img):
+    
+    if issubclass(img.dtype.type,np.floating):
+        
+        return img.dtype
+    
+    return np.float64
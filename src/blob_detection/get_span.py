@@ -0,0 +1,31 @@
+# This function returns a context manager that records a span of the
+# stage name in profiler. If profiler = None, it returns a context manager
+# that does nothing instead, so the pipeline functions can always use:
+#
+# with get_span(profiler,'stage',octave=i) as args:
+#     ...
+#     args['maxima'] = len(maxima_idx)
+#
+# where args is the dictionary of arguments of the span. If profiler = None,
+# args is a new dictionary that is thrown away. Please refer to the
+# Profiler class for more details.
+
+def get_span(profiler,name,**args):
+    
+    if profiler is None:
+        
+        return NullSpan()
+    
+    return profiler.span(name,**args)
+
+class NullSpan:
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        
+        return {}
+    
+    def __exit__(self,*exc):
+        
+        pass
@@ -0,0 +1,336 @@
+# This function returns a single octave in scale-space. The inputs to this
+# function are:
+#
+# img - An MxN array, representing a grayscale image or a squared DoG array
+# 
+# n - The number of layers in the octave
+#
+# sigma_init - The first sigma value for the first layer in the octave
+#
+# k_init - the scaling factor for sigma
+#
+# conv_engine - The convolution engine used to compute each layer. If
+# conv_engine = 'fft', every layer is computed in the frequency domain. If
+# conv_engine = 'spatial', every layer is computed using separable spatial
+# convolution. If conv_engine = 'auto', the get_conv_engine function picks
+# the cheaper engine for each layer based on the size of its kernel and the
+# shape of the image. All of these engines zero-pad the image in the same
+# way, so they yield the same layers. If conv_engine = 'box', every layer is
+# approximated by a few box filters using conv_box, whose cost doesn't
+# depend on sigma. The box layers have the same variance as the Gaussian
+# layers and the image is zero-padded in the same way, but they are only
+# approximately Gaussian, so the blobs are different. Please refer to the
+# compare_box script for the recall and precision of its blobs. The box
+# engine is faster than the 'fft' engine, but it is only faster than the
+# 'spatial' engine for large values of sigma.
+#
+# ss_mode - The way the layers are computed. If ss_mode = 'direct', every
+# layer is computed by blurring img with sigma_init*k_init^i. If
+# ss_mode = 'incremental', only the first layer is computed from img, and
+# every following layer i is computed by blurring layer i-1 with the
+# differential sigma sqrt(sigma_i^2 - sigma_(i-1)^2), so only small kernels
+# are used. Since blurring twice with Gaussians is the same as blurring
+# once with a Gaussian whose variance is the sum of their variances, both
+# modes yield the same layers except for the truncation of the kernels. The
+# image is zero-padded by the total half-width of all of the kernels before
+# the layers are computed, so the borders are handled just like the direct
+# mode. For 8-bit images, the incremental layers are within 0.6 gray levels
+# of the direct layers, and about 5% of the blobs detected in the sample
+# images in the images folder are different.
+#
+# fft_backend - The backend used to compute the FFTs of the layers that
+# are computed in the frequency domain. Please refer to the conv_FFT
+# function for the available backends.
+#
+# workers - The number of threads used by the FFT backend
+#
+# cache - A dictionary used to store the padded arrays between calls.
+# Please refer to the conv_FFT_multi function.
+#
+# filter_bank - The FilterBank object that computes the Gaussian kernels
+# and stores them with their DFTs. If filter_bank = None, the filter bank
+# returned by get_filter_bank is used, which is shared by every call in the
+# process, so the kernels and their DFTs are only computed once for each
+# shape of img.
+#
+# profiler - A Profiler object that records the time spent computing each
+# layer, or None. Please refer to the Profiler class.
+#
+# pool - A pool of threads from get_thread_pool, or None. If a pool is
+# given and ss_mode = 'direct', the layers that are computed in the spatial
+# domain and the layers that are computed in the frequency domain are
+# computed by the threads of the pool at the same time. The layers of the
+# incremental mode depend on each other, so they are always computed one
+# after the other.
+#
+# workspace - A Workspace object, or None. If a workspace is given, the
+# layers computed in the frequency domain are computed in its arrays by
+# conv_FFT_multi, so they are views of its arrays, which are overwritten by
+# the next call with the same workspace and shape of img. In the
+# incremental mode, every layer is computed in the same arrays as the
+# previous layer, so the layers are copied into the 'octave' array of the
+# workspace, unless out is given.
+#
+# out - An n x M x N array with the data type of the layers, or None. If
+# out is given, every layer is written into it, and the layers that are
+# returned are its views out[0], ..., out[n-1].
+#
+# If img contains floating-point numbers, the Gaussian kernels are
+# converted to the data type of img, so the layers have the same data type
+# as img. For example, a float32 image yields float32 layers, and all of
+# the FFTs are computed in complex64.
+#
+# This function returns the octave of scale-space images. The Gaussian
+# kernels of all of the layers computed in the frequency domain are applied
+# using conv_FFT_multi, so the image is padded and transformed only once
+# for the whole octave.
+
+# import the NumPy library
+
+import numpy as np
+
+# import the get_filter_bank() function
+
+from .FilterBank import get_filter_bank
+
+# import the conv_FFT_multi() and get_array() functions
+
+from .conv_FFT_multi import conv_FFT_multi, get_array
+
+# import the pad_img() function
+
+from .pad_img import pad_img
+
+# import the conv_sep() function
+
+from .conv_sep import conv_sep
+
+# import the conv_box() function
+
+from .conv_box import conv_box
+
+# import the get_conv_engine() function
+
+from .get_conv_engine import get_conv_engine
+
+# import the get_span() function
+
+from .get_span import get_span
+
+def get_ss_octave(img,n=5,sigma_init=1.6,k_init=np.sqrt(2),
+                  conv_engine='auto',ss_mode='direct',fft_backend='fftpack',
+                  workers=1,cache=None,profiler=None,pool=None,
+                  filter_bank=None,workspace=None,out=None):
+    
+    # generate the k values for the octave
+    
+    k = np.power(k_init,np.arange(n))
+    
+    # generate the sigma values for the octave
+    
+    sigmas = list(sigma_init*k)
+    
+    if ss_mode == 'incremental':
+        
+        # compute the differential sigma values, where the first layer is
+        # blurred from the input image directly
+        
+        sigmas = [sigmas[0]] + [np.sqrt(sigmas[i]**2 - sigmas[i-1]**2)
+                                for i in range(1,n)]
+    
+    elif ss_mode != 'direct':
+        
+        raise ValueError("unknown ss_mode '%s'" % ss_mode)
+    
+    # the data type of the gaussian kernels
+    
+    if issubclass(img.dtype.type,np.floating):
+        
+        kernel_dtype = img.dtype
+    
+    else:
+        
+        kernel_dtype = np.float64
+    
+    if filter_bank is None:
+        
+        filter_bank = get_filter_bank()
+    
+    # compute the 1D gaussian kernel of each layer
+    
+    gaussian_kernels_1D = [filter_bank.get_kernel_1D(sigma,kernel_dtype)
+                           for sigma in sigmas]
+    
+    # choose the convolution engine of each layer
+    
+    if conv_engine == 'auto':
+        
+        engines = [get_conv_engine(img.shape,h.shape[0])
+                   for h in gaussian_kernels_1D]
+    
+    elif conv_engine in ('fft','spatial','box'):
+        
+        engines = [conv_engine]*n
+    
+    else:
+        
+        raise ValueError("unknown conv_engine '%s'" % conv_engine)
+    
+    # initialize list to store scale-space octave layers
+    
+    scale_space = [None]*n
+    
+    if ss_mode == 'incremental':
+        
+        if out is None and workspace is not None:
+            
+            out = workspace.get('octave',(n,) + img.shape,kernel_dtype)
+        
+        # the zero-padding of conv_FFT treats the image as if it was
+        # surrounded by zeros, so the blurred image spills over its borders.
+        # To keep the same semantics, the image is zero-padded by the total
+        # half-width of all of the kernels before blurring, and every layer
+        # is computed on the padded image, which is then cropped.
+        
+        R = sum([h.shape[0]//2 for h in gaussian_kernels_1D])
+        
+        g_layer = pad_img(img,(R,R,R,R),
+                          out=get_array(workspace,'octave_pad',
+                                        (img.shape[0] + 2*R,
+                                         img.shape[1] + 2*R),img.dtype))
+        
+        for i in range(n): # loop through each layer
+            
+            # blur the previous layer, or the input image for the first
+            # layer
+            
+            if engines[i] == 'fft':
+                
+                gaussian_kernel = filter_bank.get_kernel(sigmas[i],
+                                                         kernel_dtype)
+                
+                with get_span(profiler,'conv_FFT_multi',layers=[i],
+                              shape=g_layer.shape):
+                    
+                    spectra = filter_bank.get_spectra(g_layer.shape,
+                                                      [sigmas[i]],
+                                                      kernel_dtype,
+                                                      fft_backend,workers,
+                                                      profiler)
+                    
+                    g_layer = conv_FFT_multi(g_layer,[gaussian_kernel],
+                                             fft_backend=fft_backend,
+                                             workers=workers,cache=cache,
+                                             profiler=profiler,
+                                             spectra=spectra,
+                                             workspace=workspace)[0]
+            
+            else:
+                
+                with get_span(profiler,get_conv_name(engines[i]),layer=i,
+                              shape=g_layer.shape,
+                              kernel=gaussian_kernels_1D[i].shape[0]):
+                    
+                    g_layer = conv_spatial(g_layer,engines[i],
+                                           gaussian_kernels_1D[i],sigmas[i])
+            
+            # crop out the layer. The next layer overwrites the arrays of
+            # the workspace, so the layer is copied into out.
+            
+            scale_space[i] = set_layer(out,i,g_layer[R:-R,R:-R])
+        
+        return scale_space
+    
+    if pool is not None:
+        
+        # start filtering the image with the gaussian kernels that should
+        # be applied in the spatial domain on the pool, while the layers
+        # in the frequency domain are computed below
+        
+        spatial_layers = {i:pool.submit(conv_spatial,img,engines[i],
+                                        gaussian_kernels_1D[i],sigmas[i])
+                          for i in range(n) if engines[i] != 'fft'}
+    
+    # filter the image with all of the gaussian kernels that should be
+    # applied in the frequency domain at once
+    
+    fft_layers = [i for i in range(n) if engines[i] == 'fft']
+    
+    if fft_layers:
+        
+        gaussian_kernels = [filter_bank.get_kernel(sigmas[i],kernel_dtype)
+                            for i in fft_layers]
+        
+        with get_span(profiler,'conv_FFT_multi',layers=fft_layers,
+                      shape=img.shape):
+            
+            # the DFTs of the kernels, which are stored by the filter bank
+            
+            spectra = filter_bank.get_spectra(img.shape,
+                                              [sigmas[i] for i in fft_layers],
+                                              kernel_dtype,fft_backend,
+                                              workers,profiler)
+            
+            g_layers = conv_FFT_multi(img,gaussian_kernels,
+                                      fft_backend=fft_backend,
+                                      workers=workers,cache=cache,
+                                      profiler=profiler,spectra=spectra,
+                                      workspace=workspace)
+        
+        for i,g_layer in zip(fft_layers,g_layers):
+            
+            scale_space[i] = set_layer(out,i,g_layer)
+    
+    # filter the image with the remaining gaussian kernels in the spatial
+    # domain, or wait for the pool to filter it
+    
+    for i in range(n):
+        
+        if engines[i] != 'fft' and pool is not None:
+            
+            scale_space[i] = set_layer(out,i,spatial_layers[i].result())
+        
+        elif engines[i] != 'fft':
+            
+            with get_span(profiler,get_conv_name(engines[i]),layer=i,
+                          shape=img.shape,
+                          kernel=gaussian_kernels_1D[i].shape[0]):
+                
+                scale_space[i] = set_layer(out,i,
+                                           conv_spatial(img,engines[i],
+                                                        gaussian_kernels_1D[i],
+                                                        sigmas[i]))
+    
+    return scale_space
+
+# This function returns the name of the span of a layer computed by the
+# spatial engine, which is the name of the convolution function.
+
+def get_conv_name(engine):
+    
+    return 'conv_box' if engine == 'box' else 'conv_sep'
+
+# This function writes the i-th layer into out and returns its view in out,
+# or returns the layer itself if out = None.
+
+def set_layer(out,i,layer):
+    
+    if out is None:
+        
+        return layer
+    
+    out[i] = layer
+    
+    return out[i]
+
+# This function filters img in the spatial domain with the gaussian kernel
+# of a layer, using separable convolution with the 1D kernel if
+# engine = 'spatial', or box filters with the same sigma if engine = 'box'.
+
+def conv_spatial(img,engine,kernel_1D,sigma):
+    
+    if engine == 'box':
+        
+        return conv_box(img,sigma)
+    
+    return conv_sep(img,kernel_1D)
@@ -0,0 +1,40 @@
+# This function returns a pool of threads used to run the independent
+# stages of a single image at the same time, such as the layers of an
+# octave. The pools are stored, so the same pool is shared by every call
+# with the same number of threads in the process, and its threads are only
+# started once. The input to this function is:
+#
+# threads - The number of threads in the pool
+#
+# The stages that are run by the pool spend most of their time in NumPy,
+# SciPy and FFT routines, most of which release the GIL, so they can run on
+# different cores at the same time.
+
+# import the threading library
+
+import threading
+
+# import the futures library
+
+from concurrent import futures
+
+# dictionary to store the pools
+
+thread_pools = {}
+
+# the lock that makes sure that concurrent first calls only create one
+# pool for each number of threads
+
+thread_pools_lock = threading.Lock()
+
+def get_thread_pool(threads):
+    
+    with thread_pools_lock:
+        
+        if threads not in thread_pools:
+            
+            thread_pools[threads] = futures.ThreadPoolExecutor(
+                                        max_workers=threads,
+                                        thread_name_prefix='blob')
+        
+        return thread_pools[threads]
@@ -0,0 +1,96 @@
+# This function computes the width of the halo that has to be added around
+# each tile of an image, so that the blobs detected in the tile are the
+# same as the blobs detected in the whole image. The inputs to this
+# function are:
+#
+# oct_num - The number of octaves in scale space
+#
+# n - The number of layers in each octave in scale space
+#
+# sigma - The initial sigma value used for blurring
+#
+# k - The initial scaling factor for sigma
+#
+# ss_mode - The way the layers of each octave are computed. Please refer to
+# the get_ss_octave function for the available modes.
+#
+# The halo has to cover the support of the largest Gaussian kernel in each
+# octave and the 3x3x3 window used for non-maximum suppression. Since each
+# octave is computed from the down-sampled third layer of the previous
+# octave, the support of the kernel of the third layer of every previous
+# octave is also added. The width of the halo is in pixels of the original
+# image, and it is rounded up to a multiple of the down-sampling factor of
+# the last octave, 2^(oct_num-1), so that the tiles are down-sampled on the
+# same grid as the whole image.
+
+# import the NumPy library
+
+import numpy as np
+
+# import the get_filter_bank() function
+
+from .FilterBank import get_filter_bank
+
+def get_tile_halo(oct_num,n,sigma,k,ss_mode='direct'):
+    
+    # generate the sigma values of each octave
+    
+    sigmas = sigma*np.power(k,np.arange(n))
+    
+    if ss_mode == 'incremental':
+        
+        # compute the differential sigma values
+        
+        sigmas = [sigmas[0]] + [np.sqrt(sigmas[i]**2 - sigmas[i-1]**2)
+                                for i in range(1,n)]
+    
+    # compute the half-width of the kernel of each layer
+    
+    filter_bank = get_filter_bank()
+    
+    half_widths = [filter_bank.get_kernel_1D(s).shape[0]//2 for s in sigmas]
+    
+    # compute the number of pixels around a pixel of the input of an octave
+    # that affect the value of the pixel in all of the layers, and in the
+    # third layer of the octave. For the incremental mode, each layer also
+    # depends on the support of the kernels of the previous layers.
+    
+    if ss_mode == 'incremental':
+        
+        reach_all = sum(half_widths)
+        
+        reach_3 = sum(half_widths[:3])
+    
+    else:
+        
+        reach_all = max(half_widths)
+        
+        reach_3 = half_widths[2]
+    
+    # the width of the border of the input of each octave that is affected
+    # by the previous octaves, in pixels of the original image
+    
+    border = 0
+    
+    halo = 0
+    
+    for i in range(oct_num): # loop through each octave
+        
+        # the halo has to cover the support of the kernels and the 3x3x3
+        # window, with one more pixel to account for down-sampling
+        
+        halo = max(halo,border + (2**i)*(reach_all + 2))
+        
+        # the border of the next octave grows by the support of the kernel
+        # of the third layer
+        
+        border = border + (2**i)*reach_3 + 2**(i+1)
+    
+    # round up the halo to a multiple of the down-sampling factor of the
+    # last octave
+    
+    align = 2**(oct_num-1)
+    
+    halo = int(np.ceil(halo/align))*align
+    
+    return halo
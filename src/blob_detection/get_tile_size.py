@@ -0,0 +1,46 @@
+# This function computes the largest tile size that can be processed by
+# get_blob_loc_tiled within a memory budget. The inputs to this function
+# are:
+#
+# mem_budget - The maximum number of bytes used to process each tile
+#
+# halo - The width of the halo around each tile
+#
+# n - The number of layers in each octave in scale space
+#
+# itemsize - The number of bytes of each floating-point number used by the
+# pipeline, which is 8 for float64 and 4 for float32
+#
+# align - The tile size is rounded down to a multiple of align
+#
+# The memory used by each tile is dominated by its first octave, whose
+# layers, squared DoG layers and stacked layers for non-maximum
+# suppression each take up one real array, while each layer computed in
+# the frequency domain also takes up several complex arrays. The memory
+# used per pixel of the tile and its halo was measured using the
+# tracemalloc library for the worst case, where all of the layers are
+# computed in the frequency domain.
+
+# import NumPy library
+
+import numpy as np
+
+def get_tile_size(mem_budget,halo,n,itemsize,align):
+    
+    # the measured number of bytes per pixel of the tile and its halo. The
+    # complex arrays of each layer computed in the frequency domain take up
+    # about 16 floating-point numbers per pixel, including the padding.
+    
+    bytes_per_pixel = (16*n + 8)*itemsize
+    
+    # the largest tile whose area, including its halo, fits in the budget
+    
+    tile_size = int(np.sqrt(mem_budget/bytes_per_pixel)) - 2*halo
+    
+    tile_size = (tile_size//align)*align
+    
+    if tile_size < align:
+        
+        raise ValueError('mem_budget is too small for the halo of the tiles')
+    
+    return tile_size
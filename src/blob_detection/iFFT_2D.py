@@ -0,0 +1,41 @@
+# This function computes the 2D inverse FFT by first finding the 2D FFT of
+# the complex conjugate of the frequency spectrum, then conjugating that
+# and dividing it by the area of the original image (M x N). Just like
+# FFT_2D, the inverse is computed over the last two axes of the input. If
+# overwrite_x = True and spec is a contiguous complex array, the inverse is
+# computed in the memory of spec, so no new array is allocated.
+#
+# Tested 11/24/2019
+
+# import NumPy library
+
+import numpy as np
+
+# import FFT_2D function
+
+from .FFT_2D import FFT_2D
+
+def iFFT_2D(spec,overwrite_x=False):
+    
+    # obtain conjugate frequency spectrum
+    
+    if overwrite_x:
+        
+        conj_spec = np.conjugate(spec,out=spec)
+    
+    else:
+        
+        conj_spec = spec.conjugate()
+    
+    # the conjugate spectrum is a new array or spec itself, so its FFT can
+    # be computed in place
+    
+    conj_img = FFT_2D(conj_spec,overwrite_x=True)
+    
+    # obtain output image
+    
+    img_out = np.conjugate(conj_img,out=conj_img)
+    
+    img_out /= spec.shape[-2]*spec.shape[-1]
+    
+    return img_out
@@ -0,0 +1,54 @@
+# This function returns a module that is only imported when one of its
+# attributes is first used, so the libraries that take a long time to
+# import, such as OpenCV and SciPy, are only loaded by the code paths that
+# use them. The input to this function is:
+#
+# name - The full name of the module, such as 'scipy.ndimage'
+#
+# For example:
+#
+# ndimage = lazy_import('scipy.ndimage')
+#
+# replaces from scipy import ndimage, and SciPy is imported by the first
+# call to ndimage.maximum_filter(). If the module is already imported, it
+# is returned as is. Otherwise, a LazyModule is returned, which imports
+# the module when one of its attributes is first looked up, and then copies
+# the attributes of the module, so the later lookups are as fast as the
+# lookups of the module itself. The import system is thread-safe, so the
+# first lookups can happen on several threads at the same time.
+
+# import the importlib library
+
+import importlib
+
+# import the sys library
+
+import sys
+
+# import the types library
+
+import types
+
+def lazy_import(name):
+    
+    if name in sys.modules:
+        
+        return sys.modules[name]
+    
+    return LazyModule(name)
+
+# This class is a module whose attributes are loaded from the module with
+# the same name the first time that one of them is looked up.
+
+class LazyModule(types.ModuleType):
+    
+    # This method is only called for the attributes that aren't copied
+    # from the module yet.
+    
+    def __getattr__(self,attr):
+        
+        module = importlib.import_module(self.__name__)
+        
+        self.__dict__.update(module.__dict__)
+        
+        return getattr(module,attr)
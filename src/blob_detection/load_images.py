@@ -0,0 +1,149 @@
+# This function reads many image files on background threads, so the
+# images are decoded while the previous images are processed. The inputs
+# to this function are:
+#
+# inputs - An iterable of image file names. The iterable is consumed
+# lazily, so it can be a generator over a very large number of files.
+#
+# reduce - The factor by which the images are down-sampled while they are
+# decoded, which is 1, 2, 4 or 8. Please refer to the read_image function.
+#
+# color - If True, the images are decoded as BGR color images, which is the
+# same as cv.imread(). Otherwise, they are decoded straight to grayscale.
+#
+# prefetch - The maximum number of images that are decoded ahead of the
+# image that is being processed. This bounds the memory used by the
+# decoded images that are waiting.
+#
+# threads - The number of threads that decode the images. OpenCV releases
+# the GIL while it decodes, so the threads run at the same time as the
+# detection.
+#
+# This function is a generator that yields a tuple (i,img,error) for every
+# file in the same order as the inputs, where i is the position of the file
+# in inputs, img is the decoded image, and error is None, or the exception
+# raised by the file while img is None. For example:
+#
+# for (i,img,error) in load_images(filenames):
+#     blobs = get_blob_loc(img)
+#
+# reads the next images while the blobs of img are detected.
+
+# import the os library
+
+import os
+
+# import the collections library
+
+import collections
+
+# import the futures library
+
+from concurrent import futures
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import OpenCV library
+
+cv = lazy_import('cv2')
+
+# the names of the flags of cv.imread() for each reduction factor, for
+# grayscale and for color images
+
+IMREAD_FLAGS = {(1,False): 'IMREAD_GRAYSCALE',
+                (2,False): 'IMREAD_REDUCED_GRAYSCALE_2',
+                (4,False): 'IMREAD_REDUCED_GRAYSCALE_4',
+                (8,False): 'IMREAD_REDUCED_GRAYSCALE_8',
+                (1,True): 'IMREAD_COLOR',
+                (2,True): 'IMREAD_REDUCED_COLOR_2',
+                (4,True): 'IMREAD_REDUCED_COLOR_4',
+                (8,True): 'IMREAD_REDUCED_COLOR_8'}
+
+def load_images(inputs,reduce=1,color=False,prefetch=2,threads=1):
+    
+    if (reduce,color) not in IMREAD_FLAGS:
+        
+        raise ValueError("unknown reduce '%s'" % reduce)
+    
+    # iterator over the numbered inputs
+    
+    inputs = iter(enumerate(inputs))
+    
+    with futures.ThreadPoolExecutor(max_workers=threads,
+                                    thread_name_prefix='loader') as pool:
+        
+        # queue of the images that are being decoded, in the same order as
+        # the inputs
+        
+        pending = collections.deque()
+        
+        try:
+            
+            while True:
+                
+                # start decoding images until the limit is reached
+                
+                while len(pending) < prefetch + 1:
+                    
+                    item = next(inputs,None)
+                    
+                    if item is None:
+                        
+                        break
+                    
+                    pending.append((item[0],pool.submit(read_image,item[1],
+                                                        reduce,color)))
+                
+                if not pending:
+                    
+                    break
+                
+                (i,future) = pending.popleft()
+                
+                error = future.exception()
+                
+                if error is None:
+                    
+                    yield (i,future.result(),None)
+                
+                else:
+                    
+                    yield (i,None,error)
+        
+        finally:
+            
+            # cancel the images that haven't started yet if the generator
+            # is closed early
+            
+            for (_,future) in pending:
+                
+                future.cancel()
+
+# This function reads an image file. If color = False, the image is
+# decoded straight to grayscale, which skips the color conversion of
+# get_blob_loc and only stores one channel. The grayscale image of the
+# decoder can be slightly different from cv.cvtColor() of the color image,
+# for example for JPEG files or for images with an alpha channel, so a few
+# of the blobs can change. If reduce > 1, the image is down-sampled by
+# reduce while it is decoded, which is much faster for JPEG files since the
+# decoder skips the finer details. The blobs of a reduced image are in the
+# co-ordinates of the reduced image, and they correspond to the blobs of
+# the later octaves of the full image, so this is useful when only the
+# coarse octaves are needed.
+
+def read_image(filename,reduce=1,color=False):
+    
+    if (reduce,color) not in IMREAD_FLAGS:
+        
+        raise ValueError("unknown reduce '%s'" % reduce)
+    
+    img = cv.imread(os.fspath(filename),
+                    getattr(cv,IMREAD_FLAGS[(reduce,color)]))
+    
+    if img is None:
+        
+        raise IOError("cannot read image '%s'" % filename)
+    
+    return img
@@ -19,24 +19,36 @@
 # - 3 columns before filled with 255s
 # - 4 columns after filled with 255s
 #
+# If out is an array with the shape of the padded image and the same data
+# type as img, the padded image is written into out instead of a new
+# array, so the same array can be reused for many images of the same size.
+#
 # Tested 11/24/2019
 
 # import NumPy library
 
 import numpy as np
 
-def pad_img(img,pad_size,fill_value=0):
+def pad_img(img,pad_size,fill_value=0,out=None):
+    
+    # shape of the padded image
+    
+    pad_shape = (img.shape[0] + pad_size[0] + pad_size[1],
+                 img.shape[1] + pad_size[2] + pad_size[3])
+    
+    if out is None:
         
-    # initialize new image array filled with fill_value
+        # initialize new image array filled with fill_value
+        
+        img_pad = np.full(pad_shape,fill_value,dtype=img.dtype)
     
-    img_pad = np.full(
-                      (
-                       img.shape[0] + pad_size[0] + pad_size[1],
-                       img.shape[1] + pad_size[2] + pad_size[3]
-                      ),
-                      fill_value,
-                      dtype=img.dtype
-                     )
+    else:
+        
+        # fill the existing array with fill_value
+        
+        img_pad = out
+        
+        img_pad.fill(fill_value)
     
     # insert the original image into the new image
     
@@ -0,0 +1,69 @@
+# This function is used to display the blobs that are detected using the
+# get_blob_loc function. It uses the draw_blobs function to draw the
+# circles on the image and the OpenCV function cv.imshow() to display
+# the original image with the circles overlaid. The inputs to this function
+# are:
+#
+# img - The main input image where blobs are detected. It is either a
+# color image or a grayscale image, which is converted to color to display
+# the red circles.
+#
+# oct_num - The number of octaves desired in scale space. The default
+# value was chosen based on the suggestions in section 11.7 of the
+# 4th edition of the 'Digital Image Processing' book by Rafael C. Gonzalez.
+#
+# DoG_layer_num - The number of Difference of Gaussian layers desired
+# in each octave. The default value was chosen based on the suggestions in
+# section 11.7 of the 4th edition of the 'Digital Image Processing' book
+# by Rafael C. Gonzalez.
+#
+# sigma - The initial sigma value to be used for blurring. The default
+# value was chosen based on the suggestions in section 11.7 of the 4th
+# edition of the 'Digital Image Processing' book by Rafael C. Gonzalez.
+#
+# k - The initial scaling factor for sigma. The default value was chosen
+# based on the suggestions in section 11.7 of the 4th edition of the
+# 'Digital Image Processing' book by Rafael C. Gonzalez.
+#
+# This function has no outputs.
+
+# import the lazy_import() function
+
+from .lazy_import import lazy_import
+
+# import OpenCV library
+
+cv = lazy_import('cv2')
+
+# import NumPy library
+
+import numpy as np
+
+# import the get_blob_loc function
+
+from .get_blob_loc import get_blob_loc
+
+# import the draw_blobs function
+
+from .draw_blobs import draw_blobs
+
+def show_blobs(img,oct_num=3,DoG_layer_num=4,sigma=1.6,k=np.sqrt(2)):
+    
+    # compute the blobs for all octaves. Each blob contains its position and
+    # the radius of its circle, which is based on its characteristic scale.
+    # A blob with a radius of sigma*sqrt(2) will be detected.
+    
+    blobs = get_blob_loc(img,oct_num=oct_num,DoG_layer_num=DoG_layer_num,
+                         sigma=sigma,k=k,out_format='struct')
+    
+    # overlay the red circles on the image
+    
+    if img.ndim == 2:
+        
+        img = cv.cvtColor(img,cv.COLOR_GRAY2BGR)
+    
+    img2 = draw_blobs(img,blobs,color=(0,0,255),thickness=2)
+    
+    # display the image
+    
+    cv.imshow('Final Image',img2)
@@ -0,0 +1,133 @@
+# This file measures the time it takes to import the blob_detection package
+# and its command-line tools, and checks it against a budget, so that a
+# change that imports a heavy library too early is caught right away. For
+# example:
+#
+# python check_import_time.py --repeats 5
+#
+# runs each import statement below in 5 new Python processes and keeps the
+# shortest time of each statement, since the longer times are mostly noise
+# from the rest of the system. Every statement has a budget in seconds and
+# a list of libraries that it must not import, since they should only be
+# loaded by the code paths that use them. The time of importing OpenCV,
+# SciPy and scikit-image is also printed for reference, which is the time
+# that the lazy imports save. If any statement is over its budget or
+# imports one of its forbidden libraries, the exit status is 1. Please run
+# python check_import_time.py --help for all of the options.
+
+# import the argparse library
+
+import argparse
+
+# import the os library
+
+import os
+
+# import the subprocess library
+
+import subprocess
+
+# import the sys library
+
+import sys
+
+# the libraries that should be imported lazily
+
+HEAVY_MODULES = ('numpy','cv2','scipy','skimage','pyfftw')
+
+# the import statements, their budgets in seconds and the libraries that
+# they must not import. NumPy takes about 50 ms to import, which is needed
+# by any module that works on images.
+
+BUDGETS = [('import blob_detection',0.02,HEAVY_MODULES),
+           ('from blob_detection import BlobClient',0.1,HEAVY_MODULES),
+           ('from blob_detection import get_blob_loc',0.2,
+            HEAVY_MODULES[1:]),
+           ('from blob_detection import get_blob_loc_batch',0.2,
+            HEAVY_MODULES[1:]),
+           ('from blob_detection import BlobServer',0.25,HEAVY_MODULES[1:]),
+           ('import blob_detection.detect_blobs',0.25,HEAVY_MODULES[1:])]
+
+# the statement that imports the heavy libraries, which is only measured
+
+REFERENCE = ('import cv2, scipy.ndimage, scipy.fft, scipy.fftpack, '
+             'skimage.filters')
+
+# This function runs an import statement in a new Python process and
+# returns the time it takes in seconds and the heavy libraries that it
+# imports.
+
+def time_import(statement):
+    
+    code = ('import sys, time\n'
+            't = time.perf_counter()\n'
+            '%s\n'
+            't = time.perf_counter() - t\n'
+            'print(t)\n'
+            'print(",".join([m for m in %r if m in sys.modules]))\n' %
+            (statement,HEAVY_MODULES))
+    
+    # run the statement from the folder of this file, so the package is
+    # found
+    
+    output = subprocess.run([sys.executable,'-c',code],capture_output=True,
+                            text=True,check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    
+    (seconds,modules) = output.stdout.splitlines()
+    
+    return (float(seconds),[m for m in modules.split(',') if m])
+
+def main(argv=None):
+    
+    parser = argparse.ArgumentParser(
+                 description='Check the import time of the package.')
+    
+    parser.add_argument('--repeats',type=int,default=5,
+                        help='number of processes used for each statement')
+    
+    parser.add_argument('--scale',type=float,default=1.0,
+                        help='factor applied to every budget, for slower '
+                             'machines')
+    
+    args = parser.parse_args(argv)
+    
+    failed = 0
+    
+    print('%-46s %8s %8s  %s' % ('statement','time','budget','imports'))
+    
+    for (statement,budget,forbidden) in BUDGETS:
+        
+        times = []
+        
+        for _ in range(args.repeats):
+            
+            (seconds,modules) = time_import(statement)
+            
+            times.append(seconds)
+        
+        budget = budget*args.scale
+        
+        loaded = [m for m in modules if m in forbidden]
+        
+        status = ''
+        
+        if min(times) > budget or loaded:
+            
+            failed += 1
+            
+            status = '  FAILED'
+        
+        print('%-46s %7.3fs %7.3fs  %s%s' % (statement,min(times),budget,
+                                            ','.join(modules) or '-',
+                                            status))
+    
+    seconds = min([time_import(REFERENCE)[0] for _ in range(args.repeats)])
+    
+    print('%-46s %7.3fs' % ('heavy libraries (reference)',seconds))
+    
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    
+    sys.exit(main())
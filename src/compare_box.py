@@ -0,0 +1,130 @@
+# This file compares the blobs detected using the approximate box filter
+# engine with the blobs detected using the exact FFT engine for every image
+# in the images folder, to decide if the box engine can be used. For every
+# image, it prints the number of blobs detected using each engine, the
+# recall and precision of the box engine, and the time taken by each
+# engine. A blob of the box engine matches a blob of the FFT engine if they
+# are in the same octave, their layers are at most max_layer_diff apart,
+# and their centers are at most max_dist pixels apart at the scale of the
+# octave. The recall is the fraction of the FFT blobs that are matched by a
+# box blob, and the precision is the fraction of the box blobs that match
+# an FFT blob. The parameters below are passed to get_blob_loc.
+
+# import the glob library
+
+import glob
+
+# import the os library
+
+import os
+
+# import the time library
+
+import time
+
+# import OpenCV library
+
+import cv2 as cv
+
+# import NumPy library
+
+import numpy as np
+
+# import the get_blob_loc function
+
+from blob_detection import get_blob_loc
+
+# Number of desired octaves in scale space
+
+number_of_octaves = 3
+
+# Number of desired layers of difference of Gaussian in each octave
+
+number_of_DoG_layers = 4
+
+# initial sigma value used for scale space
+
+sigma = 1.6
+
+# initial scaling factor for sigma
+
+k = np.sqrt(2)
+
+# the tolerances used to match the blobs
+
+max_layer_diff = 1
+
+max_dist = 2
+
+# This function returns a boolean matrix whose element (i,j) is True if
+# the i-th blob in blobs_a matches the j-th blob in blobs_b, where the
+# blobs are given by the outputs of get_blob_loc.
+
+def match_blobs(blobs_a,blobs_b):
+    
+    (idx_a,layer_a) = (np.array(blobs_a[0]).reshape((-1,2)),blobs_a[1])
+    
+    (idx_b,layer_b) = (np.array(blobs_b[0]).reshape((-1,2)),blobs_b[1])
+    
+    # the octave of each blob and its layer in the octave
+    
+    (oct_a,oct_b) = (layer_a//number_of_DoG_layers,
+                     layer_b//number_of_DoG_layers)
+    
+    same_octave = oct_a[:,None] == oct_b[None,:]
+    
+    close_layer = np.abs(layer_a[:,None] - layer_b[None,:]) <= max_layer_diff
+    
+    # the distance between the centers at the scale of the octave
+    
+    dist = np.sqrt(((idx_a[:,None,:] - idx_b[None,:,:])**2).sum(axis=2))
+    
+    close = dist <= max_dist*np.power(2,oct_a)[:,None]
+    
+    return same_octave & close_layer & close
+
+print('%-16s %6s %6s %7s %9s %8s %8s' % ('image','fft','box','recall',
+                                         'precision','t_fft','t_box'))
+
+totals = np.zeros(4)
+
+for filename in sorted(glob.glob('../images/*')): # loop through each image
+    
+    img = cv.imread(filename)
+    
+    # detect the blobs and time both engines
+    
+    blobs = []
+    
+    times = []
+    
+    for engine in ('fft','box'):
+        
+        start_time = time.perf_counter()
+        
+        blobs.append(get_blob_loc(img,oct_num=number_of_octaves,
+                                  DoG_layer_num=number_of_DoG_layers,
+                                  sigma=sigma,k=k,conv_engine=engine))
+        
+        times.append(time.perf_counter() - start_time)
+    
+    matches = match_blobs(blobs[0],blobs[1])
+    
+    # the FFT blobs matched by a box blob, and the box blobs that match an
+    # FFT blob
+    
+    found = np.count_nonzero(matches.any(axis=1))
+    
+    correct = np.count_nonzero(matches.any(axis=0))
+    
+    (num_fft,num_box) = (len(blobs[0][0]),len(blobs[1][0]))
+    
+    totals += [num_fft,num_box,found,correct]
+    
+    print('%-16s %6d %6d %7.3f %9.3f %7.3fs %7.3fs' %
+          (os.path.basename(filename),num_fft,num_box,
+           found/max(num_fft,1),correct/max(num_box,1),times[0],times[1]))
+
+print('%-16s %6d %6d %7.3f %9.3f' % ('total',totals[0],totals[1],
+                                     totals[2]/max(totals[0],1),
+                                     totals[3]/max(totals[1],1)))
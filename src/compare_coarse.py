@@ -0,0 +1,115 @@
+# This file compares the blobs detected using the coarse-to-fine engine for
+# non-maximum suppression with the blobs detected using the exhaustive
+# vectorized engine for every image in the images folder, to decide which
+# margin to use. For every image, it prints the number of blobs detected by
+# the exhaustive search, the number of these blobs that are missed by the
+# coarse engine for each margin below, and the time spent by each engine
+# in non-maximum suppression, without the thresholding. The blobs of the
+# coarse engine are always blobs of the exhaustive search, so the blobs
+# that are missed are the only difference between the engines. The
+# parameters below are passed to get_blob_loc.
+
+# import the glob library
+
+import glob
+
+# import the os library
+
+import os
+
+# import OpenCV library
+
+import cv2 as cv
+
+# import NumPy library
+
+import numpy as np
+
+# import the get_blob_loc function
+
+from blob_detection import get_blob_loc
+
+# import the Profiler class
+
+from blob_detection import Profiler
+
+# Number of desired octaves in scale space
+
+number_of_octaves = 3
+
+# Number of desired layers of difference of Gaussian in each octave
+
+number_of_DoG_layers = 4
+
+# initial sigma value used for scale space
+
+sigma = 1.6
+
+# initial scaling factor for sigma
+
+k = np.sqrt(2)
+
+# the margins of the coarse engine
+
+margins = (0,2,4)
+
+# the margin whose time is printed, which is the default of get_blob_loc
+
+timed_margin = 2
+
+# This function detects the blobs of an image using the given engine, and
+# returns the set of blobs and the time spent in non-maximum suppression.
+
+def get_blobs(img,nms_engine,nms_margin=2):
+    
+    profiler = Profiler()
+    
+    (blob_idx,blob_layer_num) = get_blob_loc(img,oct_num=number_of_octaves,
+                                             DoG_layer_num=
+                                             number_of_DoG_layers,
+                                             sigma=sigma,k=k,
+                                             nms_engine=nms_engine,
+                                             profiler=profiler,
+                                             nms_margin=nms_margin)
+    
+    stats = profiler.get_stats()
+    
+    nms_time = stats['get_maxima_loc']['total'] - stats['threshold']['total']
+    
+    return (set(zip(blob_idx,blob_layer_num.tolist())),nms_time)
+
+print(('%-16s %6s' + ' %8s'*len(margins) + ' %8s %8s') %
+      (('image','blobs') + tuple('missed_%d' % m for m in margins) +
+       ('t_exh','t_coarse')))
+
+totals = np.zeros(len(margins)+3)
+
+for filename in sorted(glob.glob('../images/*')): # loop through each image
+    
+    img = cv.imread(filename)
+    
+    (blobs,exh_time) = get_blobs(img,'vectorized')
+    
+    # the blobs of the exhaustive search that are missed by the coarse
+    # engine for each margin
+    
+    missed = []
+    
+    for margin in margins:
+        
+        (coarse_blobs,nms_time) = get_blobs(img,'coarse',margin)
+        
+        missed.append(len(blobs - coarse_blobs))
+        
+        if margin == timed_margin:
+            
+            coarse_time = nms_time
+    
+    totals += [len(blobs)] + missed + [exh_time,coarse_time]
+    
+    print(('%-16s %6d' + ' %8d'*len(margins) + ' %7.3fs %7.3fs') %
+          ((os.path.basename(filename),len(blobs)) + tuple(missed) +
+           (exh_time,coarse_time)))
+
+print(('%-16s %6d' + ' %8d'*len(margins) + ' %7.3fs %7.3fs') %
+      (('total',) + tuple(totals)))
@@ -0,0 +1,73 @@
+# This file compares the blobs detected using float32 with the blobs
+# detected using float64 for every image in the images folder, to decide
+# if the float32 precision mode can be used. For every image, it prints
+# the number of blobs detected using each data type, and the number of
+# blobs that are only detected using one of the two data types. The
+# parameters below are passed to get_blob_loc.
+
+# import the glob library
+
+import glob
+
+# import the os library
+
+import os
+
+# import OpenCV library
+
+import cv2 as cv
+
+# import NumPy library
+
+import numpy as np
+
+# import the get_blob_loc function
+
+from blob_detection import get_blob_loc
+
+# Number of desired octaves in scale space
+
+number_of_octaves = 3
+
+# Number of desired layers of difference of Gaussian in each octave
+
+number_of_DoG_layers = 4
+
+# initial sigma value used for scale space
+
+sigma = 1.6
+
+# initial scaling factor for sigma
+
+k = np.sqrt(2)
+
+print('%-16s %8s %8s %8s %8s' % ('image','float64','float32','missing',
+                                  'extra'))
+
+for filename in sorted(glob.glob('../images/*')): # loop through each image
+    
+    img = cv.imread(filename)
+    
+    # detect the blobs using both data types. Each blob is represented by
+    # its x and y co-ordinates and its layer number.
+    
+    blobs = []
+    
+    for dtype in (np.float64,np.float32):
+        
+        (maxima_idx,maxima_layer_num) = get_blob_loc(img,
+                                        oct_num=number_of_octaves,
+                                        DoG_layer_num=number_of_DoG_layers,
+                                        sigma=sigma,k=k,dtype=dtype)
+        
+        blobs.append(set(zip(maxima_idx,maxima_layer_num.tolist())))
+    
+    # count the blobs that are missing from or only detected by float32
+    
+    missing = len(blobs[0] - blobs[1])
+    
+    extra = len(blobs[1] - blobs[0])
+    
+    print('%-16s %8d %8d %8d %8d' % (os.path.basename(filename),
+                                      len(blobs[0]),len(blobs[1]),
+                                      missing,extra))
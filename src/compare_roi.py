@@ -0,0 +1,97 @@
+# This file checks that get_blob_loc detects the same blobs with a region
+# of interest that covers the whole image as without any region of
+# interest, for every image in the images folder. The thresholding
+# strategies below include a list of threshold values of the middle layers,
+# which are used by every octave in both cases. For every image and
+# strategy, it prints the number of blobs detected without and with the
+# region of interest, and the number of blobs that are only detected in one
+# of the two cases. The parameters below are passed to get_blob_loc.
+
+# import the glob library
+
+import glob
+
+# import the os library
+
+import os
+
+# import OpenCV library
+
+import cv2 as cv
+
+# import NumPy library
+
+import numpy as np
+
+# import the get_blob_loc function
+
+from blob_detection import get_blob_loc
+
+# Number of desired octaves in scale space
+
+number_of_octaves = 3
+
+# Number of desired layers of difference of Gaussian in each octave
+
+number_of_DoG_layers = 4
+
+# initial sigma value used for scale space
+
+sigma = 1.6
+
+# initial scaling factor for sigma
+
+k = np.sqrt(2)
+
+# the thresholding strategies that are compared, where the list contains
+# one threshold value per middle layer
+
+thresh_list = [('yen',None),('fixed',30.0),('list',[50.0,80.0])]
+
+print('%-16s %-6s %8s %8s %8s %8s' % ('image','thresh','full','roi',
+                                       'missing','extra'))
+
+failed = 0
+
+for filename in sorted(glob.glob('../images/*')): # loop through each image
+    
+    img = cv.imread(filename)
+    
+    # a single region of interest covering the whole image
+    
+    roi = [(0,0,img.shape[1],img.shape[0])]
+    
+    for (name,thresh) in thresh_list:
+        
+        # detect the blobs without and with the region of interest. Each
+        # blob is represented by its x and y co-ordinates and its layer
+        # number.
+        
+        blobs = []
+        
+        for img_roi in (None,roi):
+            
+            (maxima_idx,maxima_layer_num) = get_blob_loc(img,
+                                            oct_num=number_of_octaves,
+                                            DoG_layer_num=number_of_DoG_layers,
+                                            sigma=sigma,k=k,thresh=thresh,
+                                            roi=img_roi)
+            
+            blobs.append(set(zip(maxima_idx,maxima_layer_num.tolist())))
+        
+        # count the blobs that are missing from or only detected with the
+        # region of interest
+        
+        missing = len(blobs[0] - blobs[1])
+        
+        extra = len(blobs[1] - blobs[0])
+        
+        if missing or extra:
+            
+            failed += 1
+        
+        print('%-16s %-6s %8d %8d %8d %8d' % (os.path.basename(filename),
+                                               name,len(blobs[0]),
+                                               len(blobs[1]),missing,extra))
+
+print('%d cases differ' % failed)
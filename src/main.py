@@ -11,7 +11,7 @@ import numpy as np
 
 # import the show_blobs function
 
-from show_blobs import show_blobs
+from blob_detection import show_blobs
 
 # Number of desired octaves in scale space
 